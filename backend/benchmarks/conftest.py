@@ -0,0 +1,70 @@
+"""Fixtures for the micro-benchmark suite.
+
+The app is exercised in-process through ``TestClient`` against the in-memory
+client from ``fake_prisma`` holding deterministic synthetic rows, so results do
+not depend on a database. Run from ``backend/``::
+
+    pytest benchmarks --benchmark-only
+"""
+
+import os
+
+os.environ.setdefault("DB_BACKEND", "memory")
+
+# Admission control would throttle a tight benchmark loop.
+for _route_class in ("AUTH", "SEARCH", "WRITE", "DEFAULT"):
+    for _scope in ("IP", "USER"):
+        os.environ.setdefault(f"RATE_LIMIT_{_route_class}_{_scope}", "off")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import synthetic_data
+from db import instrument
+from fake_prisma import InMemoryPrisma
+
+BENCH_EMAIL = "bench@gevp.org"
+
+
+def make_db(product_count: int, password_hash: str) -> InMemoryPrisma:
+    scale = synthetic_data.Scale(countries=20, products=product_count)
+    db = InMemoryPrisma(latency_ms=0, jitter_ms=0)
+    db.load("country", synthetic_data.countries(scale))
+    db.load("product", synthetic_data.products(scale))
+    db.load("user", [{
+        "id": "bench-user",
+        "email": BENCH_EMAIL,
+        "password": password_hash,
+        "role": "SUPER_ADMIN",
+        "isActive": True,
+    }])
+    return db
+
+
+@pytest.fixture(scope="session")
+def password_hash():
+    return main.get_password_hash(synthetic_data.BENCH_PASSWORD)
+
+
+@pytest.fixture(scope="session")
+def access_token():
+    return main.create_access_token({"sub": BENCH_EMAIL})
+
+
+@pytest.fixture
+def stub_db(monkeypatch, password_hash):
+    """Install an in-memory client; call it with a product count to (re)populate it."""
+
+    def install(product_count: int = 0):
+        db = make_db(product_count, password_hash)
+        monkeypatch.setattr(main, "prisma", instrument(db))
+        return db
+
+    install()
+    return install
+
+
+@pytest.fixture
+def client(stub_db):
+    return TestClient(main.app)
@@ -0,0 +1,315 @@
+"""Asyncio/httpx load generator for the GEVP API.
+
+Runs a weighted mix of scenarios against a running server loaded with the
+synthetic dataset (``python seed_data.py --scale N``) and records per-request
+latency percentiles and throughput to JSON::
+
+    python -m benchmarks.loadtest --url http://localhost:8000 --scale 10 \\
+        --users 50 --duration 60 --mix search=70,dashboard=20,edits=5,admin=5 \\
+        --out results.json --compare baseline.json
+
+``--scale`` and ``--seed`` must match the ones the database was seeded with so
+that generated IDs exist. Disable admission control on the target
+(``RATE_LIMIT_*=off``) unless the limiter itself is under test.
+
+Scenarios:
+
+``search``     anonymous product search and country listing
+``dashboard``  a country admin browsing their dashboard
+``edits``      a country admin editing, creating and deleting products, one by
+               one and in bulk
+``admin``      the super admin reviewing audit logs and users
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+import synthetic_data
+from synthetic_data import Scale
+
+SEARCH_TERMS = [c.split()[0].lower() for c in synthetic_data.COMMODITIES] + ["premium", "organic", "export"]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+
+class Session:
+    """One virtual user's view of the dataset."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, scale: Scale, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.scale = scale
+        self.rng = rng
+        self.tokens: Dict[str, str] = {}
+
+    async def login(self, email: str) -> Optional[Dict[str, str]]:
+        if email not in self.tokens:
+            response = await self.recorder.request(
+                self.client,
+                "POST /token",
+                "POST",
+                "/token",
+                data={"username": email, "password": synthetic_data.BENCH_PASSWORD},
+            )
+            if response is None or response.status_code != 200:
+                return None
+            self.tokens[email] = response.json()["access_token"]
+        return {"Authorization": f"Bearer {self.tokens[email]}"}
+
+    async def search(self):
+        params = {"search": self.rng.choice(SEARCH_TERMS)}
+        if self.rng.random() < 0.3:
+            params["category"] = self.rng.choice(synthetic_data.CATEGORIES)
+        await self.recorder.request(self.client, "GET /products", "GET", "/products", params=params)
+        if self.rng.random() < 0.2:
+            await self.recorder.request(self.client, "GET /countries", "GET", "/countries")
+
+    async def dashboard(self):
+        country = self.rng.randrange(self.scale.countries)
+        headers = await self.login(synthetic_data.country_admin_email(country))
+        if headers is None:
+            return
+        cid = synthetic_data.country_id(country)
+        await self.recorder.request(self.client, "GET /me", "GET", "/me", headers=headers)
+        await self.recorder.request(
+            self.client, "GET /countries/{country_id}/products", "GET", f"/countries/{cid}/products"
+        )
+        await self.recorder.request(self.client, "GET /exporters", "GET", "/exporters", params={"country_id": cid})
+
+    async def edits(self):
+        country = self.rng.randrange(self.scale.countries)
+        headers = await self.login(synthetic_data.country_admin_email(country))
+        own_products = synthetic_data.products_of_country(self.scale, country)
+        if headers is None or not own_products:
+            return
+        for _ in range(3):
+            index = self.rng.choice(own_products)
+            body = _product_body(synthetic_data.product(self.scale, index))
+            body["quantity"] = round(body["quantity"] * self.rng.uniform(0.9, 1.1), 2)
+            await self.recorder.request(
+                self.client,
+                "PUT /products/{product_id}",
+                "PUT",
+                f"/products/{synthetic_data.product_id(index)}",
+                json=body,
+                headers=headers,
+            )
+        await self.recorder.request(
+            self.client,
+            "POST /products/bulk-update",
+            "POST",
+            "/products/bulk-update",
+            json={
+                "ids": [synthetic_data.product_id(i) for i in self.rng.sample(own_products, min(20, len(own_products)))],
+                "patch": {"tax_rate": round(self.rng.uniform(0, 25), 1)},
+            },
+            headers=headers,
+        )
+        created_ids = []
+        for _ in range(3):
+            created = await self.recorder.request(
+                self.client,
+                "POST /products",
+                "POST",
+                "/products",
+                json=_product_body(synthetic_data.product(self.scale, self.rng.randrange(10**9))),
+                headers=headers,
+            )
+            if created is not None and created.status_code == 200:
+                created_ids.append(created.json()["id"])
+        if created_ids:
+            await self.recorder.request(
+                self.client,
+                "DELETE /products/{product_id}",
+                "DELETE",
+                f"/products/{created_ids.pop()}",
+                headers=headers,
+            )
+        if created_ids:
+            await self.recorder.request(
+                self.client,
+                "POST /products/bulk-delete",
+                "POST",
+                "/products/bulk-delete",
+                json={"ids": created_ids},
+                headers=headers,
+            )
+
+    async def admin(self):
+        headers = await self.login(synthetic_data.SUPER_ADMIN_EMAIL)
+        if headers is None:
+            return
+        await self.recorder.request(self.client, "GET /admin/audit-logs", "GET", "/admin/audit-logs", headers=headers)
+        if self.rng.random() < 0.3:
+            await self.recorder.request(self.client, "GET /admin/users", "GET", "/admin/users", headers=headers)
+
+
+def _product_body(row: Dict) -> Dict:
+    return {
+        "name": row["name"],
+        "unit": row["unit"],
+        "quantity": row["quantity"],
+        "tax_rate": row["taxRate"],
+        "time_period": row["timePeriod"],
+        "tags": row["tags"],
+        "category": row["category"],
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict:
+    endpoints = {}
+    all_latencies = []
+    for name, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        all_latencies.extend(values)
+        endpoints[name] = _stats(values, recorder.errors.get(name, 0), elapsed)
+    return {
+        "overall": _stats(sorted(all_latencies), sum(recorder.errors.values()), elapsed),
+        "endpoints": endpoints,
+    }
+
+
+def _stats(values: List[float], errors: int, elapsed: float) -> Dict:
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("search", "dashboard", "edits", "admin"):
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def run(args) -> Dict:
+    scale = Scale.from_factor(args.scale, seed=args.seed)
+    names = list(args.mix)
+    weights = [args.mix[n] for n in names]
+    recorder = Recorder()
+    warmup_recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        deadline = time.perf_counter() + args.warmup + args.duration
+        measure_from = time.perf_counter() + args.warmup
+
+        async def virtual_user(n: int):
+            session = Session(client, warmup_recorder, scale, random.Random(f"{args.seed}:vu:{n}"))
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    return
+                session.recorder = recorder if now >= measure_from else warmup_recorder
+                scenario = session.rng.choices(names, weights)[0]
+                await getattr(session, scenario)()
+
+        await asyncio.gather(*(virtual_user(n) for n in range(args.users)))
+
+    result = summarize(recorder, args.duration)
+    result["config"] = {
+        "url": args.url,
+        "users": args.users,
+        "duration_s": args.duration,
+        "warmup_s": args.warmup,
+        "mix": args.mix,
+        "dataset": {"countries": scale.countries, "products": scale.products, "exporters": scale.exporters},
+    }
+    return result
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Endpoints whose p95 regressed by more than ``tolerance`` (fraction) vs the baseline."""
+    regressions = []
+    for name, stats in result["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before or not before["p95_ms"]:
+            continue
+        change = stats["p95_ms"] / before["p95_ms"] - 1
+        line = f"{name}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms ({change:+.0%})"
+        print(line)
+        if change > tolerance:
+            regressions.append(line)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="GEVP API load test")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured warm-up seconds")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("search=70,dashboard=20,edits=5,admin=5"))
+    parser.add_argument("--scale", type=float, default=1, help="scale factor the database was seeded with")
+    parser.add_argument("--seed", type=int, default=42, help="seed the database was seeded with")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 regression (fraction)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    result = asyncio.run(run(args))
+    overall = result["overall"]
+    print(
+        f"{overall['requests']} requests, {overall['errors']} errors, {overall['throughput_rps']} req/s, "
+        f"p50 {overall['p50_ms']} ms, p95 {overall['p95_ms']} ms, p99 {overall['p99_ms']} ms"
+    )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ p95 regressions:\n" + "\n".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
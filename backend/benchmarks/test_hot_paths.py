@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from jose import jwt
+
+import main
+import synthetic_data
+
+LIST_SIZES = (100, 1000, 10000)
+
+PRODUCT_PAYLOAD = {
+    "name": "Premium Coffee Beans",
+    "unit": "tons",
+    "quantity": 2500000,
+    "tax_rate": 5.0,
+    "time_period": "2024 Annual",
+    "tags": ["arabica", "premium", "fair-trade"],
+    "category": "Food & Beverages",
+}
+
+
+def test_create_access_token(benchmark):
+    token = benchmark(main.create_access_token, {"sub": "bench@gevp.org"})
+    assert token
+
+
+def test_jwt_decode(benchmark, access_token):
+    payload = benchmark(jwt.decode, access_token, main.SECRET_KEY, algorithms=[main.ALGORITHM])
+    assert payload["sub"] == "bench@gevp.org"
+
+
+def test_get_current_user(benchmark, stub_db, access_token):
+    loop = asyncio.new_event_loop()
+    try:
+        user = benchmark(lambda: loop.run_until_complete(main.get_current_user(access_token)))
+    finally:
+        loop.close()
+    assert user.email == "bench@gevp.org"
+
+
+def test_verify_password(benchmark, password_hash):
+    # bcrypt is deliberately slow; a handful of rounds is enough.
+    ok = benchmark.pedantic(
+        main.verify_password, args=(synthetic_data.BENCH_PASSWORD, password_hash), rounds=5, iterations=1
+    )
+    assert ok
+
+
+def test_product_create_validation(benchmark):
+    product = benchmark(main.ProductCreate.model_validate, PRODUCT_PAYLOAD)
+    assert product.name == PRODUCT_PAYLOAD["name"]
+
+
+@pytest.mark.parametrize("size", LIST_SIZES)
+def test_product_list_encoding(benchmark, stub_db, size):
+    products = asyncio.run(stub_db(size).product.find_many(include={"country": True}))
+    encoded = benchmark(jsonable_encoder, products)
+    assert len(encoded) == size
+
+
+@pytest.mark.parametrize("size", LIST_SIZES)
+def test_get_products_endpoint(benchmark, stub_db, client, size):
+    stub_db(size)
+    response = benchmark(client.get, "/products")
+    assert response.status_code == 200
+    assert len(response.json()) == size
+
+
+def test_me_endpoint(benchmark, client, access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = benchmark(client.get, "/me", headers=headers)
+    assert response.status_code == 200
@@ -0,0 +1,54 @@
+"""Bloom filter used as a negative cache for unique keys.
+
+A Bloom filter answers "definitely not present" or "possibly present" in a
+fixed amount of memory. Loaded with every existing key, it lets a writer skip
+the existence query for keys that are certainly new and pay the round trip
+only for the rest (real duplicates plus a ``error_rate`` share of false
+positives). Keys are never removed, so deleted keys just stay "possibly
+present" and cost a query. The unique constraint remains the authority:
+the filter only ever saves queries, it never decides a conflict.
+"""
+
+import hashlib
+import math
+from typing import Iterable
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # Double hashing (Kirsch-Mitzenmacher): k positions from one digest.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class NegativeCache:
+    """Which keys are certainly absent; until ``loaded``, nothing is."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self._filter = BloomFilter(capacity, error_rate)
+        self.loaded = False
+
+    def add(self, key: str) -> None:
+        self._filter.add(key)
+
+    def add_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._filter.add(key)
+
+    def definitely_absent(self, key: str) -> bool:
+        return self.loaded and key not in self._filter
@@ -0,0 +1,98 @@
+"""Small in-process caches for rarely changing reference data."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from metrics import record_cache
+
+
+class AsyncTTLCache:
+    """Single value loaded by ``loader`` and reused for ``ttl`` seconds.
+
+    Concurrent misses share one load, so an expired entry under load costs a
+    single query rather than one per request. ``invalidate`` discards a load
+    already in flight: it may have read before the write that caused the
+    invalidation, so its result is returned to its waiters but not cached.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Awaitable[Any]], ttl: float):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self._value: Any = None
+        self._expires = 0.0
+        self._pending: Optional[asyncio.Future] = None
+        self._generation = 0
+
+    @property
+    def warm(self) -> bool:
+        return time.monotonic() < self._expires
+
+    async def get(self) -> Any:
+        if self.warm:
+            record_cache(self.name, True)
+            return self._value
+        record_cache(self.name, False)
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._load(self._generation))
+        return await asyncio.shield(self._pending)
+
+    async def refresh(self) -> Any:
+        self.invalidate()
+        return await self.get()
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._expires = 0.0
+        self._pending = None
+
+    async def _load(self, generation: int) -> Any:
+        try:
+            value = await self.loader()
+            if generation == self._generation:
+                self._value = value
+                self._expires = time.monotonic() + self.ttl
+            return value
+        finally:
+            if generation == self._generation:
+                self._pending = None
+
+
+class KeyedTTLCache:
+    """``AsyncTTLCache`` per key, keeping the ``max_keys`` most recently used.
+
+    A ``ttl`` of 0 turns the cache off: every ``get`` calls ``loader``.
+    """
+
+    def __init__(
+        self, name: str, loader: Callable[[Hashable], Awaitable[Any]], ttl: float, max_keys: int = 1024
+    ):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[Hashable, AsyncTTLCache]" = OrderedDict()
+
+    async def get(self, key: Hashable) -> Any:
+        if self.ttl <= 0:
+            return await self.loader(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = AsyncTTLCache(self.name, lambda: self.loader(key), self.ttl)
+            self._entries[key] = entry
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return await entry.get()
+
+    def invalidate(self, key: Hashable) -> None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.invalidate()
+
+    def clear(self) -> None:
+        for entry in self._entries.values():
+            entry.invalidate()
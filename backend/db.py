@@ -0,0 +1,223 @@
+"""Instrumented access to the Prisma client.
+
+``instrument(Prisma())`` returns a drop-in proxy: ``client.product.find_many(...)``
+and the other model actions behave exactly as before, but every awaited call is
+timed and reported to the registered query observers (metrics, tracing, slow
+query log). Observers run synchronously after the query returns and must be
+cheap; anything expensive should be scheduled on the event loop.
+"""
+
+import inspect
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app_logging import get_logger
+
+logger = get_logger("db")
+
+# Prisma model accessors on the generated client.
+MODELS = ("user", "country", "product", "exporter", "exporterproduct", "auditlog", "producttombstone", "outboxevent")
+
+# Client-level methods that issue queries.
+RAW_ACTIONS = ("query_raw", "query_first", "execute_raw")
+
+# Physical table names and field -> column mappings from schema.prisma, for
+# hand-written SQL. Fields not listed map to a column of the same name.
+TABLES = {
+    "user": "users",
+    "country": "countries",
+    "product": "products",
+    "exporter": "exporters",
+    "exporterproduct": "exporter_products",
+    "auditlog": "audit_logs",
+    "producttombstone": "product_tombstones",
+    "outboxevent": "outbox_events",
+}
+COLUMNS = {
+    "user": {"countryId": "country_id", "isActive": "is_active", "createdAt": "created_at", "updatedAt": "updated_at"},
+    "country": {"flagUrl": "flag_url", "contactInfo": "contact_info", "createdAt": "created_at", "updatedAt": "updated_at"},
+    "product": {
+        "taxRate": "tax_rate",
+        "timePeriod": "time_period",
+        "countryId": "country_id",
+        "unitFamily": "unit_family",
+        "canonicalQuantity": "canonical_quantity",
+        "createdAt": "created_at",
+        "updatedAt": "updated_at",
+    },
+    "exporter": {"licenseId": "license_id", "countryId": "country_id", "createdAt": "created_at", "updatedAt": "updated_at"},
+    "exporterproduct": {"exporterId": "exporter_id", "productId": "product_id"},
+    "auditlog": {"userId": "user_id"},
+    "producttombstone": {"countryId": "country_id", "deletedAt": "deleted_at"},
+    "outboxevent": {"claimedBy": "claimed_by", "claimedAt": "claimed_at", "createdAt": "created_at"},
+}
+
+
+def column(model: str, field: str) -> str:
+    """Quoted column name for ``model.field``."""
+    return '"%s"' % COLUMNS.get(model, {}).get(field, field)
+
+
+@dataclass
+class QueryEvent:
+    model: str
+    action: str
+    arguments: Dict[str, Any]
+    start_time_ns: int
+    duration: float
+    error: Optional[BaseException] = None
+
+
+QueryObserver = Callable[[QueryEvent], None]
+
+_observers: List[QueryObserver] = []
+_in_flight = 0
+
+
+def in_flight_queries() -> int:
+    """Queries currently awaiting the database in this process."""
+    return _in_flight
+
+
+def add_query_observer(observer: QueryObserver) -> None:
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_query_observer(observer: QueryObserver) -> None:
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def _notify(event: QueryEvent) -> None:
+    for observer in _observers:
+        try:
+            observer(event)
+        except Exception:
+            logger.exception("Query observer %r failed", observer)
+
+
+def _wrap(model: str, action: str, method):
+    async def instrumented(*args, **kwargs):
+        global _in_flight
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        error = None
+        _in_flight += 1
+        try:
+            return await method(*args, **kwargs)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _in_flight -= 1
+            arguments = dict(kwargs)
+            if args:
+                arguments["args"] = args
+            _notify(QueryEvent(model, action, arguments, start_ns, time.perf_counter() - start, error))
+
+    instrumented.__name__ = action
+    instrumented.__wrapped__ = method
+    return instrumented
+
+
+class _ModelProxy:
+    def __init__(self, model: str, delegate):
+        self._model = model
+        self._delegate = delegate
+
+    def __getattr__(self, action: str):
+        attr = getattr(self._delegate, action)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+        wrapped = _wrap(self._model, action, attr)
+        # Cache on the instance so the wrapper is built once per action.
+        setattr(self, action, wrapped)
+        return wrapped
+
+
+class InstrumentedPrisma:
+    """Proxy around a ``Prisma`` client that reports every query to observers."""
+
+    def __init__(self, client):
+        self._client = client
+        for model in MODELS:
+            setattr(self, model, _ModelProxy(model, getattr(client, model)))
+        for action in RAW_ACTIONS:
+            if hasattr(client, action):
+                setattr(self, action, _wrap("raw", action, getattr(client, action)))
+
+    @property
+    def client(self):
+        return self._client
+
+    def tx(self, **kwargs) -> "_InstrumentedTransaction":
+        """``async with client.tx() as tx``: queries on ``tx`` are instrumented too."""
+        return _InstrumentedTransaction(self._client.tx(**kwargs))
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+class _InstrumentedTransaction:
+    def __init__(self, manager):
+        self._manager = manager
+
+    async def __aenter__(self) -> InstrumentedPrisma:
+        return InstrumentedPrisma(await self._manager.__aenter__())
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._manager.__aexit__(exc_type, exc, tb)
+
+
+def instrument(client) -> InstrumentedPrisma:
+    return InstrumentedPrisma(client)
+
+
+def create_client():
+    """Database client selected by ``DB_BACKEND``: ``postgres`` (default) or ``memory``.
+
+    ``memory`` uses the in-memory stand-in from ``fake_prisma`` for benchmarks
+    and load tests that should not measure the database; with
+    ``DB_MEMORY_SCALE`` set it is pre-filled with the synthetic dataset.
+
+    ``DB_CONNECTION_LIMIT`` caps the Prisma engine's pool for this process;
+    the gunicorn config sets it per worker so that N workers together stay
+    within ``DB_MAX_CONNECTIONS``.
+    """
+    backend = os.getenv("DB_BACKEND", "postgres").lower()
+    if backend == "memory":
+        from fake_prisma import InMemoryPrisma
+
+        client = InMemoryPrisma()
+        scale = float(os.getenv("DB_MEMORY_SCALE", "0"))
+        if scale:
+            from passlib.context import CryptContext
+
+            import synthetic_data
+
+            bench_hash = CryptContext(schemes=["bcrypt"]).hash(synthetic_data.BENCH_PASSWORD)
+            dataset = synthetic_data.Scale.from_factor(scale, seed=int(os.getenv("DB_MEMORY_SEED", "42")))
+            client.load_synthetic(dataset, bench_hash)
+        return client
+    if backend != "postgres":
+        raise ValueError(f"Unknown DB_BACKEND {backend!r}")
+
+    from prisma import Prisma
+
+    url = os.getenv("DATABASE_URL")
+    limit = os.getenv("DB_CONNECTION_LIMIT")
+    if url and limit:
+        return Prisma(datasource={"url": with_query_params(url, connection_limit=int(limit))})
+    return Prisma()
+
+
+def with_query_params(url: str, **params) -> str:
+    """``url`` with the given query parameters added or replaced."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update({k: str(v) for k, v in params.items()})
+    return urlunsplit(parts._replace(query=urlencode(query)))
@@ -0,0 +1,270 @@
+"""Change feed: product and exporter events pushed to subscribers.
+
+Mutating endpoints publish a ``ChangeEvent``; ``GET /events`` streams them to
+clients as server-sent events, optionally filtered by country and entity, so
+dashboards update in place instead of polling the full lists.
+
+Events travel through a ``Broker``. The default ``LocalBroker`` delivers within
+the process, which is enough for a single worker. With several workers or
+hosts, set ``CHANGE_FEED_BROKER_URL`` to a ``redis://`` URL so that an event
+published by one worker reaches subscribers connected to any of them.
+
+Every worker also passes each event it receives to its listeners (see
+``add_listener``), which is how per-worker caches are invalidated. Only a
+shared broker reaches every worker, so caches that depend on it are enabled
+only then (``Broker.shared``).
+
+Each subscriber has a bounded queue. A client that cannot keep up is
+disconnected instead of buffering without limit; ``EventSource`` reconnects on
+its own and the client should then refetch.
+
+Configuration (environment):
+
+``CHANGE_FEED_BROKER_URL``     ``memory://`` (default) or ``redis://...``
+``CHANGE_FEED_MAX_SUBSCRIBERS`` open streams per worker, default ``1000``
+``CHANGE_FEED_QUEUE_SIZE``      undelivered events per subscriber, default ``256``
+``CHANGE_FEED_HEARTBEAT``       seconds between keep-alive comments, default ``15``
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from app_logging import get_logger
+from metrics import CHANGE_FEED_DROPPED, CHANGE_FEED_EVENTS, CHANGE_FEED_SUBSCRIBERS
+
+logger = get_logger("events")
+
+ENTITIES = ("product", "exporter")
+ACTIONS = ("created", "updated", "deleted")
+
+
+@dataclass
+class ChangeEvent:
+    entity: str
+    action: str
+    id: str
+    country_id: Optional[str]
+    # JSON-compatible row for created/updated, ``None`` for deletes.
+    data: Optional[Dict] = None
+    ts: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=str, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, payload: str) -> "ChangeEvent":
+        return cls(**json.loads(payload))
+
+
+class Broker:
+    """Transport between publishers and this process's subscribers."""
+
+    # Whether every worker receives every published event.
+    shared = False
+
+    async def start(self, deliver: Callable[[str], None]) -> None:
+        """Begin calling ``deliver`` with every published payload."""
+        raise NotImplementedError
+
+    async def publish(self, payload: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class LocalBroker(Broker):
+    """In-process delivery; publishers and subscribers share one worker."""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[str], None]] = None
+
+    async def start(self, deliver: Callable[[str], None]) -> None:
+        self._deliver = deliver
+
+    async def publish(self, payload: str) -> None:
+        if self._deliver is not None:
+            self._deliver(payload)
+
+
+class RedisBroker(Broker):
+    """Redis pub/sub fan-out across workers and hosts.
+
+    Requires the optional ``redis`` package (``pip install redis``).
+    """
+
+    shared = True
+
+    def __init__(self, url: str, channel: str = "gevp:changes"):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError(
+                "CHANGE_FEED_BROKER_URL is set but the 'redis' package is not installed"
+            ) from exc
+        self.channel = channel
+        self._client = redis_asyncio.from_url(url)
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Callable[[str], None]) -> None:
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._reader = asyncio.create_task(self._read(deliver))
+
+    async def _read(self, deliver: Callable[[str], None]) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    deliver(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change feed subscription failed; resubscribing")
+                await asyncio.sleep(1)
+
+    async def publish(self, payload: str) -> None:
+        await self._client.publish(self.channel, payload)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.close()
+        await self._client.close()
+
+
+def create_broker(url: Optional[str] = None) -> Broker:
+    url = url if url is not None else os.getenv("CHANGE_FEED_BROKER_URL", "")
+    if not url or url == "memory://":
+        return LocalBroker()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported CHANGE_FEED_BROKER_URL: {url}")
+
+
+class FeedFull(Exception):
+    """The worker already serves ``max_subscribers`` streams."""
+
+
+class Subscription:
+    def __init__(self, countries: Optional[FrozenSet[str]], entities: Optional[FrozenSet[str]], queue_size: int):
+        self.countries = countries
+        self.entities = entities
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def wants(self, event: ChangeEvent) -> bool:
+        return (self.entities is None or event.entity in self.entities) and (
+            self.countries is None or event.country_id in self.countries
+        )
+
+
+class ChangeFeed:
+    def __init__(
+        self,
+        broker: Optional[Broker] = None,
+        max_subscribers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        heartbeat: Optional[float] = None,
+    ):
+        self.broker = broker or create_broker()
+        self.max_subscribers = max_subscribers or int(os.getenv("CHANGE_FEED_MAX_SUBSCRIBERS", "1000"))
+        self.queue_size = queue_size or int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "256"))
+        self.heartbeat = heartbeat or float(os.getenv("CHANGE_FEED_HEARTBEAT", "15"))
+        self._subscriptions: Set[Subscription] = set()
+        self._listeners: List[Callable[[ChangeEvent], None]] = []
+        self._ids = itertools.count(1)
+
+    async def start(self) -> None:
+        await self.broker.start(self._deliver)
+
+    async def close(self) -> None:
+        for subscription in list(self._subscriptions):
+            self._end(subscription)
+        await self.broker.close()
+
+    async def publish(self, events: Iterable[ChangeEvent]) -> None:
+        """Publish ``events`` in order; broker errors propagate so the caller can retry."""
+        for event in events:
+            await self.broker.publish(event.to_json())
+
+    def add_listener(self, listener: Callable[[ChangeEvent], None]) -> None:
+        """Call ``listener`` for every event this worker receives, from any publisher."""
+        self._listeners.append(listener)
+
+    def subscribe(
+        self, countries: Optional[Iterable[str]] = None, entities: Optional[Iterable[str]] = None
+    ) -> Subscription:
+        if len(self._subscriptions) >= self.max_subscribers:
+            raise FeedFull()
+        subscription = Subscription(
+            frozenset(countries) if countries else None,
+            frozenset(entities) if entities else None,
+            self.queue_size,
+        )
+        self._subscriptions.add(subscription)
+        CHANGE_FEED_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.discard(subscription)
+            CHANGE_FEED_SUBSCRIBERS.dec()
+
+    def _deliver(self, payload: str) -> None:
+        try:
+            event = ChangeEvent.from_json(payload)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed change event: %.200s", payload)
+            return
+        CHANGE_FEED_EVENTS.labels(event.entity, event.action).inc()
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Change-feed listener failed for %s.%s %s", event.entity, event.action, event.id)
+        # The SSE frame is built once and shared by every matching subscriber.
+        frame = f"id: {next(self._ids)}\nevent: {event.entity}.{event.action}\ndata: {payload}\n\n"
+        for subscription in list(self._subscriptions):
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                CHANGE_FEED_DROPPED.inc()
+                subscription.overflowed = True
+                self._end(subscription)
+
+    def _end(self, subscription: Subscription) -> None:
+        self.unsubscribe(subscription)
+        # Wake the stream so it can finish; make room for the sentinel if needed.
+        while True:
+            try:
+                subscription.queue.put_nowait(None)
+                return
+            except asyncio.QueueFull:
+                subscription.queue.get_nowait()
+
+    async def stream(self, subscription: Subscription) -> AsyncIterator[str]:
+        """Server-sent-event frames for ``subscription`` until it ends or the client leaves."""
+        try:
+            yield "retry: 3000\n: subscribed\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if frame is None:
+                    if subscription.overflowed:
+                        yield "event: overflow\ndata: {}\n\n"
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,787 @@
+"""In-memory stand-in for the generated Prisma client.
+
+``InMemoryPrisma`` implements the subset of the prisma-client-py API the
+backend uses (``find_many``/``find_first``/``find_unique``/``count``/``create``/
+``create_many``/``update``/``update_many``/``upsert``/``delete``/
+``delete_many``/``group_by`` and ``tx()``) over indexed in-memory tables that
+mirror ``schema.prisma``: defaults, ``@updatedAt``, unique constraints,
+foreign keys and relation ``include``s behave like the real client.
+
+It exists to benchmark and load-test the handlers without PostgreSQL, so that
+framework and serialization cost can be separated from database cost. An
+optional injected latency (``DB_FAKE_LATENCY_MS``, ``DB_FAKE_JITTER_MS``)
+models the database round trip. Select it with ``DB_BACKEND=memory``.
+
+Limitations: no raw SQL, transactions are serialised rollback logs rather than
+isolated snapshots, and only the filter operators listed in ``_match_field``
+are supported (anything else raises ``NotImplementedError``).
+"""
+
+import asyncio
+import os
+import random
+import string
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from prisma import errors
+from pydantic import BaseModel, ConfigDict
+
+
+class Record(BaseModel):
+    """Row returned to callers; attribute access like a generated Prisma model."""
+
+    model_config = ConfigDict(extra="allow")
+
+
+@dataclass(frozen=True)
+class Relation:
+    target: str
+    # Foreign key on *this* model for to-one relations, on the target for to-many.
+    foreign_key: str
+    many: bool = False
+    # Referential action for to-many relations: Prisma's default is RESTRICT
+    # for required foreign keys and SET NULL for optional ones.
+    on_delete: str = "restrict"
+
+
+@dataclass
+class ModelSchema:
+    fields: Tuple[str, ...]
+    defaults: Dict[str, Callable[[], Any]] = field(default_factory=dict)
+    unique: Tuple[Tuple[str, ...], ...] = (("id",),)
+    indexes: Tuple[str, ...] = ()
+    relations: Dict[str, Relation] = field(default_factory=dict)
+    updated_at: bool = True
+
+
+_counter = count()
+
+
+def cuid() -> str:
+    """Collision-resistant ID in the style of Prisma's ``cuid()``."""
+    timestamp = _base36(int(time.time() * 1000))
+    return "c" + timestamp + _base36(next(_counter) % 36**4).rjust(4, "0") + "".join(
+        random.choices(string.ascii_lowercase + string.digits, k=8)
+    )
+
+
+def _base36(value: int) -> str:
+    digits = string.digits + string.ascii_lowercase
+    out = ""
+    while True:
+        value, rem = divmod(value, 36)
+        out = digits[rem] + out
+        if not value:
+            return out
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+_TIMESTAMPS = {"createdAt": _now, "updatedAt": _now}
+
+SCHEMA: Dict[str, ModelSchema] = {
+    "user": ModelSchema(
+        fields=("id", "email", "password", "role", "countryId", "isActive", "createdAt", "updatedAt"),
+        defaults={"role": lambda: "EDITOR", "isActive": lambda: False, **_TIMESTAMPS},
+        unique=(("id",), ("email",)),
+        indexes=("countryId",),
+        relations={
+            "country": Relation("country", "countryId"),
+            "auditLogs": Relation("auditlog", "userId", many=True),
+        },
+    ),
+    "country": ModelSchema(
+        fields=("id", "name", "code", "region", "flagUrl", "contactInfo", "createdAt", "updatedAt"),
+        defaults=dict(_TIMESTAMPS),
+        unique=(("id",), ("name",), ("code",)),
+        relations={
+            "users": Relation("user", "countryId", many=True, on_delete="set_null"),
+            "products": Relation("product", "countryId", many=True),
+            "exporters": Relation("exporter", "countryId", many=True),
+        },
+    ),
+    "product": ModelSchema(
+        fields=("id", "name", "unit", "quantity", "taxRate", "timePeriod", "tags", "category", "countryId",
+                "unitFamily", "canonicalQuantity", "version", "createdAt", "updatedAt"),
+        defaults={"tags": list, "version": lambda: 1, **_TIMESTAMPS},
+        indexes=("countryId", "category", "unitFamily"),
+        relations={
+            "country": Relation("country", "countryId"),
+            "exporters": Relation("exporterproduct", "productId", many=True),
+        },
+    ),
+    "exporter": ModelSchema(
+        fields=("id", "name", "licenseId", "contact", "website", "countryId", "version", "createdAt", "updatedAt"),
+        defaults={"version": lambda: 1, **_TIMESTAMPS},
+        unique=(("id",), ("licenseId",)),
+        indexes=("countryId",),
+        relations={
+            "country": Relation("country", "countryId"),
+            "products": Relation("exporterproduct", "exporterId", many=True),
+        },
+    ),
+    "exporterproduct": ModelSchema(
+        fields=("id", "exporterId", "productId"),
+        unique=(("id",), ("exporterId", "productId")),
+        indexes=("exporterId", "productId"),
+        relations={
+            "exporter": Relation("exporter", "exporterId"),
+            "product": Relation("product", "productId"),
+        },
+        updated_at=False,
+    ),
+    "auditlog": ModelSchema(
+        fields=("id", "userId", "action", "description", "timestamp"),
+        defaults={"timestamp": _now},
+        indexes=("userId",),
+        relations={"user": Relation("user", "userId")},
+        updated_at=False,
+    ),
+    "producttombstone": ModelSchema(
+        fields=("id", "countryId", "deletedAt"),
+        defaults={"deletedAt": _now},
+        indexes=("countryId",),
+        updated_at=False,
+    ),
+    "outboxevent": ModelSchema(
+        fields=("id", "payload", "attempts", "claimedBy", "claimedAt", "createdAt"),
+        defaults={"attempts": lambda: 0, "createdAt": _now},
+        updated_at=False,
+    ),
+}
+
+
+def _error(cls, message: str, **meta):
+    return cls({"user_facing_error": {"message": message, "meta": meta}})
+
+
+class Table:
+    """Rows keyed by ID plus unique and secondary hash indexes."""
+
+    def __init__(self, name: str, schema: ModelSchema):
+        self.name = name
+        self.schema = schema
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.unique: Dict[Tuple[str, ...], Dict[Tuple, str]] = {key: {} for key in schema.unique if key != ("id",)}
+        self.indexes: Dict[str, Dict[Any, Set[str]]] = {name: defaultdict(set) for name in schema.indexes}
+
+    def _unique_key(self, key: Tuple[str, ...], row: Dict[str, Any]) -> Optional[Tuple]:
+        values = tuple(row.get(f) for f in key)
+        return None if any(v is None for v in values) else values
+
+    def check_unique(self, row: Dict[str, Any], ignore_id: Optional[str] = None) -> None:
+        if row["id"] in self.rows and row["id"] != ignore_id:
+            raise _error(errors.UniqueViolationError, f"Unique constraint failed on {self.name}.id", target=["id"])
+        for key, index in self.unique.items():
+            value = self._unique_key(key, row)
+            if value is not None and index.get(value, ignore_id) != ignore_id:
+                raise _error(
+                    errors.UniqueViolationError,
+                    f"Unique constraint failed on {self.name}.{'_'.join(key)}",
+                    target=list(key),
+                )
+
+    def insert(self, row: Dict[str, Any]) -> None:
+        self.rows[row["id"]] = row
+        for key, index in self.unique.items():
+            value = self._unique_key(key, row)
+            if value is not None:
+                index[value] = row["id"]
+        for name, index in self.indexes.items():
+            index[row.get(name)].add(row["id"])
+
+    def remove(self, row_id: str) -> Dict[str, Any]:
+        row = self.rows.pop(row_id)
+        for key, index in self.unique.items():
+            value = self._unique_key(key, row)
+            if value is not None:
+                index.pop(value, None)
+        for name, index in self.indexes.items():
+            bucket = index.get(row.get(name))
+            if bucket is not None:
+                bucket.discard(row_id)
+                if not bucket:
+                    del index[row.get(name)]
+        return row
+
+    def candidates(self, where: Optional[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+        """Rows that may match ``where``, narrowed with an index when possible."""
+        if where:
+            for fields, index in [(("id",), None), *self.unique.items()]:
+                if all(_equality(where.get(f)) is not _NO_VALUE for f in fields):
+                    values = tuple(_equality(where[f]) for f in fields)
+                    row_id = values[0] if index is None else index.get(values)
+                    row = self.rows.get(row_id)
+                    return [row] if row is not None else []
+            for name, index in self.indexes.items():
+                value = _equality(where.get(name))
+                if value is not _NO_VALUE:
+                    return [self.rows[i] for i in index.get(value, ())]
+                spec = where.get(name)
+                if isinstance(spec, dict) and set(spec) == {"in"}:
+                    # Like SQL IN, a value listed twice still matches its rows once.
+                    return [self.rows[i] for v in dict.fromkeys(spec["in"]) for i in index.get(v, ())]
+        return list(self.rows.values())
+
+
+_NO_VALUE = object()
+
+
+def _equality(spec: Any) -> Any:
+    if spec is None or spec is _NO_VALUE:
+        return _NO_VALUE
+    if isinstance(spec, dict):
+        if set(spec) == {"equals"}:
+            return spec["equals"]
+        return _NO_VALUE
+    return spec
+
+
+def _match_field(value: Any, spec: Any) -> bool:
+    if not isinstance(spec, dict):
+        return value == _aware(spec)
+    insensitive = spec.get("mode") == "insensitive"
+
+    def norm(v):
+        return v.lower() if insensitive and isinstance(v, str) else v
+
+    for op, operand in spec.items():
+        if op == "mode":
+            continue
+        operand = _aware(operand)
+        if op == "equals":
+            ok = norm(value) == norm(operand)
+        elif op == "not":
+            ok = not _match_field(value, operand) if isinstance(operand, dict) else norm(value) != norm(operand)
+        elif op == "in":
+            ok = norm(value) in [norm(o) for o in operand]
+        elif op == "not_in":
+            ok = norm(value) not in [norm(o) for o in operand]
+        elif op in ("lt", "lte", "gt", "gte"):
+            if value is None:
+                ok = False
+            else:
+                ok = {
+                    "lt": value < operand,
+                    "lte": value <= operand,
+                    "gt": value > operand,
+                    "gte": value >= operand,
+                }[op]
+        elif op == "contains":
+            ok = value is not None and norm(operand) in norm(value)
+        elif op in ("startswith", "startsWith"):
+            ok = value is not None and norm(value).startswith(norm(operand))
+        elif op in ("endswith", "endsWith"):
+            ok = value is not None and norm(value).endswith(norm(operand))
+        elif op == "has":
+            ok = value is not None and operand in value
+        elif op == "has_some":
+            ok = value is not None and any(o in value for o in operand)
+        elif op == "has_every":
+            ok = value is not None and all(o in value for o in operand)
+        elif op == "is_empty":
+            ok = (not value) == operand
+        else:
+            raise NotImplementedError(f"Filter operator {op!r} is not supported by the in-memory client")
+        if not ok:
+            return False
+    return True
+
+
+class InMemoryPrisma:
+    """Drop-in replacement for ``prisma.Prisma`` backed by in-memory tables."""
+
+    def __init__(self, latency_ms: Optional[float] = None, jitter_ms: Optional[float] = None, _state=None):
+        self.latency = (latency_ms if latency_ms is not None else float(os.getenv("DB_FAKE_LATENCY_MS", "0"))) / 1000
+        self.jitter = (jitter_ms if jitter_ms is not None else float(os.getenv("DB_FAKE_JITTER_MS", "0"))) / 1000
+        self.tables: Dict[str, Table] = _state if _state is not None else {
+            name: Table(name, schema) for name, schema in SCHEMA.items()
+        }
+        self._undo: Optional[List[Callable[[], None]]] = None
+        self._lock = asyncio.Lock()
+        self._connected = False
+        for name in SCHEMA:
+            setattr(self, name, ModelActions(self, name))
+
+    async def connect(self, timeout=None) -> None:
+        self._connected = True
+
+    async def disconnect(self, timeout=None) -> None:
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def is_transaction(self) -> bool:
+        return self._undo is not None
+
+    def tx(self, **kwargs) -> "_Transaction":
+        return _Transaction(self)
+
+    async def query_raw(self, query: str, *args, **kwargs):
+        raise NotImplementedError("Raw SQL is not supported by the in-memory client")
+
+    query_first = query_raw
+    execute_raw = query_raw
+
+    async def _round_trip(self) -> None:
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def _log_undo(self, action: Callable[[], None]) -> None:
+        if self._undo is not None:
+            self._undo.append(action)
+
+    def load(self, model: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """Bulk-insert rows synchronously (fixtures, benchmark datasets)."""
+        actions: ModelActions = getattr(self, model)
+        inserted = 0
+        for data in rows:
+            row = actions._build(data)
+            table = self.tables[model]
+            table.check_unique(row)
+            table.insert(row)
+            inserted += 1
+        return inserted
+
+    def load_synthetic(self, scale, password_hash: str) -> None:
+        """Fill the tables with ``synthetic_data`` rows for ``scale``."""
+        import synthetic_data
+
+        self.load("country", synthetic_data.countries(scale))
+        self.load("user", synthetic_data.users(scale, password_hash))
+        self.load("product", synthetic_data.products(scale))
+        self.load("exporter", synthetic_data.exporters(scale))
+        self.load("exporterproduct", synthetic_data.exporter_products(scale))
+        self.load("auditlog", synthetic_data.audit_logs(scale))
+
+
+class _Transaction:
+    """``async with client.tx() as tx``: changes made through ``tx`` are undone on error.
+
+    Transactions are serialised with a lock, which is enough to keep a
+    read-check-write sequence consistent on the single event loop.
+    """
+
+    def __init__(self, client: InMemoryPrisma):
+        self.client = client
+        self.tx_client: Optional[InMemoryPrisma] = None
+
+    async def __aenter__(self) -> InMemoryPrisma:
+        await self.client._lock.acquire()
+        tx_client = InMemoryPrisma(self.client.latency * 1000, self.client.jitter * 1000, _state=self.client.tables)
+        tx_client._undo = []
+        tx_client._connected = True
+        self.tx_client = tx_client
+        return tx_client
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc is not None:
+                for undo in reversed(self.tx_client._undo):
+                    undo()
+        finally:
+            self.tx_client._undo = None
+            self.client._lock.release()
+
+
+class ModelActions:
+    def __init__(self, client: InMemoryPrisma, model: str):
+        self._client = client
+        self._model = model
+        self._schema = SCHEMA[model]
+
+    @property
+    def _table(self) -> Table:
+        return self._client.tables[self._model]
+
+    # -- reads ---------------------------------------------------------------
+
+    async def find_many(self, where=None, include=None, order=None, take=None, skip=None, cursor=None,
+                        distinct=None, **kwargs) -> List[Record]:
+        await self._client._round_trip()
+        rows = self._select(where, order, take, skip, cursor)
+        return [self._to_record(row, include) for row in rows]
+
+    async def find_first(self, where=None, include=None, order=None, skip=None, cursor=None,
+                         **kwargs) -> Optional[Record]:
+        await self._client._round_trip()
+        rows = self._select(where, order, 1, skip, cursor)
+        return self._to_record(rows[0], include) if rows else None
+
+    async def find_unique(self, where, include=None, **kwargs) -> Optional[Record]:
+        await self._client._round_trip()
+        rows = self._select(where)
+        return self._to_record(rows[0], include) if rows else None
+
+    async def find_unique_or_raise(self, where, include=None, **kwargs) -> Record:
+        record = await self.find_unique(where, include)
+        if record is None:
+            raise _error(errors.RecordNotFoundError, f"{self._model} record not found")
+        return record
+
+    async def find_first_or_raise(self, where=None, include=None, order=None, **kwargs) -> Record:
+        record = await self.find_first(where, include, order)
+        if record is None:
+            raise _error(errors.RecordNotFoundError, f"{self._model} record not found")
+        return record
+
+    async def count(self, where=None, take=None, skip=None, **kwargs) -> int:
+        await self._client._round_trip()
+        return len(self._select(where, None, take, skip))
+
+    async def group_by(self, by, where=None, count=None, sum=None, avg=None, min=None, max=None, order=None,
+                       take=None, skip=None, **kwargs) -> List[Dict[str, Any]]:
+        await self._client._round_trip()
+        groups: Dict[Tuple, List[Dict[str, Any]]] = defaultdict(list)
+        for row in self._select(where):
+            groups[tuple(row.get(f) for f in by)].append(row)
+
+        results = []
+        for key, rows in groups.items():
+            result: Dict[str, Any] = dict(zip(by, key))
+            if count:
+                fields = count if isinstance(count, dict) else {"_all": True}
+                result["_count"] = {
+                    f: len(rows) if f == "_all" else len([r for r in rows if r.get(f) is not None])
+                    for f in fields
+                }
+            for name, spec, fn in (("_sum", sum, _agg_sum), ("_avg", avg, _agg_avg),
+                                   ("_min", min, _agg_min), ("_max", max, _agg_max)):
+                if spec:
+                    result[name] = {f: fn([r.get(f) for r in rows if r.get(f) is not None]) for f in spec}
+            results.append(result)
+        if order:
+            results = _sorted(results, order)
+        if skip:
+            results = results[skip:]
+        if take is not None:
+            results = results[:take]
+        return results
+
+    # -- writes --------------------------------------------------------------
+
+    async def create(self, data, include=None, **kwargs) -> Record:
+        await self._client._round_trip()
+        row = self._build(data)
+        self._check_foreign_keys(row)
+        self._insert(row)
+        return self._to_record(row, include)
+
+    async def create_many(self, data, skip_duplicates=None, **kwargs) -> int:
+        await self._client._round_trip()
+        inserted = 0
+        for item in data:
+            row = self._build(item)
+            self._check_foreign_keys(row)
+            try:
+                self._table.check_unique(row)
+            except errors.UniqueViolationError:
+                if skip_duplicates:
+                    continue
+                raise
+            self._insert(row)
+            inserted += 1
+        return inserted
+
+    async def update(self, data, where, include=None, **kwargs) -> Optional[Record]:
+        await self._client._round_trip()
+        rows = self._select(where)
+        if not rows:
+            return None
+        row = self._apply_update(rows[0], data)
+        return self._to_record(row, include)
+
+    async def update_many(self, data, where, **kwargs) -> int:
+        await self._client._round_trip()
+        rows = self._select(where)
+        for row in rows:
+            self._apply_update(row, data)
+        return len(rows)
+
+    async def upsert(self, where, data, include=None, **kwargs) -> Record:
+        await self._client._round_trip()
+        rows = self._select(where)
+        if rows:
+            row = self._apply_update(rows[0], data["update"])
+        else:
+            row = self._build(data["create"])
+            self._check_foreign_keys(row)
+            self._insert(row)
+        return self._to_record(row, include)
+
+    async def delete(self, where, include=None, **kwargs) -> Optional[Record]:
+        await self._client._round_trip()
+        rows = self._select(where)
+        if not rows:
+            return None
+        record = self._to_record(rows[0], include)
+        self._delete(rows[0])
+        return record
+
+    async def delete_many(self, where=None, **kwargs) -> int:
+        await self._client._round_trip()
+        rows = self._select(where)
+        for row in rows:
+            self._delete(row)
+        return len(rows)
+
+    # -- internals -----------------------------------------------------------
+
+    def _build(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        data = self._resolve_relations(dict(data))
+        unknown = set(data) - set(self._schema.fields)
+        if unknown:
+            raise _error(errors.MissingRequiredValueError, f"Unknown fields for {self._model}: {sorted(unknown)}")
+        row = {name: None for name in self._schema.fields}
+        for name, default in self._schema.defaults.items():
+            row[name] = default()
+        row["id"] = cuid()
+        row.update({k: _copy_value(v) for k, v in data.items()})
+        return row
+
+    def _resolve_relations(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        for name, relation in self._schema.relations.items():
+            if name not in data:
+                continue
+            if relation.many:
+                raise NotImplementedError("Nested to-many writes are not supported by the in-memory client")
+            spec = data.pop(name)
+            if "connect" in spec:
+                target = self._client.tables[relation.target].candidates(spec["connect"])
+                target = [row for row in target if _matches(self._client, relation.target, row, spec["connect"])]
+                if not target:
+                    raise _error(errors.RecordNotFoundError, f"{relation.target} to connect not found")
+                data[relation.foreign_key] = target[0]["id"]
+            elif spec.get("disconnect"):
+                data[relation.foreign_key] = None
+            else:
+                raise NotImplementedError(f"Unsupported relation write on {self._model}.{name}")
+        return data
+
+    def _check_foreign_keys(self, row: Dict[str, Any]) -> None:
+        for name, relation in self._schema.relations.items():
+            if relation.many:
+                continue
+            value = row.get(relation.foreign_key)
+            if value is not None and value not in self._client.tables[relation.target].rows:
+                raise _error(
+                    errors.ForeignKeyViolationError,
+                    f"Foreign key constraint failed on {self._model}.{relation.foreign_key}",
+                    field_name=relation.foreign_key,
+                )
+
+    def _insert(self, row: Dict[str, Any]) -> None:
+        table = self._table
+        table.check_unique(row)
+        table.insert(row)
+        self._client._log_undo(lambda: table.remove(row["id"]))
+
+    def _delete(self, row: Dict[str, Any]) -> None:
+        set_null = []
+        for name, relation in self._schema.relations.items():
+            if not relation.many:
+                continue
+            target = getattr(self._client, relation.target)
+            dependants = [d for d in target._table.candidates({relation.foreign_key: row["id"]})
+                          if d.get(relation.foreign_key) == row["id"]]
+            if not dependants:
+                continue
+            if relation.on_delete != "set_null":
+                raise _error(
+                    errors.ForeignKeyViolationError,
+                    f"Foreign key constraint failed on {relation.target}.{relation.foreign_key}",
+                    field_name=relation.foreign_key,
+                )
+            set_null.extend((target, relation.foreign_key, d) for d in dependants)
+        for target, foreign_key, dependant in set_null:
+            target._apply_update(dependant, {foreign_key: None})
+        table = self._table
+        removed = table.remove(row["id"])
+        self._client._log_undo(lambda: table.insert(removed))
+
+    def _apply_update(self, row: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+        data = self._resolve_relations(dict(data))
+        updated = dict(row)
+        for name, value in data.items():
+            if name not in self._schema.fields:
+                raise _error(errors.MissingRequiredValueError, f"Unknown field {self._model}.{name}")
+            updated[name] = _apply_operation(row.get(name), value)
+        if self._schema.updated_at and "updatedAt" not in data:
+            updated["updatedAt"] = _now()
+
+        self._check_foreign_keys(updated)
+        table = self._table
+        if updated["id"] != row["id"]:
+            table.check_unique(updated)
+        else:
+            table.check_unique(updated, ignore_id=row["id"])
+        table.remove(row["id"])
+        table.insert(updated)
+
+        def undo():
+            table.remove(updated["id"])
+            table.insert(row)
+
+        self._client._log_undo(undo)
+        return updated
+
+    def _select(self, where=None, order=None, take=None, skip=None, cursor=None) -> List[Dict[str, Any]]:
+        where = self._expand_compound(where)
+        rows = [row for row in self._table.candidates(where) if _matches(self._client, self._model, row, where)]
+        rows = _sorted(rows, order) if order else rows
+        if cursor:
+            cursor_rows = self._select(cursor)
+            if not cursor_rows:
+                return []
+            position = next(i for i, row in enumerate(rows) if row["id"] == cursor_rows[0]["id"])
+            rows = rows[position:]
+        if skip:
+            rows = rows[skip:]
+        if take is not None:
+            rows = rows[:take] if take >= 0 else rows[take:]
+        return rows
+
+    def _expand_compound(self, where):
+        if not where:
+            return where
+        expanded = dict(where)
+        for key in self._schema.unique:
+            name = "_".join(key)
+            if len(key) > 1 and name in expanded:
+                expanded.update(expanded.pop(name))
+        return expanded
+
+    def _to_record(self, row: Dict[str, Any], include=None) -> Record:
+        data = {k: _copy_value(v) for k, v in row.items()}
+        for name, spec in (include or {}).items():
+            if not spec:
+                continue
+            relation = self._schema.relations[name]
+            target: ModelActions = getattr(self._client, relation.target)
+            nested = spec.get("include") if isinstance(spec, dict) else None
+            if relation.many:
+                options = spec if isinstance(spec, dict) else {}
+                where = dict(options.get("where") or {}, **{relation.foreign_key: row["id"]})
+                rows = target._select(where, options.get("order"), options.get("take"), options.get("skip"))
+                data[name] = [target._to_record(r, nested) for r in rows]
+            else:
+                related = target._table.rows.get(row.get(relation.foreign_key))
+                data[name] = target._to_record(related, nested) if related is not None else None
+        return Record.model_construct(**data)
+
+
+def _matches(client: InMemoryPrisma, model: str, row: Dict[str, Any], where) -> bool:
+    if not where:
+        return True
+    schema = SCHEMA[model]
+    for key, spec in where.items():
+        if key == "AND":
+            if not all(_matches(client, model, row, w) for w in _as_list(spec)):
+                return False
+        elif key == "OR":
+            if not any(_matches(client, model, row, w) for w in _as_list(spec)):
+                return False
+        elif key == "NOT":
+            if any(_matches(client, model, row, w) for w in _as_list(spec)):
+                return False
+        elif key in schema.relations:
+            if not _match_relation(client, schema.relations[key], row, spec):
+                return False
+        elif not _match_field(row.get(key), spec):
+            return False
+    return True
+
+
+def _match_relation(client: InMemoryPrisma, relation: Relation, row: Dict[str, Any], spec: Dict[str, Any]) -> bool:
+    target = client.tables[relation.target]
+    if not relation.many:
+        related = target.rows.get(row.get(relation.foreign_key))
+        if "is" in spec:
+            return related is not None and _matches(client, relation.target, related, spec["is"])
+        if "is_not" in spec:
+            return related is None or not _matches(client, relation.target, related, spec["is_not"])
+        return related is not None and _matches(client, relation.target, related, spec)
+    related = [r for r in target.candidates({relation.foreign_key: row["id"]})
+               if r.get(relation.foreign_key) == row["id"]]
+    if "some" in spec:
+        return any(_matches(client, relation.target, r, spec["some"]) for r in related)
+    if "every" in spec:
+        return all(_matches(client, relation.target, r, spec["every"]) for r in related)
+    if "none" in spec:
+        return not any(_matches(client, relation.target, r, spec["none"]) for r in related)
+    raise NotImplementedError("To-many relation filters need some/every/none")
+
+
+def _apply_operation(current: Any, value: Any) -> Any:
+    if not isinstance(value, dict):
+        return _copy_value(value)
+    if len(value) != 1:
+        raise NotImplementedError(f"Unsupported update operation {value!r}")
+    (op, operand), = value.items()
+    if op == "set":
+        return _copy_value(operand)
+    if op == "increment":
+        return current + operand
+    if op == "decrement":
+        return current - operand
+    if op == "multiply":
+        return current * operand
+    if op == "divide":
+        return current / operand
+    if op == "push":
+        return list(current or []) + (list(operand) if isinstance(operand, list) else [operand])
+    raise NotImplementedError(f"Unsupported update operation {op!r}")
+
+
+def _sorted(rows: List[Dict[str, Any]], order) -> List[Dict[str, Any]]:
+    # Stable sorts applied from the last key to the first; NULLs sort last on
+    # ascending and first on descending order, as in PostgreSQL.
+    for entry in reversed(_as_list(order)):
+        for name, direction in reversed(list(entry.items())):
+            rows = sorted(
+                rows,
+                key=lambda r: (r.get(name) is None, r.get(name) if r.get(name) is not None else 0),
+                reverse=str(direction).lower() == "desc",
+            )
+    return rows
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return list(value)
+    return _aware(value)
+
+
+def _aware(value: Any) -> Any:
+    # Postgres timestamps come back from Prisma as UTC-aware datetimes.
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _agg_sum(values):
+    return sum(values) if values else None
+
+
+def _agg_avg(values):
+    return sum(values) / len(values) if values else None
+
+
+def _agg_min(values):
+    return min(values) if values else None
+
+
+def _agg_max(values):
+    return max(values) if values else None
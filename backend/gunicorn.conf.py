@@ -0,0 +1,86 @@
+"""Production server: gunicorn managing uvicorn workers.
+
+    gunicorn main:app            # picks up this file from the working directory
+    gunicorn -c gunicorn.conf.py main:app
+
+Configuration (environment):
+
+``WEB_CONCURRENCY``
+    Worker processes, default one per CPU core.
+``BIND``
+    Listen address, default ``0.0.0.0:8000``.
+``PRELOAD_APP``
+    Import the app once in the master before forking (default ``true``) so
+    workers share its memory copy-on-write and start faster. Each worker still
+    opens its own Prisma engine connection in its startup handler.
+``GRACEFUL_TIMEOUT``
+    Seconds a worker may spend draining in-flight requests after SIGTERM,
+    default ``30``.
+``READINESS_DRAIN_SECONDS``
+    Seconds a worker keeps serving after SIGTERM while ``/ready`` answers 503,
+    so the load balancer stops routing to it before it closes its listener;
+    default ``5``, taken out of ``GRACEFUL_TIMEOUT``.
+``DB_MAX_CONNECTIONS``
+    Total Postgres connections for the whole server; split evenly across
+    workers as each worker's ``DB_CONNECTION_LIMIT``.
+``MAX_REQUESTS`` / ``MAX_REQUESTS_JITTER``
+    Recycle a worker after this many requests (default ``0``, never).
+
+Signals to the master:
+
+``TERM``  graceful shutdown: stop accepting, drain, then exit.
+``HUP``   replace workers one generation at a time with the new configuration.
+          With ``PRELOAD_APP`` the application code is *not* re-imported;
+          deploy new code with ``USR2`` (start a new master alongside the old
+          one on the same socket) followed by ``TERM`` to the old master.
+``TTIN`` / ``TTOU``  add / remove a worker.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+bind = os.getenv("BIND", "0.0.0.0:8000")
+preload_app = os.getenv("PRELOAD_APP", "true").lower() in ("1", "true", "yes")
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+accesslog = None  # request logging is done by the app
+
+# Per-worker share of the database connection budget. Set before the app is
+# imported so every worker's Prisma client sees it.
+if os.getenv("DB_MAX_CONNECTIONS") and not os.getenv("DB_CONNECTION_LIMIT"):
+    os.environ["DB_CONNECTION_LIMIT"] = str(max(1, int(os.environ["DB_MAX_CONNECTIONS"]) // workers))
+
+# Prometheus counters must be aggregated across worker processes. The
+# directory has to exist before the (preloaded) app imports prometheus_client.
+_own_metrics_dir = not os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if _own_metrics_dir:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(tempfile.gettempdir(), f"gevp-metrics-{os.getpid()}")
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+worker_class = "uvicorn_worker.Worker"
+
+
+def on_starting(server):
+    # Drop samples left by a previous run; runs once per master, not on HUP.
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
@@ -0,0 +1,106 @@
+"""Dependency-aware health check with latency budgets.
+
+Each component reports ``ok``, ``degraded`` (working but outside its budget)
+or ``down``; the overall status is the worst of them. The database ping is
+cached for ``HEALTH_DB_PING_TTL`` seconds so frequent probes from several
+orchestrators cost at most one query per interval.
+
+Budgets (environment):
+
+``HEALTH_DB_LATENCY_MS``      database ping latency, default ``100``
+``HEALTH_DB_TIMEOUT_MS``      ping timeout after which the database is down, default ``2000``
+``HEALTH_SATURATION``         fraction of DB connections / request slots in use, default ``0.9``
+``HEALTH_LOOP_LAG_MS``        worst event-loop lag over the last minute, default ``100``
+``HEALTH_LOG_BACKLOG``        records waiting in the log queue, default ``1000``
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app_logging import dropped_records, queue_backlog
+from cache import AsyncTTLCache
+from db import in_flight_queries
+from loop_monitor import monitor as loop_monitor
+from rate_limit import admission_stats
+
+OK, DEGRADED, DOWN = "ok", "degraded", "down"
+_SEVERITY = {OK: 0, DEGRADED: 1, DOWN: 2}
+
+
+def _worst(*statuses: str) -> str:
+    return max(statuses, key=_SEVERITY.__getitem__, default=OK)
+
+
+class HealthCheck:
+    def __init__(self, db, ping_ttl: Optional[float] = None):
+        self.db = db
+        self.db_latency_budget = float(os.getenv("HEALTH_DB_LATENCY_MS", "100")) / 1000
+        self.db_timeout = float(os.getenv("HEALTH_DB_TIMEOUT_MS", "2000")) / 1000
+        self.saturation_budget = float(os.getenv("HEALTH_SATURATION", "0.9"))
+        self.loop_lag_budget = float(os.getenv("HEALTH_LOOP_LAG_MS", "100")) / 1000
+        self.log_backlog_budget = int(os.getenv("HEALTH_LOG_BACKLOG", "1000"))
+        self.connection_limit = int(os.getenv("DB_CONNECTION_LIMIT", "0")) or None
+        ttl = ping_ttl if ping_ttl is not None else float(os.getenv("HEALTH_DB_PING_TTL", "2"))
+        self._ping = AsyncTTLCache("health_db_ping", self._ping_db, ttl)
+
+    async def _ping_db(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.db.country.find_first(), self.db_timeout)
+        except Exception as e:
+            return {"status": DOWN, "error": str(e) or type(e).__name__}
+        latency = time.perf_counter() - start
+        return {
+            "status": OK if latency <= self.db_latency_budget else DEGRADED,
+            "latency_ms": round(latency * 1000, 2),
+            "budget_ms": round(self.db_latency_budget * 1000, 2),
+        }
+
+    def _db_pool(self) -> Dict[str, Any]:
+        in_flight = in_flight_queries()
+        result: Dict[str, Any] = {"status": OK, "in_flight": in_flight}
+        if self.connection_limit:
+            saturation = in_flight / self.connection_limit
+            result.update(limit=self.connection_limit, saturation=round(saturation, 3))
+            if saturation >= self.saturation_budget:
+                result["status"] = DEGRADED
+        return result
+
+    def _admission(self) -> Dict[str, Any]:
+        stats = admission_stats()
+        if stats is None:
+            return {"status": OK}
+        status = DEGRADED if stats["saturation"] >= self.saturation_budget or stats["queued"] else OK
+        return dict(stats, status=status)
+
+    def _event_loop(self) -> Dict[str, Any]:
+        worst = loop_monitor.max
+        return {
+            "status": OK if worst <= self.loop_lag_budget else DEGRADED,
+            "lag_ms": round(loop_monitor.last * 1000, 2),
+            "max_lag_ms": round(worst * 1000, 2),
+            "budget_ms": round(self.loop_lag_budget * 1000, 2),
+        }
+
+    def _log_queue(self) -> Dict[str, Any]:
+        backlog = queue_backlog()
+        return {
+            "status": OK if backlog <= self.log_backlog_budget else DEGRADED,
+            "backlog": backlog,
+            "dropped": dropped_records(),
+        }
+
+    async def check(self) -> Dict[str, Any]:
+        components = {
+            "database": await self._ping.get(),
+            "db_pool": self._db_pool(),
+            "requests": self._admission(),
+            "event_loop": self._event_loop(),
+            "log_queue": self._log_queue(),
+        }
+        return {
+            "status": _worst(*(c["status"] for c in components.values())),
+            "components": components,
+        }
@@ -0,0 +1,149 @@
+"""Event-loop lag monitoring and blocking-call detection.
+
+A background task sleeps for ``interval`` seconds and measures how late it
+wakes up. The overshoot is time the loop spent running other callbacks without
+yielding, i.e. the extra latency every request on this worker saw. Samples
+feed the ``gevp_event_loop_lag_seconds`` histogram and ``/health/deep``.
+
+In debug mode a watchdog thread additionally pings the loop with
+``call_soon_threadsafe``; when a ping is not answered within the threshold the
+loop thread is stuck in synchronous code, so the watchdog samples its stack
+until it yields again, logs the most frequent stack and counts the block
+against the innermost application frame (``gevp_event_loop_blocks_total``).
+
+Configuration (environment):
+
+``LOOP_LAG_INTERVAL``
+    Seconds between lag samples, default ``0.5``.
+``LOOP_MONITOR_DEBUG``
+    Enable the blocking-call watchdog, default ``false``.
+``LOOP_BLOCK_THRESHOLD_MS``
+    Block duration that triggers stack capture, default ``100``.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+from app_logging import get_logger
+from metrics import EVENT_LOOP_BLOCKED_SECONDS, EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+from stacks import Stack, app_site, collapse, walk
+
+logger = get_logger("loop")
+
+# Stack samples taken per second while the loop is blocked.
+BLOCK_SAMPLE_HZ = 100
+MAX_BLOCK_SAMPLES = 500
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        window: int = 120,
+        debug: Optional[bool] = None,
+        block_threshold: Optional[float] = None,
+    ):
+        self.interval = interval if interval is not None else float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+        self.debug = debug if debug is not None else os.getenv("LOOP_MONITOR_DEBUG", "false").lower() == "true"
+        self.block_threshold = block_threshold if block_threshold is not None else (
+            float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100")) / 1000
+        )
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def last(self) -> float:
+        """Most recent lag in seconds."""
+        return self.samples[-1] if self.samples else 0.0
+
+    @property
+    def max(self) -> float:
+        """Worst lag in seconds over the sample window."""
+        return max(self.samples, default=0.0)
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        if self.debug and self._watchdog is None:
+            self._stopping.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch,
+                args=(loop, threading.get_ident()),
+                name="loop-watchdog",
+                daemon=True,
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - expected))
+
+    def record(self, lag: float) -> None:
+        self.samples.append(lag)
+        EVENT_LOOP_LAG.observe(lag)
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread: int) -> None:
+        while not self._stopping.is_set():
+            answered = threading.Event()
+            sent = time.perf_counter()
+            try:
+                loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:  # loop closed
+                return
+            if answered.wait(self.block_threshold):
+                self._stopping.wait(self.block_threshold)
+                continue
+
+            # Blocked: sample the loop thread's stack until it answers.
+            stacks: List[Stack] = []
+            site = None
+            while True:
+                frame = sys._current_frames().get(loop_thread)
+                if frame is None:
+                    return
+                if site is None:
+                    site = app_site(frame)
+                if len(stacks) < MAX_BLOCK_SAMPLES:
+                    stacks.append(walk(frame))
+                del frame
+                if answered.wait(1 / BLOCK_SAMPLE_HZ) or self._stopping.is_set():
+                    break
+            self._report(site, time.perf_counter() - sent, stacks)
+
+    def _report(self, site: str, blocked: float, stacks: List[Stack]) -> None:
+        EVENT_LOOP_BLOCKS.labels(site).inc()
+        EVENT_LOOP_BLOCKED_SECONDS.labels(site).inc(blocked)
+        top = collapse(stacks).split("\n", 1)[0] if stacks else ""
+        logger.warning(
+            "Event loop blocked for %.1f ms in %s",
+            blocked * 1000,
+            site,
+            extra={"blocked_ms": round(blocked * 1000, 1), "site": site, "stack": top, "samples": len(stacks)},
+        )
+
+
+monitor = LoopLagMonitor()
@@ -1,18 +1,98 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from prisma import Prisma
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Literal, Optional, List
+from pydantic import BaseModel, FiniteFloat
+from prisma import errors
+
+from bloom import NegativeCache
+from cache import AsyncTTLCache, KeyedTTLCache
+from changes import CursorExpired, InvalidCursor, product_changes, prune_tombstones
+from db import add_query_observer, create_client, instrument
+from pagination import encode_cursor, decode_cursor, keyset_after
+from events import ChangeEvent, ChangeFeed, FeedFull
+from health import DOWN, DEGRADED, HealthCheck
+from loop_monitor import monitor as loop_monitor
+from profiler import PROFILE_MAX_SECONDS, ProfilerBusy, profile
+from outbox import OutboxRelay
+from uow import unit_of_work as _unit_of_work
+import units
+from metrics import PASSWORD_HASH_DURATION, MetricsMiddleware, observe_query, record_cache, render_latest
+from app_logging import RequestIdMiddleware, configure_logging, get_logger, shutdown_logging
+from rate_limit import AdmissionControlMiddleware
+from slow_query import SlowQueryLog
+from tracing import TracedRoute, TracingMiddleware, configure_tracing, shutdown_tracing, span
+from tracing import observe_query as trace_query
 
 load_dotenv()
+configure_logging()
+logger = get_logger("api")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await prisma.connect()
+    logger.info("Database connected successfully")
+    loop_monitor.start()
+    await change_feed.start()
+    outbox_relay.start()
+    warmup = asyncio.create_task(warm_up())
+    pruner = asyncio.create_task(prune_tombstones_periodically())
+    license_loader = asyncio.create_task(load_license_index())
+    try:
+        yield
+    finally:
+        readiness.state = "draining"
+        warmup.cancel()
+        pruner.cancel()
+        license_loader.cancel()
+        await outbox_relay.stop()
+        await change_feed.close()
+        await loop_monitor.stop()
+        await prisma.disconnect()
+        shutdown_tracing()
+        shutdown_logging()
+
+app = FastAPI(title="Global Export Visibility Platform API", version="1.0.0", lifespan=lifespan)
+
+# Security
+SECRET_KEY = os.getenv("SECRET_KEY", "gevp-fallback-secret-key")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+def rate_limit_user_key(token: str) -> Optional[str]:
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
 
-app = FastAPI(title="Global Export Visibility Platform API", version="1.0.0")
+# Admission control (rate limits + concurrency cap); added before CORS so that
+# 429/503 responses still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware, user_key=rate_limit_user_key)
+
+# Request metrics; outside admission control so shed requests are counted too.
+app.add_middleware(MetricsMiddleware)
+
+# Tracing (disabled unless TRACE_EXPORTER is set)
+TRACING_ENABLED = configure_tracing()
+if TRACING_ENABLED:
+    app.router.route_class = TracedRoute
+    app.add_middleware(TracingMiddleware)
+
+# Request IDs for log correlation (echoed back as X-Request-ID)
+app.add_middleware(RequestIdMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -21,18 +101,69 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-# Security
-SECRET_KEY = os.getenv("SECRET_KEY", "gevp-fallback-secret-key")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Database
+prisma = instrument(create_client())
+add_query_observer(observe_query)
+add_query_observer(SlowQueryLog(prisma))
+if TRACING_ENABLED:
+    add_query_observer(trace_query)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+COUNTRIES_CACHE_TTL = float(os.getenv("COUNTRIES_CACHE_TTL", "300"))
+change_feed = ChangeFeed()
+# Per-country lists are invalidated by change events, which only reach every
+# worker through a shared broker; with memory:// another worker would serve
+# a list from before the caller's own write, so the caches stay off.
+LIST_CACHE_TTL = float(os.getenv("LIST_CACHE_TTL", "30")) if change_feed.broker.shared else 0.0
+EXPORTERS_PAGE_SIZE = int(os.getenv("EXPORTERS_PAGE_SIZE", "100"))
+# Sizing of the Bloom filter of known license IDs (see bloom.py). Each worker
+# keeps its own, loaded at startup and then fed by the change feed, so with the
+# default memory:// broker it only learns this worker's writes; another
+# worker's filter may call a just-taken license free and the unique
+# constraint turns the insert into a 409 instead.
+LICENSE_INDEX_CAPACITY = int(os.getenv("LICENSE_INDEX_CAPACITY", "1000000"))
+health = HealthCheck(prisma)
+license_index = NegativeCache(LICENSE_INDEX_CAPACITY)
+outbox_relay = OutboxRelay(prisma)
+outbox_relay.add_consumer("change_feed", change_feed.publish)
+countries_cache = AsyncTTLCache("countries", lambda: prisma.country.find_many(), COUNTRIES_CACHE_TTL)
+country_products_cache = KeyedTTLCache(
+    "country_products",
+    lambda country_id: prisma.product.find_many(where={"countryId": country_id}, include={"country": True}),
+    LIST_CACHE_TTL,
+)
 
-# Database
-prisma = Prisma()
+def exporter_filter(country_id: Optional[str], search: Optional[str]) -> dict:
+    conditions = []
+    if country_id:
+        conditions.append({"countryId": country_id})
+    if search:
+        conditions.append({"OR": [
+            {"name": {"contains": search, "mode": "insensitive"}},
+            {"licenseId": {"startswith": search}},
+        ]})
+    return {"AND": conditions} if conditions else {}
+
+async def exporter_page(country_id: Optional[str], search: Optional[str], after: Optional[list], limit: int):
+    """Up to ``limit + 1`` exporters in (name, id) order; the extra row signals another page."""
+    where = exporter_filter(country_id, search)
+    if after is not None:
+        where = {"AND": [where, keyset_after(("name", "id"), after)]}
+    return await prisma.exporter.find_many(
+        where=where,
+        include={"country": True},
+        order=[{"name": "asc"}, {"id": "asc"}],
+        take=limit + 1,
+    )
+
+# First page of each country's directory (or of all exporters, key None).
+exporters_cache = KeyedTTLCache(
+    "exporters",
+    lambda country_id: exporter_page(country_id, None, None, EXPORTERS_PAGE_SIZE),
+    LIST_CACHE_TTL,
+)
 
 # Pydantic models
 class Token(BaseModel):
@@ -58,7 +189,7 @@ class UserResponse(BaseModel):
 class ProductCreate(BaseModel):
     name: str
     unit: str
-    quantity: float
+    quantity: FiniteFloat
     tax_rate: float
     time_period: str
     tags: List[str]
@@ -77,12 +208,61 @@ class ProductResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class ProductUpdate(BaseModel):
+    """Sparse product edit: only the fields sent are written."""
+    name: Optional[str] = None
+    unit: Optional[str] = None
+    quantity: Optional[FiniteFloat] = None
+    tax_rate: Optional[float] = None
+    time_period: Optional[str] = None
+    tags: Optional[List[str]] = None
+    category: Optional[str] = None
+
+class ProductFilter(BaseModel):
+    category: Optional[str] = None
+    time_period: Optional[str] = None
+    country_id: Optional[str] = None
+
+class BulkProductDelete(BaseModel):
+    """Products to change: the listed ``ids``, those matching ``filter``, or both combined."""
+    ids: Optional[List[str]] = None
+    filter: Optional[ProductFilter] = None
+
+class BulkProductUpdate(BulkProductDelete):
+    patch: ProductUpdate
+
 class ExporterCreate(BaseModel):
     name: str
     license_id: str
     contact: Optional[str] = None
     website: Optional[str] = None
 
+class ExporterImport(BaseModel):
+    exporters: List[ExporterCreate]
+
+class ExporterProductLinks(BaseModel):
+    product_ids: List[str]
+
+class ExporterUpdate(BaseModel):
+    """Sparse exporter edit: only the fields sent are written; ``null`` clears contact/website."""
+    name: Optional[str] = None
+    license_id: Optional[str] = None
+    contact: Optional[str] = None
+    website: Optional[str] = None
+
+PRODUCT_COLUMNS = {
+    "name": "name",
+    "unit": "unit",
+    "quantity": "quantity",
+    "tax_rate": "taxRate",
+    "time_period": "timePeriod",
+    "tags": "tags",
+    "category": "category",
+}
+PRODUCT_FILTER_COLUMNS = {"category": "category", "time_period": "timePeriod", "country_id": "countryId"}
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "5000"))
+EXPORTER_COLUMNS = {"name": "name", "license_id": "licenseId", "contact": "contact", "website": "website"}
+
 class CountryResponse(BaseModel):
     id: str
     name: str
@@ -93,10 +273,12 @@ class CountryResponse(BaseModel):
 
 # Utility functions
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    with PASSWORD_HASH_DURATION.labels("verify").time():
+        return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    with PASSWORD_HASH_DURATION.labels("hash").time():
+        return pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -114,35 +296,241 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    with span("auth.get_current_user"):
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+            token_data = TokenData(email=email)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    
-    user = await prisma.user.find_unique(where={"email": token_data.email})
-    if user is None:
-        raise credentials_exception
-    return user
-
-# Startup event
-@app.on_event("startup")
-async def startup():
-    await prisma.connect()
-    print("✅ Database connected successfully")
 
-@app.on_event("shutdown")
-async def shutdown():
-    await prisma.disconnect()
+        user = await prisma.user.find_unique(where={"email": token_data.email})
+        if user is None:
+            raise credentials_exception
+        return user
+
+async def record_audit(user_id: str, action: str, description: str):
+    """Audit an action that changes no data; mutations audit through ``unit_of_work``."""
+    with span("audit.write", action=action):
+        await prisma.auditlog.create(
+            data={
+                "userId": user_id,
+                "action": action,
+                "description": description
+            }
+        )
+
+def unit_of_work(user_id: Optional[str] = None):
+    """Transaction for a mutation plus its audit rows and change events (see uow.py)."""
+    return _unit_of_work(prisma, user_id, on_commit=changes_committed)
+
+def changes_committed(events: List[ChangeEvent]):
+    """Apply committed changes to this worker now; the outbox relay tells everyone else."""
+    for event in events:
+        apply_change(event)
+    outbox_relay.notify()
+
+def country_scope(user) -> dict:
+    """Filter limiting a mutation to rows ``user`` may change."""
+    return {} if user.role == "SUPER_ADMIN" else {"countryId": user.countryId}
+
+async def unmatched_error(model, record_id: str, scope: dict, not_found: str) -> HTTPException:
+    """Why a conditional mutation matched nothing: absent (404), out of scope (403) or stale (412)."""
+    row = await model.find_unique(where={"id": record_id})
+    if row is None:
+        return HTTPException(status_code=404, detail=not_found)
+    if any(getattr(row, field) != value for field, value in scope.items()):
+        return HTTPException(status_code=403, detail="Not enough permissions")
+    return HTTPException(
+        status_code=412,
+        detail="The record was modified by someone else; reload it and retry",
+        headers={"ETag": etag(row.version)},
+    )
+
+def patch_data(patch: BaseModel, columns: dict, nullable: tuple = ()) -> dict:
+    """Prisma ``data`` for the fields present in a sparse update."""
+    data = {}
+    for field, value in patch.model_dump(exclude_unset=True).items():
+        if value is None and field not in nullable:
+            raise HTTPException(status_code=422, detail=f"{field} cannot be null")
+        data[columns[field]] = value
+    if not data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    return data
+
+async def select_bulk_products(db, user, selection: BulkProductDelete) -> list:
+    """Products in ``user``'s scope picked by ``selection``, at most ``BULK_MAX_ROWS``."""
+    conditions = [country_scope(user)]
+    if selection.ids is not None:
+        conditions.append({"id": {"in": selection.ids}})
+    if selection.filter is not None:
+        conditions.extend(
+            {PRODUCT_FILTER_COLUMNS[field]: value}
+            for field, value in selection.filter.model_dump(exclude_none=True).items()
+        )
+    if len(conditions) == 1:
+        raise HTTPException(status_code=400, detail="Select products with 'ids' or a non-empty 'filter'")
+    rows = await db.product.find_many(where={"AND": conditions}, take=BULK_MAX_ROWS + 1)
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"More than {BULK_MAX_ROWS} products selected; narrow the selection")
+    return rows
+
+def bulk_result(selection: BulkProductDelete, rows: list, count: int, key: str) -> dict:
+    result = {"matched": len(rows), key: count}
+    if selection.ids is not None:
+        # Unknown ids and ids outside the caller's country.
+        found = {row.id for row in rows}
+        result["skipped"] = [product_id for product_id in selection.ids if product_id not in found]
+    return result
+
+async def scoped_exporter(db, user, exporter_id: str):
+    """The exporter if ``user`` may manage it, else 404/403."""
+    exporter = await db.exporter.find_first(where={"id": exporter_id, **country_scope(user)})
+    if exporter is None:
+        raise await unmatched_error(db.exporter, exporter_id, country_scope(user), "Exporter not found")
+    return exporter
+
+def versioned_scope(user, if_match: Optional[str]) -> dict:
+    """``country_scope`` plus the versions an ``If-Match`` header allows."""
+    scope = country_scope(user)
+    versions = if_match_versions(if_match)
+    if versions is not None:
+        scope["version"] = {"in": versions}
+    return scope
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+def if_match_versions(if_match: Optional[str]) -> Optional[List[int]]:
+    """Versions accepted by an ``If-Match`` header; ``None`` when absent or ``*``."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return [int(tag.strip().removeprefix("W/").strip('"')) for tag in if_match.split(",")]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must carry an ETag returned by this API")
+
+def apply_change(event: ChangeEvent):
+    """Update this worker's caches for a committed change, local or from another worker."""
+    if event.entity == "product":
+        country_products_cache.invalidate(event.country_id)
+    elif event.entity == "exporter":
+        exporters_cache.invalidate(event.country_id)
+        exporters_cache.invalidate(None)
+        if event.data:
+            license_index.add(event.data["licenseId"])
+
+change_feed.add_listener(apply_change)
+
+async def load_license_index(batch: int = 10000):
+    """Add every existing license ID to ``license_index``, then mark it usable."""
+    while True:
+        try:
+            last_id = None
+            while True:
+                rows = await prisma.exporter.find_many(
+                    where={"id": {"gt": last_id}} if last_id else {}, order={"id": "asc"}, take=batch
+                )
+                license_index.add_many(row.licenseId for row in rows)
+                if len(rows) < batch:
+                    break
+                last_id = rows[-1].id
+            license_index.loaded = True
+            logger.info("License index loaded")
+            return
+        except Exception:
+            logger.exception("Loading license index failed; retrying in %ss", WARMUP_RETRY_SECONDS)
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+
+def license_maybe_taken(license_id: str) -> bool:
+    """False only when ``license_id`` is certainly unused and the lookup can be skipped."""
+    absent = license_index.definitely_absent(license_id)
+    record_cache("license_index", absent)
+    return not absent
+
+async def prune_tombstones_periodically(interval: float = 3600):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await prune_tombstones(prisma)
+            if removed:
+                logger.info("Pruned %s expired product tombstones", removed)
+        except Exception:
+            logger.exception("Error pruning product tombstones")
+
+# Warm-up and readiness
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", os.getenv("DB_CONNECTION_LIMIT", "4")))
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+class Readiness:
+    """starting -> ready -> draining; only ``ready`` receives traffic."""
+
+    def __init__(self):
+        self.state = "starting"
+        self.error: Optional[str] = None
+        self.warmup_seconds: Optional[float] = None
+
+readiness = Readiness()
+# The gunicorn worker flips this to draining on SIGTERM (uvicorn_worker.py).
+app.state.readiness = readiness
+
+async def warm_up():
+    """Open the DB pool, prime caches and build lazy schemas before reporting ready.
+
+    Runs after startup so a database outage leaves the worker up but not
+    ready; it retries until it succeeds or the worker shuts down.
+    """
+    while True:
+        started = asyncio.get_running_loop().time()
+        try:
+            # Concurrent queries make the engine open that many pooled connections.
+            await asyncio.gather(*(prisma.country.count() for _ in range(max(1, WARMUP_CONNECTIONS))))
+            countries = await countries_cache.refresh()
+            # Pydantic validators and FastAPI's OpenAPI schema are built lazily
+            # on first use; do it now rather than on the first user request.
+            jsonable_encoder([CountryResponse.model_validate(c, from_attributes=True) for c in countries])
+            app.openapi()
+        except Exception as e:
+            readiness.error = str(e)
+            logger.exception("Warm-up failed; retrying in %ss", WARMUP_RETRY_SECONDS)
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+            continue
+        readiness.error = None
+        readiness.warmup_seconds = round(asyncio.get_running_loop().time() - started, 3)
+        if readiness.state == "starting":
+            readiness.state = "ready"
+        logger.info("Warm-up complete in %ss", readiness.warmup_seconds)
+        return
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "message": "GEVP API is running"}
 
+# Dependency-aware health: 503 when a dependency is down, or when degraded
+# and the caller asks for ?strict=true
+@app.get("/health/deep")
+async def deep_health_check(strict: bool = False):
+    report = await health.check()
+    unhealthy = report["status"] == DOWN or (strict and report["status"] == DEGRADED)
+    return JSONResponse(report, status_code=503 if unhealthy else 200)
+
+# Readiness probe for load balancers: 503 until warm-up has finished
+@app.get("/ready")
+async def ready_check():
+    body = {"status": readiness.state, "warmup_seconds": readiness.warmup_seconds}
+    if readiness.error:
+        body["error"] = readiness.error
+    return JSONResponse(body, status_code=200 if readiness.state == "ready" else 503)
+
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
 # Authentication endpoints
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
@@ -173,13 +561,13 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
             data={"sub": user.email}, expires_delta=access_token_expires
         )
         
-        print(f"✅ User {user.email} logged in successfully")
+        logger.info("User %s logged in successfully", user.email)
         return {"access_token": access_token, "token_type": "bearer"}
         
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Login error: {e}")
+    except Exception:
+        logger.exception("Login error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during login"
@@ -193,21 +581,23 @@ async def register_user(user: UserCreate):
             raise HTTPException(status_code=400, detail="Email already registered")
         
         hashed_password = get_password_hash(user.password)
-        new_user = await prisma.user.create(
-            data={
-                "email": user.email,
-                "password": hashed_password,
-                "role": user.role,
-                "countryId": user.country_id,
-                "isActive": False  # Requires admin approval
-            }
-        )
-        print(f"✅ New user registered: {user.email}")
+        async with unit_of_work() as work:
+            new_user = await work.tx.user.create(
+                data={
+                    "email": user.email,
+                    "password": hashed_password,
+                    "role": user.role,
+                    "countryId": user.country_id,
+                    "isActive": False  # Requires admin approval
+                }
+            )
+            work.audit("REGISTER_USER", f"Registered user: {user.email}", user_id=new_user.id)
+        logger.info("New user registered: %s", user.email)
         return {"message": "User registered successfully. Awaiting admin approval."}
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Registration error: {e}")
+    except Exception:
+        logger.exception("Registration error")
         raise HTTPException(status_code=500, detail="Registration failed")
 
 @app.get("/me", response_model=UserResponse)
@@ -224,44 +614,135 @@ async def read_users_me(current_user = Depends(get_current_user)):
 @app.get("/countries", response_model=List[CountryResponse])
 async def get_countries():
     try:
-        countries = await prisma.country.find_many()
-        return countries
-    except Exception as e:
-        print(f"❌ Error fetching countries: {e}")
+        return await countries_cache.get()
+    except Exception:
+        logger.exception("Error fetching countries")
         raise HTTPException(status_code=500, detail="Failed to fetch countries")
 
 @app.get("/countries/{country_id}/products")
 async def get_country_products(country_id: str):
     try:
-        products = await prisma.product.find_many(
-            where={"countryId": country_id},
-            include={"country": True}
-        )
-        return products
-    except Exception as e:
-        print(f"❌ Error fetching country products: {e}")
+        return await country_products_cache.get(country_id)
+    except Exception:
+        logger.exception("Error fetching country products")
         raise HTTPException(status_code=500, detail="Failed to fetch country products")
 
 # Products endpoints
 @app.get("/products")
-async def get_products(search: Optional[str] = None, category: Optional[str] = None):
+async def get_products(
+    search: Optional[str] = None,
+    category: Optional[str] = None,
+    quantity_unit: Optional[str] = None,
+    min_quantity: Optional[FiniteFloat] = None,
+    max_quantity: Optional[FiniteFloat] = None,
+    sort: Optional[Literal["quantity", "-quantity"]] = None,
+):
+    """Products, optionally filtered and sorted by quantity across units.
+
+    With ``quantity_unit`` (e.g. ``t``), only products measured in the same
+    family (mass, volume, ...) are returned and ``min_quantity`` /
+    ``max_quantity`` are read in that unit, whatever unit each product uses.
+    ``sort`` needs ``quantity_unit`` too: quantities only compare within a family.
+    """
     try:
         where_clause = {}
         if search:
             where_clause["name"] = {"contains": search, "mode": "insensitive"}
         if category:
             where_clause["category"] = category
+        if quantity_unit:
+            unit = units.lookup(quantity_unit)
+            if unit is None:
+                raise HTTPException(status_code=400, detail=f"Unknown unit: {quantity_unit}")
+            where_clause["unitFamily"] = unit.family
+            bounds = {"not": None}
+            if min_quantity is not None:
+                bounds["gte"] = units.to_canonical(min_quantity, unit)
+            if max_quantity is not None:
+                bounds["lte"] = units.to_canonical(max_quantity, unit)
+            where_clause["canonicalQuantity"] = bounds
+        elif min_quantity is not None or max_quantity is not None or sort:
+            raise HTTPException(status_code=400, detail="min_quantity, max_quantity and sort need quantity_unit")
         
+        order = None
+        if sort:
+            order = [{"canonicalQuantity": "desc" if sort.startswith("-") else "asc"}, {"id": "asc"}]
         products = await prisma.product.find_many(
             where=where_clause,
-            include={"country": True}
+            include={"country": True},
+            order=order,
         )
         return products
-    except Exception as e:
-        print(f"❌ Error fetching products: {e}")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error fetching products")
         raise HTTPException(status_code=500, detail="Failed to fetch products")
 
-@app.post("/products", response_model=ProductResponse)
+@app.get("/products/quantity-totals")
+async def get_product_quantity_totals(country_id: Optional[str] = None, category: Optional[str] = None):
+    """Total quantity per unit family, summed in SQL over the canonical column."""
+    try:
+        where_clause = {"unitFamily": {"not": None}}
+        if country_id:
+            where_clause["countryId"] = country_id
+        if category:
+            where_clause["category"] = category
+        groups = await prisma.product.group_by(
+            by=["unitFamily"],
+            where=where_clause,
+            count=True,
+            sum={"canonicalQuantity": True},
+            order={"unitFamily": "asc"},
+        )
+        return [
+            {
+                "family": group["unitFamily"],
+                "unit": units.CANONICAL[group["unitFamily"]],
+                "total": group["_sum"]["canonicalQuantity"],
+                "products": group["_count"]["_all"],
+            }
+            for group in groups
+        ]
+    except Exception:
+        logger.exception("Error totalling product quantities")
+        raise HTTPException(status_code=500, detail="Failed to total product quantities")
+
+@app.get("/units")
+async def get_units():
+    """Known units with their family and factor to the family's canonical unit."""
+    return [
+        {
+            "symbol": unit.symbol,
+            "family": unit.family,
+            "factor": float(unit.factor),
+            "canonical": units.CANONICAL[unit.family],
+            "aliases": list(unit.aliases),
+        }
+        for unit in units.UNITS
+    ]
+
+@app.get("/products/changes")
+async def get_product_changes(
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=5000),
+    country_id: Optional[str] = None,
+):
+    """Products created, updated or deleted after ``since`` (omit it for a full initial sync).
+
+    Page until ``has_more`` is false, then poll again with the returned cursor.
+    """
+    try:
+        return await product_changes(prisma, since, limit, country_id)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except CursorExpired:
+        raise HTTPException(status_code=410, detail="Cursor expired, resync without 'since'")
+    except Exception:
+        logger.exception("Error fetching product changes")
+        raise HTTPException(status_code=500, detail="Failed to fetch product changes")
+
+@app.post("/products")
 async def create_product(
     product: ProductCreate,
     current_user = Depends(get_current_user)
@@ -273,77 +754,107 @@ async def create_product(
         if not current_user.countryId and current_user.role != "SUPER_ADMIN":
             raise HTTPException(status_code=400, detail="User must be assigned to a country")
         
-        new_product = await prisma.product.create(
-            data={
-                "name": product.name,
-                "unit": product.unit,
-                "quantity": product.quantity,
-                "taxRate": product.tax_rate,
-                "timePeriod": product.time_period,
-                "tags": product.tags,
-                "category": product.category,
-                "countryId": current_user.countryId
-            }
-        )
-        
-        # Log the action
-        await prisma.auditlog.create(
-            data={
-                "userId": current_user.id,
-                "action": "CREATE_PRODUCT",
-                "description": f"Created product: {product.name}"
-            }
-        )
+        async with unit_of_work(current_user.id) as work:
+            new_product = await work.tx.product.create(
+                data={
+                    "name": product.name,
+                    "unit": product.unit,
+                    "quantity": product.quantity,
+                    "taxRate": product.tax_rate,
+                    "timePeriod": product.time_period,
+                    "tags": product.tags,
+                    "category": product.category,
+                    "countryId": current_user.countryId,
+                    **units.quantity_fields(product.quantity, product.unit),
+                }
+            )
+            work.audit("CREATE_PRODUCT", f"Created product: {product.name}")
+            work.changed("product", "created", new_product)
         
-        print(f"✅ Product created: {product.name} by {current_user.email}")
+        logger.info("Product created: %s by %s", product.name, current_user.email)
         return new_product
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Error creating product: {e}")
+    except Exception:
+        logger.exception("Error creating product")
         raise HTTPException(status_code=500, detail="Failed to create product")
 
 @app.put("/products/{product_id}")
 async def update_product(
     product_id: str,
     product: ProductCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user = Depends(get_current_user)
 ):
+    """Replace a product; send ``If-Match: "<version>"`` to get 412 instead of overwriting a newer edit."""
     try:
-        existing_product = await prisma.product.find_unique(where={"id": product_id})
-        if not existing_product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        
-        if current_user.role != "SUPER_ADMIN" and existing_product.countryId != current_user.countryId:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-        
-        updated_product = await prisma.product.update(
-            where={"id": product_id},
-            data={
-                "name": product.name,
-                "unit": product.unit,
-                "quantity": product.quantity,
-                "taxRate": product.tax_rate,
-                "timePeriod": product.time_period,
-                "tags": product.tags,
-                "category": product.category
-            }
-        )
-        
-        await prisma.auditlog.create(
-            data={
-                "userId": current_user.id,
-                "action": "UPDATE_PRODUCT",
-                "description": f"Updated product: {product.name}"
-            }
-        )
+        # Country and version checks are part of the UPDATE; a miss is diagnosed afterwards.
+        async with unit_of_work(current_user.id) as work:
+            updated_product = await work.tx.product.update(
+                where={"id": product_id, **versioned_scope(current_user, if_match)},
+                data={
+                    "name": product.name,
+                    "unit": product.unit,
+                    "quantity": product.quantity,
+                    "taxRate": product.tax_rate,
+                    "timePeriod": product.time_period,
+                    "tags": product.tags,
+                    "category": product.category,
+                    **units.quantity_fields(product.quantity, product.unit),
+                    "version": {"increment": 1}
+                }
+            )
+            if updated_product is None:
+                raise await unmatched_error(work.tx.product, product_id, country_scope(current_user), "Product not found")
+            work.audit("UPDATE_PRODUCT", f"Updated product: {product.name}")
+            work.changed("product", "updated", updated_product)
         
-        print(f"✅ Product updated: {product.name} by {current_user.email}")
+        logger.info("Product updated: %s by %s", product.name, current_user.email)
+        response.headers["ETag"] = etag(updated_product.version)
+        return updated_product
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error updating product")
+        raise HTTPException(status_code=500, detail="Failed to update product")
+
+@app.patch("/products/{product_id}")
+async def patch_product(
+    product_id: str,
+    patch: ProductUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user = Depends(get_current_user)
+):
+    """Update only the fields sent; ``If-Match`` works as for PUT."""
+    try:
+        data = patch_data(patch, PRODUCT_COLUMNS)
+        where = {"id": product_id, **versioned_scope(current_user, if_match)}
+        async with unit_of_work(current_user.id) as work:
+            updated_product = await work.tx.product.update(
+                where=where,
+                data={**data, "version": {"increment": 1}},
+            )
+            if updated_product is None:
+                raise await unmatched_error(work.tx.product, product_id, country_scope(current_user), "Product not found")
+            if "quantity" in data or "unit" in data:
+                # Derive from the merged row, which the UPDATE above has locked,
+                # so an unknown unit clears the canonical columns and a
+                # concurrent edit of the other field cannot slip in between.
+                derived = units.quantity_fields(updated_product.quantity, updated_product.unit)
+                if any(getattr(updated_product, field) != value for field, value in derived.items()):
+                    updated_product = await work.tx.product.update(where={"id": product_id}, data=derived)
+            work.audit("UPDATE_PRODUCT", f"Updated product: {updated_product.name} ({', '.join(data)})")
+            work.changed("product", "updated", updated_product)
+
+        logger.info("Product patched: %s (%s) by %s", updated_product.name, ", ".join(data), current_user.email)
+        response.headers["ETag"] = etag(updated_product.version)
         return updated_product
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Error updating product: {e}")
+    except Exception:
+        logger.exception("Error patching product")
         raise HTTPException(status_code=500, detail="Failed to update product")
 
 @app.delete("/products/{product_id}")
@@ -352,48 +863,181 @@ async def delete_product(
     current_user = Depends(get_current_user)
 ):
     try:
-        existing_product = await prisma.product.find_unique(where={"id": product_id})
-        if not existing_product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        
-        if current_user.role != "SUPER_ADMIN" and existing_product.countryId != current_user.countryId:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-        
-        await prisma.product.delete(where={"id": product_id})
-        
-        await prisma.auditlog.create(
-            data={
-                "userId": current_user.id,
-                "action": "DELETE_PRODUCT",
-                "description": f"Deleted product: {existing_product.name}"
-            }
-        )
+        async with unit_of_work(current_user.id) as work:
+            existing_product = await work.tx.product.delete(where={"id": product_id, **country_scope(current_user)})
+            if existing_product is None:
+                raise await unmatched_error(work.tx.product, product_id, country_scope(current_user), "Product not found")
+            # The tombstone lets delta-sync clients see the deletion.
+            await work.tx.producttombstone.upsert(
+                where={"id": product_id},
+                data={
+                    "create": {"id": product_id, "countryId": existing_product.countryId},
+                    "update": {"deletedAt": datetime.now(timezone.utc)},
+                },
+            )
+            work.audit("DELETE_PRODUCT", f"Deleted product: {existing_product.name}")
+            work.changed("product", "deleted", existing_product)
         
-        print(f"✅ Product deleted: {existing_product.name} by {current_user.email}")
+        logger.info("Product deleted: %s by %s", existing_product.name, current_user.email)
         return {"message": "Product deleted successfully"}
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Error deleting product: {e}")
+    except errors.ForeignKeyViolationError:
+        raise HTTPException(status_code=409, detail="Product is still linked to exporters")
+    except Exception:
+        logger.exception("Error deleting product")
         raise HTTPException(status_code=500, detail="Failed to delete product")
 
+@app.post("/products/bulk-update")
+async def bulk_update_products(bulk: BulkProductUpdate, current_user = Depends(get_current_user)):
+    """Apply one sparse patch to many products with one set-based UPDATE and one audit entry.
+
+    A patch touching quantity or unit adds a second UPDATE deriving the
+    canonical quantity of every selected row in SQL.
+    """
+    try:
+        data = patch_data(bulk.patch, PRODUCT_COLUMNS)
+        async with unit_of_work(current_user.id) as work:
+            rows = await select_bulk_products(work.tx, current_user, bulk)
+            ids = [row.id for row in rows]
+            updated = 0
+            if ids:
+                updated = await work.tx.product.update_many(
+                    where={"id": {"in": ids}, **country_scope(current_user)},
+                    data={**data, "version": {"increment": 1}},
+                )
+                if "quantity" in data or "unit" in data:
+                    # The canonical columns depend on each row's other field: derived in SQL.
+                    await units.derive(work.tx, ids)
+                for product in await work.tx.product.find_many(where={"id": {"in": ids}}):
+                    work.changed("product", "updated", product)
+                work.audit("BULK_UPDATE_PRODUCT", f"Updated {updated} products ({', '.join(data)})")
+
+        logger.info("Bulk product update: %s products (%s) by %s", updated, ", ".join(data), current_user.email)
+        return bulk_result(bulk, rows, updated, "updated")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error bulk updating products")
+        raise HTTPException(status_code=500, detail="Failed to update products")
+
+@app.post("/products/bulk-delete")
+async def bulk_delete_products(bulk: BulkProductDelete, current_user = Depends(get_current_user)):
+    """Delete many products in a single DELETE, with one audit entry."""
+    try:
+        async with unit_of_work(current_user.id) as work:
+            rows = await select_bulk_products(work.tx, current_user, bulk)
+            ids = [row.id for row in rows]
+            deleted = 0
+            if ids:
+                deleted = await work.tx.product.delete_many(where={"id": {"in": ids}, **country_scope(current_user)})
+                await work.tx.producttombstone.delete_many(where={"id": {"in": ids}})
+                await work.tx.producttombstone.create_many(
+                    data=[{"id": row.id, "countryId": row.countryId} for row in rows]
+                )
+                for product in rows:
+                    work.changed("product", "deleted", product)
+                work.audit("BULK_DELETE_PRODUCT", f"Deleted {deleted} products")
+
+        logger.info("Bulk product delete: %s products by %s", deleted, current_user.email)
+        return bulk_result(bulk, rows, deleted, "deleted")
+    except HTTPException:
+        raise
+    except errors.ForeignKeyViolationError:
+        raise HTTPException(status_code=409, detail="Some selected products are still linked to exporters")
+    except Exception:
+        logger.exception("Error bulk deleting products")
+        raise HTTPException(status_code=500, detail="Failed to delete products")
+
+# Change feed (server-sent events)
+@app.get("/events")
+async def change_events(
+    country_id: Optional[List[str]] = Query(None),
+    entity: Optional[List[Literal["product", "exporter"]]] = Query(None),
+):
+    """Stream product/exporter create, update and delete events as they happen."""
+    try:
+        subscription = change_feed.subscribe(countries=country_id, entities=entity)
+    except FeedFull:
+        raise HTTPException(status_code=503, detail="Too many change-feed subscribers, please retry")
+    return StreamingResponse(
+        change_feed.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # Exporters endpoints
 @app.get("/exporters")
-async def get_exporters(country_id: Optional[str] = None):
+async def get_exporters(
+    response: Response,
+    country_id: Optional[str] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(EXPORTERS_PAGE_SIZE, ge=1, le=500),
+    include_product_counts: bool = False,
+):
+    """Exporters by name, matching ``search`` in the name or as a license ID prefix.
+
+    One page per call; when there are more, ``X-Next-Cursor`` holds the
+    ``cursor`` for the next one.
+    """
     try:
-        where_clause = {}
-        if country_id:
-            where_clause["countryId"] = country_id
-        
-        exporters = await prisma.exporter.find_many(
-            where=where_clause,
-            include={"country": True}
+        if search or cursor or limit != EXPORTERS_PAGE_SIZE:
+            after = decode_cursor(cursor, 2) if cursor else None
+            exporters = await exporter_page(country_id, search, after, limit)
+        else:
+            exporters = await exporters_cache.get(country_id or None)
+        if len(exporters) > limit:
+            exporters = exporters[:limit]
+            response.headers["X-Next-Cursor"] = encode_cursor([exporters[-1].name, exporters[-1].id])
+        if not include_product_counts:
+            return exporters
+
+        # One grouped count for the whole page instead of a count per exporter.
+        groups = await prisma.exporterproduct.group_by(
+            by=["exporterId"],
+            where={"exporterId": {"in": [exporter.id for exporter in exporters]}},
+            count=True,
         )
-        return exporters
-    except Exception as e:
-        print(f"❌ Error fetching exporters: {e}")
+        counts = {group["exporterId"]: group["_count"]["_all"] for group in groups}
+        return [
+            {**jsonable_encoder(exporter), "productCount": counts.get(exporter.id, 0)}
+            for exporter in exporters
+        ]
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except Exception:
+        logger.exception("Error fetching exporters")
         raise HTTPException(status_code=500, detail="Failed to fetch exporters")
 
+@app.get("/exporters/counts")
+async def get_exporter_counts(search: Optional[str] = None):
+    """Number of exporters per country, optionally only those matching ``search``."""
+    try:
+        groups = await prisma.exporter.group_by(
+            by=["countryId"],
+            where=exporter_filter(None, search),
+            count=True,
+            order={"countryId": "asc"},
+        )
+        return [{"countryId": group["countryId"], "count": group["_count"]["_all"]} for group in groups]
+    except Exception:
+        logger.exception("Error counting exporters")
+        raise HTTPException(status_code=500, detail="Failed to count exporters")
+
+@app.get("/exporters/by-license/{license_id}")
+async def get_exporter_by_license(license_id: str):
+    try:
+        exporter = await prisma.exporter.find_unique(where={"licenseId": license_id}, include={"country": True})
+        if exporter is None:
+            raise HTTPException(status_code=404, detail="Exporter not found")
+        return exporter
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error fetching exporter by license")
+        raise HTTPException(status_code=500, detail="Failed to fetch exporter")
+
 @app.post("/exporters")
 async def create_exporter(
     exporter: ExporterCreate,
@@ -406,32 +1050,221 @@ async def create_exporter(
         if not current_user.countryId and current_user.role != "SUPER_ADMIN":
             raise HTTPException(status_code=400, detail="User must be assigned to a country")
         
-        new_exporter = await prisma.exporter.create(
-            data={
-                "name": exporter.name,
-                "licenseId": exporter.license_id,
-                "contact": exporter.contact,
-                "website": exporter.website,
-                "countryId": current_user.countryId
-            }
-        )
+        if license_maybe_taken(exporter.license_id) and await prisma.exporter.find_unique(
+            where={"licenseId": exporter.license_id}
+        ):
+            raise HTTPException(status_code=409, detail="An exporter with this license ID already exists")
         
-        await prisma.auditlog.create(
-            data={
-                "userId": current_user.id,
-                "action": "CREATE_EXPORTER",
-                "description": f"Created exporter: {exporter.name}"
-            }
-        )
+        async with unit_of_work(current_user.id) as work:
+            new_exporter = await work.tx.exporter.create(
+                data={
+                    "name": exporter.name,
+                    "licenseId": exporter.license_id,
+                    "contact": exporter.contact,
+                    "website": exporter.website,
+                    "countryId": current_user.countryId
+                }
+            )
+            work.audit("CREATE_EXPORTER", f"Created exporter: {exporter.name}")
+            work.changed("exporter", "created", new_exporter)
         
-        print(f"✅ Exporter created: {exporter.name} by {current_user.email}")
+        logger.info("Exporter created: %s by %s", exporter.name, current_user.email)
         return new_exporter
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Error creating exporter: {e}")
+    except errors.UniqueViolationError:
+        raise HTTPException(status_code=409, detail="An exporter with this license ID already exists")
+    except Exception:
+        logger.exception("Error creating exporter")
         raise HTTPException(status_code=500, detail="Failed to create exporter")
 
+@app.post("/exporters/import")
+async def import_exporters(payload: ExporterImport, current_user = Depends(get_current_user)):
+    """Create many exporters in the caller's country; license IDs already taken are skipped.
+
+    Only licenses the license index cannot rule out are looked up, in one
+    query for the whole batch; the rest go straight to one INSERT.
+    """
+    try:
+        if current_user.role not in ["SUPER_ADMIN", "COUNTRY_ADMIN", "EDITOR"]:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        
+        if not current_user.countryId and current_user.role != "SUPER_ADMIN":
+            raise HTTPException(status_code=400, detail="User must be assigned to a country")
+        
+        if len(payload.exporters) > BULK_MAX_ROWS:
+            raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ROWS} exporters per import")
+        
+        rows, duplicates = {}, []
+        for exporter in payload.exporters:
+            if exporter.license_id in rows:
+                duplicates.append(exporter.license_id)
+            else:
+                rows[exporter.license_id] = exporter
+        
+        maybe_taken = [license_id for license_id in rows if license_maybe_taken(license_id)]
+        existing = set()
+        if maybe_taken:
+            taken = await prisma.exporter.find_many(where={"licenseId": {"in": maybe_taken}})
+            existing = {exporter.licenseId for exporter in taken}
+        new = [exporter for license_id, exporter in rows.items() if license_id not in existing]
+        
+        created = 0
+        if new:
+            async with unit_of_work(current_user.id) as work:
+                # skip_duplicates absorbs licenses registered since the lookup.
+                created = await work.tx.exporter.create_many(
+                    data=[
+                        {
+                            "name": exporter.name,
+                            "licenseId": exporter.license_id,
+                            "contact": exporter.contact,
+                            "website": exporter.website,
+                            "countryId": current_user.countryId,
+                        }
+                        for exporter in new
+                    ],
+                    skip_duplicates=True,
+                )
+                if created:
+                    for record in await work.tx.exporter.find_many(
+                        where={"licenseId": {"in": [exporter.license_id for exporter in new]},
+                               "countryId": current_user.countryId}
+                    ):
+                        work.changed("exporter", "created", record)
+                    work.audit("IMPORT_EXPORTERS", f"Imported {created} exporters")
+        
+        logger.info("Exporters imported: %s of %s by %s", created, len(payload.exporters), current_user.email)
+        return {
+            "created": created,
+            "existing": sorted(existing),
+            "duplicates": duplicates,
+            "conflicts": len(new) - created,
+        }
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error importing exporters")
+        raise HTTPException(status_code=500, detail="Failed to import exporters")
+
+@app.patch("/exporters/{exporter_id}")
+async def patch_exporter(
+    exporter_id: str,
+    patch: ExporterUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user = Depends(get_current_user)
+):
+    """Update only the fields sent; send ``If-Match: "<version>"`` to get 412 on a concurrent edit."""
+    try:
+        data = patch_data(patch, EXPORTER_COLUMNS, nullable=("contact", "website"))
+        async with unit_of_work(current_user.id) as work:
+            updated_exporter = await work.tx.exporter.update(
+                where={"id": exporter_id, **versioned_scope(current_user, if_match)},
+                data={**data, "version": {"increment": 1}},
+            )
+            if updated_exporter is None:
+                raise await unmatched_error(work.tx.exporter, exporter_id, country_scope(current_user), "Exporter not found")
+            work.audit("UPDATE_EXPORTER", f"Updated exporter: {updated_exporter.name} ({', '.join(data)})")
+            work.changed("exporter", "updated", updated_exporter)
+
+        logger.info("Exporter patched: %s (%s) by %s", updated_exporter.name, ", ".join(data), current_user.email)
+        response.headers["ETag"] = etag(updated_exporter.version)
+        return updated_exporter
+    except HTTPException:
+        raise
+    except errors.UniqueViolationError:
+        raise HTTPException(status_code=409, detail="An exporter with this license ID already exists")
+    except Exception:
+        logger.exception("Error patching exporter")
+        raise HTTPException(status_code=500, detail="Failed to update exporter")
+
+# Exporter-product links
+@app.get("/exporters/{exporter_id}/products")
+async def get_exporter_products(exporter_id: str):
+    try:
+        links = await prisma.exporterproduct.find_many(where={"exporterId": exporter_id}, include={"product": True})
+        return [link.product for link in links]
+    except Exception:
+        logger.exception("Error fetching exporter products")
+        raise HTTPException(status_code=500, detail="Failed to fetch exporter products")
+
+@app.get("/products/{product_id}/exporters")
+async def get_product_exporters(product_id: str):
+    try:
+        links = await prisma.exporterproduct.find_many(where={"productId": product_id}, include={"exporter": True})
+        return [link.exporter for link in links]
+    except Exception:
+        logger.exception("Error fetching product exporters")
+        raise HTTPException(status_code=500, detail="Failed to fetch product exporters")
+
+@app.post("/exporters/{exporter_id}/products")
+async def attach_exporter_products(
+    exporter_id: str,
+    links: ExporterProductLinks,
+    current_user = Depends(get_current_user)
+):
+    """Link products (of the caller's country) to an exporter; existing links are left alone."""
+    try:
+        if len(links.product_ids) > BULK_MAX_ROWS:
+            raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ROWS} products per call")
+        async with unit_of_work(current_user.id) as work:
+            exporter = await scoped_exporter(work.tx, current_user, exporter_id)
+            products = await work.tx.product.find_many(
+                where={"id": {"in": links.product_ids}, **country_scope(current_user)}
+            )
+            attached = 0
+            if products:
+                # skip_duplicates is INSERT ... ON CONFLICT DO NOTHING on (exporter_id, product_id).
+                attached = await work.tx.exporterproduct.create_many(
+                    data=[{"exporterId": exporter_id, "productId": product.id} for product in products],
+                    skip_duplicates=True,
+                )
+                if attached:
+                    work.audit(
+                        "ATTACH_PRODUCTS",
+                        f"Linked {attached} products to exporter: {exporter.name} "
+                        f"({len(products) - attached} already linked)",
+                    )
+
+        found = {product.id for product in products}
+        logger.info("Linked %s products to exporter %s by %s", attached, exporter.name, current_user.email)
+        return {
+            "attached": attached,
+            "skipped": [product_id for product_id in links.product_ids if product_id not in found],
+        }
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error linking exporter products")
+        raise HTTPException(status_code=500, detail="Failed to link products")
+
+@app.delete("/exporters/{exporter_id}/products")
+async def detach_exporter_products(
+    exporter_id: str,
+    product_id: List[str] = Query(...),
+    current_user = Depends(get_current_user)
+):
+    """Unlink the given products (``?product_id=...``, repeatable) from an exporter."""
+    try:
+        if len(product_id) > BULK_MAX_ROWS:
+            raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ROWS} products per call")
+        async with unit_of_work(current_user.id) as work:
+            exporter = await scoped_exporter(work.tx, current_user, exporter_id)
+            detached = await work.tx.exporterproduct.delete_many(
+                where={"exporterId": exporter_id, "productId": {"in": product_id}}
+            )
+            if detached:
+                work.audit("DETACH_PRODUCTS", f"Unlinked {detached} products from exporter: {exporter.name}")
+
+        logger.info("Unlinked %s products from exporter %s by %s", detached, exporter.name, current_user.email)
+        return {"detached": detached}
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error unlinking exporter products")
+        raise HTTPException(status_code=500, detail="Failed to unlink products")
+
 # Admin endpoints
 @app.get("/admin/users")
 async def get_all_users(current_user = Depends(get_current_user)):
@@ -443,27 +1276,67 @@ async def get_all_users(current_user = Depends(get_current_user)):
         return users
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Error fetching users: {e}")
+    except Exception:
+        logger.exception("Error fetching users")
         raise HTTPException(status_code=500, detail="Failed to fetch users")
 
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    hz: int = Query(100, gt=0, le=1000),
+    all_threads: bool = False,
+    current_user = Depends(get_current_user),
+):
+    """Sample this worker's stacks for ``seconds``; returns collapsed stacks for a flamegraph."""
+    try:
+        if current_user.role != "SUPER_ADMIN":
+            raise HTTPException(status_code=403, detail="Super admin access required")
+
+        threads = None if all_threads else [threading.get_ident()]
+        try:
+            result = await asyncio.to_thread(profile, seconds, hz, threads)
+        except ProfilerBusy:
+            raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+
+        await record_audit(
+            current_user.id, "PROFILE", f"Profiled worker {os.getpid()} for {result['duration']}s at {hz} Hz"
+        )
+        logger.info("Worker profiled by %s (%s samples)", current_user.email, result["samples"])
+        return PlainTextResponse(
+            result["collapsed"],
+            headers={
+                "X-Profile-Samples": str(result["samples"]),
+                "X-Profile-Duration": str(result["duration"]),
+                "X-Worker-PID": str(os.getpid()),
+            },
+        )
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error profiling worker")
+        raise HTTPException(status_code=500, detail="Failed to profile worker")
+
 @app.patch("/admin/users/{user_id}/activate")
 async def activate_user(user_id: str, current_user = Depends(get_current_user)):
     try:
         if current_user.role != "SUPER_ADMIN":
             raise HTTPException(status_code=403, detail="Super admin access required")
         
-        await prisma.user.update(
-            where={"id": user_id},
-            data={"isActive": True}
-        )
+        async with unit_of_work(current_user.id) as work:
+            activated = await work.tx.user.update(
+                where={"id": user_id},
+                data={"isActive": True}
+            )
+            if activated is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            work.audit("ACTIVATE_USER", f"Activated user: {activated.email}")
         
-        print(f"✅ User activated: {user_id} by {current_user.email}")
+        logger.info("User activated: %s by %s", user_id, current_user.email)
         return {"message": "User activated successfully"}
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Error activating user: {e}")
+    except Exception:
+        logger.exception("Error activating user")
         raise HTTPException(status_code=500, detail="Failed to activate user")
 
 @app.get("/admin/audit-logs")
@@ -480,10 +1353,11 @@ async def get_audit_logs(current_user = Depends(get_current_user)):
         return logs
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Error fetching audit logs: {e}")
+    except Exception:
+        logger.exception("Error fetching audit logs")
         raise HTTPException(status_code=500, detail="Failed to fetch audit logs")
 
+# Development server; production runs `gunicorn main:app` (see gunicorn.conf.py).
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
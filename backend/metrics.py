@@ -0,0 +1,178 @@
+"""Prometheus metrics for the API.
+
+Exposes request counts and latency histograms labelled by route template (not
+raw path, to keep cardinality bounded), in-flight requests, Prisma query
+durations per model/action, bcrypt durations, cache lookups and event-loop
+lag. Cache hit ratios are derived at query time, e.g.::
+
+    sum by (cache) (rate(gevp_cache_requests_total{result="hit"}[5m]))
+      / sum by (cache) (rate(gevp_cache_requests_total[5m]))
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (multi-worker deployments) the
+``/metrics`` output aggregates all worker processes.
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from db import QueryEvent
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BCRYPT_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0, 2.0)
+
+HTTP_REQUESTS = Counter(
+    "gevp_http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "gevp_http_request_duration_seconds",
+    "HTTP request latency by method, route template and status code",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "gevp_http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+DB_QUERY_DURATION = Histogram(
+    "gevp_db_query_duration_seconds",
+    "Prisma query latency by model and action",
+    ["model", "action", "outcome"],
+    buckets=DB_BUCKETS,
+)
+SLOW_QUERIES = Counter(
+    "gevp_db_slow_queries_total",
+    "Prisma queries slower than SLOW_QUERY_MS",
+    ["model", "action"],
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "gevp_password_hash_duration_seconds",
+    "bcrypt hash/verify latency",
+    ["operation"],
+    buckets=BCRYPT_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "gevp_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ["cache", "result"],
+)
+ADMISSION_REJECTIONS = Counter(
+    "gevp_admission_rejections_total",
+    "Requests shed by admission control",
+    ["route_class", "reason"],
+)
+EVENT_LOOP_LAG = Histogram(
+    "gevp_event_loop_lag_seconds",
+    "Delay between when a periodic loop callback was due and when it ran",
+    buckets=LOOP_LAG_BUCKETS,
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "gevp_event_loop_blocks_total",
+    "Times the event loop was blocked past LOOP_BLOCK_THRESHOLD_MS, by innermost app frame (debug mode)",
+    ["site"],
+)
+EVENT_LOOP_BLOCKED_SECONDS = Counter(
+    "gevp_event_loop_blocked_seconds_total",
+    "Time the event loop spent blocked past the threshold, by innermost app frame (debug mode)",
+    ["site"],
+)
+CHANGE_FEED_SUBSCRIBERS = Gauge(
+    "gevp_change_feed_subscribers",
+    "Open change-feed streams",
+    multiprocess_mode="livesum",
+)
+CHANGE_FEED_EVENTS = Counter(
+    "gevp_change_feed_events_total",
+    "Change events received for fan-out, by entity and action",
+    ["entity", "action"],
+)
+CHANGE_FEED_DROPPED = Counter(
+    "gevp_change_feed_overflows_total",
+    "Change-feed subscribers disconnected because their queue was full",
+)
+OUTBOX_RELAYED = Counter(
+    "gevp_outbox_events_relayed_total",
+    "Outbox events delivered to every consumer and removed",
+)
+OUTBOX_RELAY_LAG = Histogram(
+    "gevp_outbox_relay_lag_seconds",
+    "Time from outbox insert to delivery",
+    buckets=LATENCY_BUCKETS,
+)
+OUTBOX_FAILURES = Counter(
+    "gevp_outbox_consumer_failures_total",
+    "Outbox batches a consumer failed to process (retried after the lease expires)",
+    ["consumer"],
+)
+OUTBOX_DEAD_LETTERS = Counter(
+    "gevp_outbox_dead_letters_total",
+    "Outbox events dropped after exhausting their delivery attempts",
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def observe_query(event: QueryEvent) -> None:
+    outcome = "error" if event.error is not None else "ok"
+    DB_QUERY_DURATION.labels(event.model, event.action, outcome).observe(event.duration)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and in-flight requests."""
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            labels = (scope["method"], route_path, str(status_code))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(duration)
+
+
+def render_latest():
+    """Return ``(body, content_type)`` for the ``/metrics`` endpoint."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
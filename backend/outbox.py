@@ -0,0 +1,173 @@
+"""Transactional outbox for product and exporter change events.
+
+Mutating endpoints insert an ``outbox_events`` row in the same transaction as
+the entity change, so an event exists if and only if the change committed.
+``OutboxRelay`` then moves rows to the registered consumers (the change feed,
+which with a shared broker also invalidates every worker's list caches) in
+batches, off the request path. Each row goes to the consumers of the one
+worker that claims it.
+
+Delivery is at least once: rows are claimed with a lease, handed to every
+consumer and deleted only when all of them succeed. A consumer failure or a
+worker crash leaves the rows to be retried once the lease expires, so
+consumers must tolerate duplicates. Rows that keep failing are dropped after
+``OUTBOX_MAX_ATTEMPTS`` and logged with their payload.
+
+Every worker runs a relay; leases keep them from delivering the same row
+twice. The worker that wrote a row wakes its relay immediately, the others
+pick rows up on their next poll.
+
+Configuration (environment):
+
+``OUTBOX_BATCH_SIZE``       rows claimed per batch, default ``100``
+``OUTBOX_POLL_INTERVAL``    seconds between polls when idle, default ``1``
+``OUTBOX_LEASE_SECONDS``    how long a claim lasts before retry, default ``30``
+``OUTBOX_MAX_ATTEMPTS``     deliveries before a row is dropped, default ``10``
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app_logging import get_logger
+from events import ChangeEvent
+from metrics import OUTBOX_DEAD_LETTERS, OUTBOX_FAILURES, OUTBOX_RELAYED, OUTBOX_RELAY_LAG
+
+logger = get_logger("outbox")
+
+Consumer = Callable[[List[ChangeEvent]], Awaitable[None]]
+
+
+async def enqueue(db, events: List[ChangeEvent]) -> None:
+    """Record ``events``; pass the transaction client that makes the change."""
+    await db.outboxevent.create_many(data=[{"payload": event.to_json()} for event in events])
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        db,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        lease: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.db = db
+        self.batch_size = batch_size or int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+        self.poll_interval = poll_interval or float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+        self.lease = lease or float(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+        self.max_attempts = max_attempts or int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+        self.consumers: List[Tuple[str, Consumer]] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def add_consumer(self, name: str, consumer: Consumer) -> None:
+        self.consumers.append((name, consumer))
+
+    def notify(self) -> None:
+        """Wake the relay; call after committing outbox rows."""
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, drain_timeout: float = 5) -> None:
+        """Stop polling, then deliver what is already queued (bounded by ``drain_timeout``)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await asyncio.wait_for(self._drain(), drain_timeout)
+        except Exception:
+            logger.exception("Outbox drain on shutdown did not complete")
+
+    async def _drain(self) -> None:
+        while await self.relay_once() == self.batch_size:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                relayed = await self.relay_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox relay failed")
+                relayed = 0
+            if relayed == self.batch_size:
+                continue  # more rows are likely waiting
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def relay_once(self) -> int:
+        """Claim one batch and hand it to every consumer; returns the rows claimed."""
+        rows = await self._claim()
+        if not rows:
+            return 0
+        token = rows[0].claimedBy
+
+        live, events, dead = [], [], []
+        for row in rows:
+            if row.attempts > self.max_attempts:
+                logger.error("Dropping outbox event %s after %s attempts: %.500s", row.id, row.attempts - 1, row.payload)
+                dead.append(row.id)
+                continue
+            try:
+                events.append(ChangeEvent.from_json(row.payload))
+                live.append(row)
+            except (TypeError, ValueError):
+                logger.error("Dropping malformed outbox event %s: %.500s", row.id, row.payload)
+                dead.append(row.id)
+        if dead:
+            OUTBOX_DEAD_LETTERS.inc(len(dead))
+            await self.db.outboxevent.delete_many(where={"id": {"in": dead}, "claimedBy": token})
+
+        for name, consumer in self.consumers:
+            if not events:
+                break
+            try:
+                await consumer(events)
+            except Exception:
+                OUTBOX_FAILURES.labels(name).inc()
+                logger.exception("Outbox consumer %s failed; %s events will be retried", name, len(events))
+                return len(rows)
+
+        if live:
+            await self.db.outboxevent.delete_many(where={"id": {"in": [row.id for row in live]}, "claimedBy": token})
+            now = datetime.now(timezone.utc)
+            for row in live:
+                OUTBOX_RELAY_LAG.observe(max(0.0, (now - row.createdAt).total_seconds()))
+            OUTBOX_RELAYED.inc(len(live))
+        return len(rows)
+
+    async def _claim(self) -> List:
+        now = datetime.now(timezone.utc)
+        available: Dict = {"OR": [{"claimedAt": None}, {"claimedAt": {"lt": now - timedelta(seconds=self.lease)}}]}
+        candidates = await self.db.outboxevent.find_many(
+            where=available, order=[{"createdAt": "asc"}, {"id": "asc"}], take=self.batch_size
+        )
+        if not candidates:
+            return []
+        ids = [row.id for row in candidates]
+        token = uuid.uuid4().hex
+        # The availability condition is re-checked by the UPDATE, so a row
+        # another worker claimed in between is skipped rather than stolen.
+        claimed = await self.db.outboxevent.update_many(
+            where={"id": {"in": ids}, **available},
+            data={"claimedBy": token, "claimedAt": now, "attempts": {"increment": 1}},
+        )
+        if claimed == len(ids):
+            return [row.model_copy(update={"claimedBy": token, "attempts": row.attempts + 1}) for row in candidates]
+        return await self.db.outboxevent.find_many(
+            where={"id": {"in": ids}, "claimedBy": token}, order=[{"createdAt": "asc"}, {"id": "asc"}]
+        )
@@ -0,0 +1,80 @@
+"""Low-overhead statistical profiler for a live worker.
+
+A background thread reads the Python stack of the target threads (by default
+the event-loop thread) ``hz`` times per second with ``sys._current_frames()``
+and aggregates identical stacks. Nothing is instrumented, so the cost is the
+sampling thread itself: roughly a stack walk per sample, well under 1% of a
+core at the default 100 Hz.
+
+The result is collapsed-stack text that ``flamegraph.pl``, speedscope and
+inferno accept directly. Time spent waiting in the selector shows up as the
+event loop's own frames, which makes the idle fraction visible.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+from stacks import Stack, collapse, walk
+
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_MAX_HZ = int(os.getenv("PROFILE_MAX_HZ", "1000"))
+
+_running = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Another profile is already running in this process."""
+
+
+def profile(seconds: float, hz: int = 100, thread_ids: Optional[Iterable[int]] = None) -> Dict:
+    """Sample ``thread_ids`` (all threads but this one if ``None``) for ``seconds``.
+
+    Blocking: run it in a worker thread, never on the event loop.
+    """
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        return _sample(min(seconds, PROFILE_MAX_SECONDS), max(1, min(hz, PROFILE_MAX_HZ)), thread_ids)
+    finally:
+        _running.release()
+
+
+def _sample(seconds: float, hz: int, thread_ids: Optional[Iterable[int]]) -> Dict:
+    me = threading.get_ident()
+    wanted = set(thread_ids) if thread_ids is not None else None
+    names = {t.ident: t.name for t in threading.enumerate()}
+    label_threads = wanted is None or len(wanted) > 1
+    samples: Counter = Counter()
+    interval = 1 / hz
+    started = time.perf_counter()
+    deadline = started + seconds
+    taken = 0
+    next_at = started
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me or (wanted is not None and thread_id not in wanted):
+                continue
+            stack: Stack = walk(frame)
+            if label_threads:
+                stack = (f"thread:{names.get(thread_id, thread_id)}",) + stack
+            samples[stack] += 1
+        frame = None  # don't keep the last sampled frame alive
+        taken += 1
+        # Fixed-rate schedule; skip missed ticks rather than bursting to catch up.
+        next_at += interval
+        if next_at < now:
+            next_at = now + interval
+        time.sleep(max(0.0, next_at - time.perf_counter()))
+    return {
+        "samples": taken,
+        "duration": round(time.perf_counter() - started, 3),
+        "hz": hz,
+        "collapsed": collapse(samples),
+    }
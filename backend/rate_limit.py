@@ -0,0 +1,385 @@
+"""Request admission control: token-bucket rate limits and a global concurrency cap.
+
+Every request is classified into a route class (auth, search, write, default)
+and charged against a per-IP bucket and, when the caller presents a valid
+bearer token, a per-user bucket. Budgets are configured per class through
+environment variables such as ``RATE_LIMIT_SEARCH_IP="120/minute"``.
+
+On top of the buckets, a global in-flight limiter keeps the number of requests
+inside the application below ``MAX_CONCURRENT_REQUESTS`` so that excess load is
+shed with 503 before it piles up behind the database connection pool.
+
+Buckets live in an in-memory backend by default. Setting
+``RATE_LIMIT_BACKEND_URL`` to a ``redis://`` URL switches to a shared backend so
+that several workers or hosts enforce one budget.
+"""
+
+import asyncio
+import json
+import os
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from app_logging import get_logger
+from metrics import ADMISSION_REJECTIONS
+
+logger = get_logger("rate_limit")
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+@dataclass(frozen=True)
+class Limit:
+    """A token bucket budget: ``capacity`` tokens refilled over ``period`` seconds."""
+
+    capacity: int
+    period: float
+
+    def __post_init__(self):
+        if self.capacity <= 0 or self.period <= 0:
+            raise ValueError(f"Rate limit needs a positive capacity and period, got {self.capacity}/{self.period}s")
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["Limit"]:
+        """Parse ``"<count>/<second|minute|hour>"``; ``"off"`` or a count of 0 disables the limit."""
+        value = value.strip().lower()
+        if value in ("", "off", "none"):
+            return None
+        count, _, unit = value.partition("/")
+        period = _PERIODS.get(unit.rstrip("s") or "second")
+        if period is None:
+            raise ValueError(f"Unknown rate limit period in {value!r}")
+        if not count.strip().isdigit():
+            raise ValueError(f"Rate limit count must be a non-negative integer in {value!r}")
+        capacity = int(count)
+        if capacity == 0:
+            return None
+        return cls(capacity=capacity, period=period)
+
+
+class RateLimitBackend:
+    """Storage for token buckets. Subclasses must make ``consume`` atomic across its keys."""
+
+    async def consume(self, buckets: Sequence[Tuple[str, Limit]], cost: float = 1.0) -> Tuple[bool, float]:
+        """Take ``cost`` tokens from every bucket, or from none if any of them is short.
+
+        Returns ``(allowed, retry_after_seconds)``. Rejected requests cost
+        nothing, so a caller throttled by one bucket does not drain the others.
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryBackend(RateLimitBackend):
+    """Per-process buckets kept in an LRU-bounded dict.
+
+    All access happens on the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, buckets: Sequence[Tuple[str, Limit]], cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        levels = []
+        retry_after = 0.0
+        for key, limit in buckets:
+            tokens, updated = self._buckets.pop(key, (float(limit.capacity), now))
+            tokens = min(float(limit.capacity), tokens + (now - updated) * limit.rate)
+            levels.append((key, tokens))
+            if tokens < cost:
+                retry_after = max(retry_after, (cost - tokens) / limit.rate)
+
+        allowed = retry_after == 0.0
+        for key, tokens in levels:
+            self._buckets[key] = (tokens - cost if allowed else tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+# KEYS are the buckets; ARGV is now, cost, then capacity and rate per bucket.
+_REDIS_TOKEN_BUCKETS = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local levels = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[1 + 2 * i])
+  local rate = tonumber(ARGV[2 + 2 * i])
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(state[1]) or capacity
+  local ts = tonumber(state[2]) or now
+  tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+  levels[i] = tokens
+  if tokens < cost then
+    retry_after = math.max(retry_after, (cost - tokens) / rate)
+  end
+end
+local allowed = 0
+if retry_after == 0 then
+  allowed = 1
+end
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[1 + 2 * i])
+  local rate = tonumber(ARGV[2 + 2 * i])
+  local tokens = levels[i]
+  if allowed == 1 then
+    tokens = tokens - cost
+  end
+  redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+  redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """Shared buckets in Redis, checked and taken atomically by a Lua script.
+
+    Requires the optional ``redis`` package (``pip install redis``).
+    """
+
+    def __init__(self, url: str, prefix: str = "gevp:rl:"):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND_URL is set but the 'redis' package is not installed"
+            ) from exc
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKETS)
+
+    async def consume(self, buckets: Sequence[Tuple[str, Limit]], cost: float = 1.0) -> Tuple[bool, float]:
+        args = [time.time(), cost]
+        for _, limit in buckets:
+            args += [limit.capacity, limit.rate]
+        allowed, retry_after = await self._script(keys=[self.prefix + key for key, _ in buckets], args=args)
+        return bool(allowed), float(retry_after)
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+def create_backend(url: Optional[str] = None) -> RateLimitBackend:
+    url = url if url is not None else os.getenv("RATE_LIMIT_BACKEND_URL", "")
+    if not url or url == "memory://":
+        return InMemoryBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported RATE_LIMIT_BACKEND_URL: {url}")
+
+
+# Route classes and their default (per-IP, per-user) budgets.
+DEFAULT_LIMITS: Dict[str, Tuple[str, str]] = {
+    "auth": ("10/minute", "off"),
+    "search": ("120/minute", "600/minute"),
+    "write": ("60/minute", "120/minute"),
+    "default": ("300/minute", "1200/minute"),
+}
+
+AUTH_PATHS = ("/token", "/register")
+# Probes and long-lived streams; a change-feed connection must not hold a
+# concurrency slot for its whole lifetime.
+EXEMPT_PATHS = ("/health", "/health/deep", "/ready", "/metrics", "/events")
+# Rate limited but outside the concurrency cap: the SUPER_ADMIN profiler
+# holds its request open for the whole sampling window (up to a minute).
+UNCAPPED_PATHS = ("/admin/profile",)
+
+
+def load_limits() -> Dict[str, Tuple[Optional[Limit], Optional[Limit]]]:
+    limits = {}
+    for route_class, (ip_default, user_default) in DEFAULT_LIMITS.items():
+        prefix = f"RATE_LIMIT_{route_class.upper()}"
+        limits[route_class] = (
+            Limit.parse(os.getenv(f"{prefix}_IP", ip_default)),
+            Limit.parse(os.getenv(f"{prefix}_USER", user_default)),
+        )
+    return limits
+
+
+def classify_route(method: str, path: str) -> Optional[str]:
+    """Return the route class for a request, or ``None`` if it is exempt."""
+    if method == "OPTIONS" or path in EXEMPT_PATHS:
+        return None
+    if path in AUTH_PATHS:
+        return "auth"
+    if method in ("POST", "PUT", "PATCH", "DELETE"):
+        return "write"
+    if method in ("GET", "HEAD") and (
+        path.startswith("/products") or path.startswith("/countries") or path.startswith("/exporters")
+    ):
+        return "search"
+    return "default"
+
+
+_active: Optional["weakref.ReferenceType[AdmissionControlMiddleware]"] = None
+
+
+def admission_stats() -> Optional[Dict[str, float]]:
+    """Concurrency stats of the running admission middleware, if it has been built."""
+    middleware = _active() if _active is not None else None
+    return middleware.stats() if middleware is not None else None
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware enforcing rate limits (429) and the concurrency cap (503).
+
+    ``user_key`` maps a bearer token to a stable user identifier, or ``None`` if
+    the token is invalid; invalid tokens are only charged against the IP budget.
+    """
+
+    def __init__(
+        self,
+        app,
+        user_key: Optional[Callable[[str], Optional[str]]] = None,
+        backend: Optional[RateLimitBackend] = None,
+        limits: Optional[Dict[str, Tuple[Optional[Limit], Optional[Limit]]]] = None,
+        max_concurrent: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        trust_forwarded_for: Optional[bool] = None,
+    ):
+        self.app = app
+        self.user_key = user_key
+        self.backend = backend or create_backend()
+        self.limits = limits if limits is not None else load_limits()
+        self.max_concurrent = max_concurrent if max_concurrent is not None else int(
+            os.getenv("MAX_CONCURRENT_REQUESTS", "64")
+        )
+        self.max_queued = max_queued if max_queued is not None else int(
+            os.getenv("MAX_QUEUED_REQUESTS", "128")
+        )
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(
+            os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.5")
+        )
+        self.trust_forwarded_for = trust_forwarded_for if trust_forwarded_for is not None else (
+            os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+        )
+        self.in_flight = 0
+        self.queued = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        global _active
+        _active = weakref.ref(self)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "saturation": round(self.in_flight / self.max_concurrent, 3) if self.max_concurrent else 0.0,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_route(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self._check_rate_limits(scope, route_class)
+        if retry_after is not None:
+            ADMISSION_REJECTIONS.labels(route_class, "rate_limited").inc()
+            await _reject(send, 429, "Too many requests", retry_after)
+            return
+
+        if scope["path"] in UNCAPPED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self._acquire_slot():
+            ADMISSION_REJECTIONS.labels(route_class, "overloaded").inc()
+            await _reject(send, 503, "Server is busy, please retry", 1.0)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def _check_rate_limits(self, scope, route_class: str) -> Optional[float]:
+        ip_limit, user_limit = self.limits.get(route_class, (None, None))
+        keys = []
+        if ip_limit is not None:
+            keys.append((f"{route_class}:ip:{self._client_ip(scope)}", ip_limit))
+        if user_limit is not None and self.user_key is not None:
+            token = _bearer_token(scope)
+            user = self.user_key(token) if token else None
+            if user:
+                keys.append((f"{route_class}:user:{user}", user_limit))
+
+        if not keys:
+            return None
+        try:
+            allowed, retry_after = await self.backend.consume(keys)
+        except Exception as e:
+            # A broken shared backend must not take the API down with it.
+            logger.warning("Rate limit backend error, allowing request: %s", e)
+            return None
+        return None if allowed else retry_after
+
+    async def _acquire_slot(self) -> bool:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        if self._slots.locked():
+            if self.queued >= self.max_queued:
+                return False
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.queued -= 1
+        else:
+            await self._slots.acquire()
+        self.in_flight += 1
+        return True
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_forwarded_for:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+            return None
+    return None
+
+
+async def _reject(send: Callable[[dict], Awaitable[None]], status_code: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
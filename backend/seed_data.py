@@ -1,308 +1,479 @@
+"""Seed the database with demo data and, optionally, a scaled synthetic dataset.
+
+    python seed_data.py                      # demo countries, users, products, exporters
+    python seed_data.py --scale 10           # + 100k products / 10k exporters
+    python seed_data.py --scale 1000 --method copy --workers 8   # 10M-product benchmark DB
+
+``--scale`` follows ``synthetic_data.Scale.from_factor``. Rows are generated
+deterministically from ``--seed``. The ``create_many`` method runs batched,
+concurrent ``create_many(skip_duplicates=True)`` calls through Prisma and is
+idempotent. The ``copy`` method fans generation and ``COPY`` out across worker
+processes with one asyncpg connection each; it is much faster but expects the
+synthetic tables to be empty.
+"""
+
+import argparse
 import asyncio
-from prisma import Prisma
-from passlib.context import CryptContext
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 from dotenv import load_dotenv
+from passlib.context import CryptContext
+from prisma import Prisma
+
+import synthetic_data
+from db import COLUMNS, TABLES
+from synthetic_data import Scale
+from units import quantity_fields
 
 load_dotenv()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-async def seed_database():
+COUNTRIES = [
+    {
+        "name": "United States",
+        "code": "USA",
+        "region": "North America",
+        "flagUrl": "🇺🇸",
+        "contactInfo": "trade@usa.gov"
+    },
+    {
+        "name": "Brazil",
+        "code": "BRA",
+        "region": "South America",
+        "flagUrl": "🇧🇷",
+        "contactInfo": "comercio@brasil.gov.br"
+    },
+    {
+        "name": "India",
+        "code": "IND",
+        "region": "Asia",
+        "flagUrl": "🇮🇳",
+        "contactInfo": "trade@india.gov.in"
+    },
+    {
+        "name": "Germany",
+        "code": "GER",
+        "region": "Europe",
+        "flagUrl": "🇩🇪",
+        "contactInfo": "handel@deutschland.de"
+    },
+    {
+        "name": "Bangladesh",
+        "code": "BGD",
+        "region": "Asia",
+        "flagUrl": "🇧🇩",
+        "contactInfo": "trade@bangladesh.gov.bd"
+    }
+]
+
+# Plain-text passwords are hashed in parallel at seed time. "country" is a
+# country code resolved to its ID once the countries exist.
+USERS = [
+    {"email": "admin@gevp.org", "password": "admin123", "role": "SUPER_ADMIN", "country": None},
+    {"email": "usa@trade.gov", "password": "usa123", "role": "COUNTRY_ADMIN", "country": "USA"},
+    {"email": "brazil@trade.gov", "password": "brazil123", "role": "COUNTRY_ADMIN", "country": "BRA"},
+    {"email": "india@trade.gov", "password": "india123", "role": "EDITOR", "country": "IND"},
+    {"email": "germany@trade.gov", "password": "germany123", "role": "EDITOR", "country": "GER"},
+]
+
+PRODUCTS = [
+    {
+        "name": "Soybeans",
+        "unit": "tons",
+        "quantity": 96000000,
+        "taxRate": 2.5,
+        "timePeriod": "2024 Annual",
+        "tags": ["agriculture", "organic", "non-gmo"],
+        "category": "Agriculture",
+        "country": "USA"
+    },
+    {
+        "name": "Corn",
+        "unit": "tons",
+        "quantity": 54000000,
+        "taxRate": 1.8,
+        "timePeriod": "2024 Annual",
+        "tags": ["agriculture", "feed", "export-grade"],
+        "category": "Agriculture",
+        "country": "USA"
+    },
+    {
+        "name": "Coffee Beans",
+        "unit": "tons",
+        "quantity": 2500000,
+        "taxRate": 5.0,
+        "timePeriod": "2024 Annual",
+        "tags": ["arabica", "premium", "fair-trade"],
+        "category": "Food & Beverages",
+        "country": "BRA"
+    },
+    {
+        "name": "Sugar",
+        "unit": "tons",
+        "quantity": 29000000,
+        "taxRate": 3.2,
+        "timePeriod": "2024 Annual",
+        "tags": ["raw", "refined", "organic"],
+        "category": "Food & Beverages",
+        "country": "BRA"
+    },
+    {
+        "name": "Basmati Rice",
+        "unit": "tons",
+        "quantity": 4500000,
+        "taxRate": 0.0,
+        "timePeriod": "2024 Annual",
+        "tags": ["premium", "aromatic", "export-quality"],
+        "category": "Agriculture",
+        "country": "IND"
+    },
+    {
+        "name": "Textiles",
+        "unit": "tons",
+        "quantity": 1200000,
+        "taxRate": 8.5,
+        "timePeriod": "2024 Annual",
+        "tags": ["cotton", "silk", "handwoven"],
+        "category": "Textiles",
+        "country": "IND"
+    },
+    {
+        "name": "Automobiles",
+        "unit": "units",
+        "quantity": 4500000,
+        "taxRate": 12.0,
+        "timePeriod": "2024 Annual",
+        "tags": ["luxury", "electric", "hybrid"],
+        "category": "Manufacturing",
+        "country": "GER"
+    },
+    {
+        "name": "Machinery",
+        "unit": "units",
+        "quantity": 850000,
+        "taxRate": 6.5,
+        "timePeriod": "2024 Annual",
+        "tags": ["industrial", "precision", "high-tech"],
+        "category": "Manufacturing",
+        "country": "GER"
+    },
+    {
+        "name": "Ready-Made Garments",
+        "unit": "pieces",
+        "quantity": 750000000,
+        "taxRate": 4.2,
+        "timePeriod": "2024 Annual",
+        "tags": ["cotton", "sustainable", "fair-trade"],
+        "category": "Textiles",
+        "country": "BGD"
+    }
+]
+
+EXPORTERS = [
+    {
+        "name": "American Grain Exports LLC",
+        "licenseId": "AGE-USA-2024-001",
+        "contact": "+1-555-0123, grain@age-usa.com",
+        "website": "https://age-usa.com",
+        "country": "USA"
+    },
+    {
+        "name": "Midwest Agricultural Corp",
+        "licenseId": "MAC-USA-2024-002",
+        "contact": "+1-555-0456, info@midwest-ag.com",
+        "website": "https://midwest-ag.com",
+        "country": "USA"
+    },
+    {
+        "name": "Santos Coffee Exporters",
+        "licenseId": "SCE-BRA-2024-001",
+        "contact": "+55-11-9876-5432, santos@coffee-br.com",
+        "website": "https://santos-coffee.com.br",
+        "country": "BRA"
+    },
+    {
+        "name": "Brazilian Sugar Trading",
+        "licenseId": "BST-BRA-2024-002",
+        "contact": "+55-21-8765-4321, trade@sugar-br.com",
+        "website": "https://brazilian-sugar.com",
+        "country": "BRA"
+    },
+    {
+        "name": "Punjab Rice Mills",
+        "licenseId": "PRM-IND-2024-001",
+        "contact": "+91-98765-43210, export@punjab-rice.in",
+        "website": "https://punjab-rice.in",
+        "country": "IND"
+    },
+    {
+        "name": "Mumbai Textile Exports",
+        "licenseId": "MTE-IND-2024-002",
+        "contact": "+91-22-1234-5678, mumbai@textiles.in",
+        "website": "https://mumbai-textiles.in",
+        "country": "IND"
+    },
+    {
+        "name": "BMW Export Division",
+        "licenseId": "BMW-GER-2024-001",
+        "contact": "+49-89-1234-5678, export@bmw.de",
+        "website": "https://bmw.de/export",
+        "country": "GER"
+    },
+    {
+        "name": "Dhaka Garments International",
+        "licenseId": "DGI-BGD-2024-001",
+        "contact": "+880-2-9876543, dhaka@garments.bd",
+        "website": "https://dhaka-garments.com",
+        "country": "BGD"
+    }
+]
+
+# Prisma fields written by COPY, in column order.
+COPY_FIELDS = {
+    "product": ["id", "name", "unit", "quantity", "taxRate", "timePeriod", "tags", "category", "countryId",
+                "unitFamily", "canonicalQuantity", "createdAt", "updatedAt"],
+    "exporter": ["id", "name", "licenseId", "contact", "website", "countryId", "createdAt", "updatedAt"],
+    "exporterproduct": ["id", "exporterId", "productId"],
+    "auditlog": ["id", "userId", "action", "description", "timestamp"],
+}
+GENERATORS = {
+    "product": synthetic_data.products,
+    "exporter": synthetic_data.exporters,
+    "exporterproduct": synthetic_data.exporter_products,
+    "auditlog": synthetic_data.audit_logs,
+}
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def hash_passwords(passwords: List[str], workers: int) -> List[str]:
+    """bcrypt is CPU-bound and holds the GIL, so hash across processes."""
+    with ProcessPoolExecutor(max_workers=min(workers, len(passwords)) or 1,
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(hash_password, passwords))
+
+
+def _with_country(row: Dict, country_ids: Dict[str, str]) -> Dict:
+    data = {k: v for k, v in row.items() if k != "country"}
+    data["countryId"] = country_ids[row["country"]] if row["country"] else None
+    return data
+
+
+def _slug(name: str) -> str:
+    return name.lower().replace(" ", "-")
+
+
+async def gather_limited(coros, limit: int):
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+async def seed_fixtures(prisma: Prisma, workers: int, concurrency: int) -> None:
+    countries = await gather_limited(
+        [
+            prisma.country.upsert(where={"code": c["code"]}, data={"create": c, "update": c})
+            for c in COUNTRIES
+        ],
+        concurrency,
+    )
+    country_ids = {c.code: c.id for c in countries}
+    print(f"Created/Updated {len(countries)} countries")
+
+    hashes = hash_passwords([u["password"] for u in USERS], workers)
+    users = []
+    for user, password_hash in zip(USERS, hashes):
+        data = _with_country(user, country_ids)
+        data.update(password=password_hash, isActive=True)
+        users.append(data)
+    await gather_limited(
+        [prisma.user.upsert(where={"email": u["email"]}, data={"create": u, "update": u}) for u in users],
+        concurrency,
+    )
+    print(f"Created/Updated {len(users)} users")
+
+    products = []
+    for product in PRODUCTS:
+        data = _with_country(product, country_ids)
+        data.update(quantity_fields(data["quantity"], data["unit"]))
+        products.append(
+            prisma.product.upsert(
+                where={"id": f"seed-product-{_slug(product['name'])}"},
+                data={"create": dict(data, id=f"seed-product-{_slug(product['name'])}"), "update": data},
+            )
+        )
+    await gather_limited(products, concurrency)
+    print(f"Created/Updated {len(products)} products")
+
+    exporters = [_with_country(e, country_ids) for e in EXPORTERS]
+    await gather_limited(
+        [prisma.exporter.upsert(where={"licenseId": e["licenseId"]}, data={"create": e, "update": e}) for e in exporters],
+        concurrency,
+    )
+    print(f"Created/Updated {len(exporters)} exporters")
+
+
+async def seed_synthetic_create_many(prisma: Prisma, scale: Scale, batch_size: int, concurrency: int) -> None:
+    for model, rows in (
+        ("product", synthetic_data.products(scale)),
+        ("exporter", synthetic_data.exporters(scale)),
+        ("exporterproduct", synthetic_data.exporter_products(scale)),
+        ("auditlog", synthetic_data.audit_logs(scale)),
+    ):
+        started = time.perf_counter()
+        actions = getattr(prisma, model)
+        semaphore = asyncio.Semaphore(concurrency)
+        pending = set()
+        inserted = 0
+
+        async def insert(batch):
+            async with semaphore:
+                return await actions.create_many(data=batch, skip_duplicates=True)
+
+        for batch in synthetic_data.batched(rows, batch_size):
+            # Bound the number of generated-but-unsent batches held in memory.
+            while len(pending) >= concurrency * 2:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                inserted += sum(t.result() for t in done)
+            pending.add(asyncio.ensure_future(insert(batch)))
+        if pending:
+            inserted += sum(await asyncio.gather(*pending))
+        print(f"Inserted {inserted} {model} rows in {time.perf_counter() - started:.1f}s")
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """Strip Prisma-only URL parameters (``schema``, ``connection_limit``...) for asyncpg."""
+    parts = urlsplit(database_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in ("schema", "connection_limit", "pool_timeout", "pgbouncer")]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def copy_chunk(dsn: str, model: str, scale: Scale, start: int, stop: int) -> int:
+    """Worker process entry point: generate rows ``[start, stop)`` and COPY them."""
+    return asyncio.run(_copy_chunk(dsn, model, scale, start, stop))
+
+
+async def _copy_chunk(dsn: str, model: str, scale: Scale, start: int, stop: int) -> int:
+    import asyncpg
+
+    fields = COPY_FIELDS[model]
+    columns = [COLUMNS.get(model, {}).get(f, f) for f in fields]
+    now = datetime.utcnow()
+    records = [
+        tuple(row.get(f, now) if f in ("createdAt", "updatedAt", "timestamp") else row.get(f) for f in fields)
+        for row in GENERATORS[model](scale, start, stop)
+    ]
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.copy_records_to_table(TABLES[model], records=records, columns=columns)
+    finally:
+        await conn.close()
+    return len(records)
+
+
+async def seed_synthetic_copy(scale: Scale, workers: int, chunk_size: int) -> None:
+    dsn = asyncpg_dsn(os.environ["DATABASE_URL"])
+    loop = asyncio.get_running_loop()
+    totals = {"product": scale.products, "exporter": scale.exporters,
+              "exporterproduct": scale.exporters, "auditlog": scale.audit_logs}
+    # Links reference products and exporters, so they go in a second wave.
+    waves = [("product", "exporter", "auditlog"), ("exporterproduct",)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for wave in waves:
+            started = time.perf_counter()
+            futures = {model: [] for model in wave}
+            for model in wave:
+                for start in range(0, totals[model], chunk_size):
+                    stop = min(start + chunk_size, totals[model])
+                    futures[model].append(loop.run_in_executor(pool, copy_chunk, dsn, model, scale, start, stop))
+            for model in wave:
+                inserted = sum(await asyncio.gather(*futures[model]))
+                print(f"Copied {inserted} {model} rows ({time.perf_counter() - started:.1f}s elapsed)")
+
+
+async def seed_database(
+    scale_factor: float = 0,
+    seed: int = 42,
+    method: str = "create_many",
+    workers: int = os.cpu_count() or 1,
+    concurrency: int = 8,
+    batch_size: int = 5000,
+    chunk_size: int = 250_000,
+):
     prisma = Prisma()
     await prisma.connect()
-    
+
     try:
-        # Create countries
-        countries_data = [
-            {
-                "name": "United States",
-                "code": "USA",
-                "region": "North America",
-                "flagUrl": "🇺🇸",
-                "contactInfo": "trade@usa.gov"
-            },
-            {
-                "name": "Brazil",
-                "code": "BRA", 
-                "region": "South America",
-                "flagUrl": "🇧🇷",
-                "contactInfo": "comercio@brasil.gov.br"
-            },
-            {
-                "name": "India",
-                "code": "IND",
-                "region": "Asia",
-                "flagUrl": "🇮🇳", 
-                "contactInfo": "trade@india.gov.in"
-            },
-            {
-                "name": "Germany",
-                "code": "GER",
-                "region": "Europe",
-                "flagUrl": "🇩🇪",
-                "contactInfo": "handel@deutschland.de"
-            },
-            {
-                "name": "Bangladesh",
-                "code": "BGD",
-                "region": "Asia", 
-                "flagUrl": "🇧🇩",
-                "contactInfo": "trade@bangladesh.gov.bd"
-            }
-        ]
-        
-        created_countries = []
-        for country_data in countries_data:
-            country = await prisma.country.upsert(
-                where={"code": country_data["code"]},
-                data={
-                    "create": country_data,
-                    "update": country_data
-                }
-            )
-            created_countries.append(country)
-            print(f"Created/Updated country: {country.name}")
-        
-        # Create users
-        users_data = [
-            {
-                "email": "admin@gevp.org",
-                "password": pwd_context.hash("admin123"),
-                "role": "SUPER_ADMIN",
-                "countryId": None,
-                "isActive": True
-            },
-            {
-                "email": "usa@trade.gov",
-                "password": pwd_context.hash("usa123"),
-                "role": "COUNTRY_ADMIN", 
-                "countryId": created_countries[0].id,
-                "isActive": True
-            },
-            {
-                "email": "brazil@trade.gov",
-                "password": pwd_context.hash("brazil123"),
-                "role": "COUNTRY_ADMIN",
-                "countryId": created_countries[1].id,
-                "isActive": True
-            },
-            {
-                "email": "india@trade.gov",
-                "password": pwd_context.hash("india123"),
-                "role": "EDITOR",
-                "countryId": created_countries[2].id,
-                "isActive": True
-            },
-            {
-                "email": "germany@trade.gov", 
-                "password": pwd_context.hash("germany123"),
-                "role": "EDITOR",
-                "countryId": created_countries[3].id,
-                "isActive": True
-            }
-        ]
-        
-        created_users = []
-        for user_data in users_data:
-            user = await prisma.user.upsert(
-                where={"email": user_data["email"]},
-                data={
-                    "create": user_data,
-                    "update": user_data
-                }
-            )
-            created_users.append(user)
-            print(f"Created/Updated user: {user.email}")
-        
-        # Create products
-        products_data = [
-            {
-                "name": "Soybeans",
-                "unit": "tons",
-                "quantity": 96000000,
-                "taxRate": 2.5,
-                "timePeriod": "2024 Annual",
-                "tags": ["agriculture", "organic", "non-gmo"],
-                "category": "Agriculture",
-                "countryId": created_countries[0].id  # USA
-            },
-            {
-                "name": "Corn",
-                "unit": "tons", 
-                "quantity": 54000000,
-                "taxRate": 1.8,
-                "timePeriod": "2024 Annual",
-                "tags": ["agriculture", "feed", "export-grade"],
-                "category": "Agriculture",
-                "countryId": created_countries[0].id  # USA
-            },
-            {
-                "name": "Coffee Beans",
-                "unit": "tons",
-                "quantity": 2500000,
-                "taxRate": 5.0,
-                "timePeriod": "2024 Annual", 
-                "tags": ["arabica", "premium", "fair-trade"],
-                "category": "Food & Beverages",
-                "countryId": created_countries[1].id  # Brazil
-            },
-            {
-                "name": "Sugar",
-                "unit": "tons",
-                "quantity": 29000000,
-                "taxRate": 3.2,
-                "timePeriod": "2024 Annual",
-                "tags": ["raw", "refined", "organic"],
-                "category": "Food & Beverages", 
-                "countryId": created_countries[1].id  # Brazil
-            },
-            {
-                "name": "Basmati Rice",
-                "unit": "tons",
-                "quantity": 4500000,
-                "taxRate": 0.0,
-                "timePeriod": "2024 Annual",
-                "tags": ["premium", "aromatic", "export-quality"],
-                "category": "Agriculture",
-                "countryId": created_countries[2].id  # India
-            },
-            {
-                "name": "Textiles",
-                "unit": "tons",
-                "quantity": 1200000,
-                "taxRate": 8.5,
-                "timePeriod": "2024 Annual",
-                "tags": ["cotton", "silk", "handwoven"],
-                "category": "Textiles",
-                "countryId": created_countries[2].id  # India
-            },
-            {
-                "name": "Automobiles",
-                "unit": "units",
-                "quantity": 4500000,
-                "taxRate": 12.0,
-                "timePeriod": "2024 Annual",
-                "tags": ["luxury", "electric", "hybrid"],
-                "category": "Manufacturing",
-                "countryId": created_countries[3].id  # Germany
-            },
-            {
-                "name": "Machinery",
-                "unit": "units",
-                "quantity": 850000,
-                "taxRate": 6.5,
-                "timePeriod": "2024 Annual",
-                "tags": ["industrial", "precision", "high-tech"],
-                "category": "Manufacturing",
-                "countryId": created_countries[3].id  # Germany
-            },
-            {
-                "name": "Ready-Made Garments",
-                "unit": "pieces",
-                "quantity": 750000000,
-                "taxRate": 4.2,
-                "timePeriod": "2024 Annual",
-                "tags": ["cotton", "sustainable", "fair-trade"],
-                "category": "Textiles",
-                "countryId": created_countries[4].id  # Bangladesh
-            }
-        ]
-        
-        created_products = []
-        for product_data in products_data:
-            product = await prisma.product.upsert(
-                where={"id": f"temp-{product_data['name'].lower().replace(' ', '-')}"},
-                data={
-                    "create": product_data,
-                    "update": product_data
-                }
-            )
-            created_products.append(product)
-            print(f"Created/Updated product: {product.name}")
-        
-        # Create exporters
-        exporters_data = [
-            {
-                "name": "American Grain Exports LLC",
-                "licenseId": "AGE-USA-2024-001",
-                "contact": "+1-555-0123, grain@age-usa.com",
-                "website": "https://age-usa.com",
-                "countryId": created_countries[0].id  # USA
-            },
-            {
-                "name": "Midwest Agricultural Corp",
-                "licenseId": "MAC-USA-2024-002", 
-                "contact": "+1-555-0456, info@midwest-ag.com",
-                "website": "https://midwest-ag.com",
-                "countryId": created_countries[0].id  # USA
-            },
-            {
-                "name": "Santos Coffee Exporters",
-                "licenseId": "SCE-BRA-2024-001",
-                "contact": "+55-11-9876-5432, santos@coffee-br.com",
-                "website": "https://santos-coffee.com.br",
-                "countryId": created_countries[1].id  # Brazil
-            },
-            {
-                "name": "Brazilian Sugar Trading",
-                "licenseId": "BST-BRA-2024-002",
-                "contact": "+55-21-8765-4321, trade@sugar-br.com", 
-                "website": "https://brazilian-sugar.com",
-                "countryId": created_countries[1].id  # Brazil
-            },
-            {
-                "name": "Punjab Rice Mills",
-                "licenseId": "PRM-IND-2024-001",
-                "contact": "+91-98765-43210, export@punjab-rice.in",
-                "website": "https://punjab-rice.in",
-                "countryId": created_countries[2].id  # India
-            },
-            {
-                "name": "Mumbai Textile Exports",
-                "licenseId": "MTE-IND-2024-002",
-                "contact": "+91-22-1234-5678, mumbai@textiles.in",
-                "website": "https://mumbai-textiles.in", 
-                "countryId": created_countries[2].id  # India
-            },
-            {
-                "name": "BMW Export Division",
-                "licenseId": "BMW-GER-2024-001",
-                "contact": "+49-89-1234-5678, export@bmw.de",
-                "website": "https://bmw.de/export",
-                "countryId": created_countries[3].id  # Germany
-            },
-            {
-                "name": "Dhaka Garments International",
-                "licenseId": "DGI-BGD-2024-001",
-                "contact": "+880-2-9876543, dhaka@garments.bd",
-                "website": "https://dhaka-garments.com",
-                "countryId": created_countries[4].id  # Bangladesh
-            }
-        ]
-        
-        for exporter_data in exporters_data:
-            exporter = await prisma.exporter.upsert(
-                where={"licenseId": exporter_data["licenseId"]},
-                data={
-                    "create": exporter_data,
-                    "update": exporter_data
-                }
+        started = time.perf_counter()
+        await seed_fixtures(prisma, workers, concurrency)
+
+        if scale_factor > 0:
+            scale = Scale.from_factor(scale_factor, seed=seed)
+            print(
+                f"\nSeeding synthetic dataset: {scale.countries} countries, {scale.products} products, "
+                f"{scale.exporters} exporters, {scale.audit_logs} audit logs ({method})"
             )
-            print(f"Created/Updated exporter: {exporter.name}")
-        
-        print("\n✅ Database seeded successfully!")
+            # Benchmark users share one password, so it is hashed exactly once.
+            bench_hash = hash_password(synthetic_data.BENCH_PASSWORD)
+            await prisma.country.create_many(data=list(synthetic_data.countries(scale)), skip_duplicates=True)
+            await prisma.user.create_many(data=list(synthetic_data.users(scale, bench_hash)), skip_duplicates=True)
+            if method == "copy":
+                await seed_synthetic_copy(scale, workers, chunk_size)
+            else:
+                await seed_synthetic_create_many(prisma, scale, batch_size, concurrency)
+
+        print(f"\n✅ Database seeded successfully in {time.perf_counter() - started:.1f}s!")
         print("\n🔑 Test Login Credentials:")
         print("Super Admin: admin@gevp.org / admin123")
-        print("USA Admin: usa@trade.gov / usa123") 
+        print("USA Admin: usa@trade.gov / usa123")
         print("Brazil Admin: brazil@trade.gov / brazil123")
         print("India Editor: india@trade.gov / india123")
         print("Germany Editor: germany@trade.gov / germany123")
-        
+        if scale_factor > 0:
+            print(f"Benchmark users: {synthetic_data.SUPER_ADMIN_EMAIL}, admin-<code>@bench.gevp.org "
+                  f"/ {synthetic_data.BENCH_PASSWORD}")
+
     except Exception as e:
         print(f"❌ Error seeding database: {e}")
     finally:
         await prisma.disconnect()
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the GEVP database")
+    parser.add_argument("--scale", type=float, default=0,
+                        help="synthetic data scale factor (1 = 10k products); 0 seeds demo data only")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed for synthetic data")
+    parser.add_argument("--method", choices=("create_many", "copy"), default="create_many")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes for password hashing and COPY")
+    parser.add_argument("--concurrency", type=int, default=8, help="in-flight Prisma batches")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per create_many call")
+    parser.add_argument("--chunk-size", type=int, default=250_000, help="rows per COPY worker task")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    asyncio.run(seed_database())
\ No newline at end of file
+    args = parse_args()
+    asyncio.run(seed_database(
+        scale_factor=args.scale,
+        seed=args.seed,
+        method=args.method,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+    ))
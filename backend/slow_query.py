@@ -0,0 +1,201 @@
+"""Slow-query log with optional ``EXPLAIN`` capture.
+
+Registered as a ``db`` query observer. Any Prisma call slower than
+``SLOW_QUERY_MS`` (default 200) is logged with its model, action, duration and
+sanitized arguments (secrets redacted, long values truncated).
+
+With ``SLOW_QUERY_EXPLAIN=true``, slow reads whose ``where``/``order``/``take``
+arguments can be translated to SQL are re-run once as
+``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` in a background task and the plan
+is logged. Plans are captured at most once per query shape (model, action,
+filter fields and operators) every ``SLOW_QUERY_EXPLAIN_INTERVAL`` seconds, so a
+hot slow query does not double its own load.
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app_logging import get_logger
+from db import TABLES, QueryEvent, column
+from metrics import SLOW_QUERIES
+
+logger = get_logger("slow_query")
+
+SENSITIVE_KEYS = ("password", "token", "secret")
+EXPLAINABLE_ACTIONS = ("find_many", "find_first", "find_unique", "count")
+
+_MAX_STRING = 64
+_MAX_ITEMS = 5
+
+
+def sanitize(value: Any, key: str = "") -> Any:
+    """Copy of query arguments that is safe and compact enough to log."""
+    if any(word in key.lower() for word in SENSITIVE_KEYS):
+        return "***"
+    if isinstance(value, dict):
+        return {k: sanitize(v, str(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [sanitize(v, key) for v in value[:_MAX_ITEMS]]
+        if len(value) > _MAX_ITEMS:
+            items.append(f"... {len(value) - _MAX_ITEMS} more")
+        return items
+    if isinstance(value, str) and len(value) > _MAX_STRING:
+        return value[:_MAX_STRING] + "..."
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return repr(value)[:_MAX_STRING]
+
+
+def query_shape(value: Any) -> Any:
+    """Arguments with every literal replaced by ``?``; equal shapes share a plan."""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return ["?"]
+    return "?"
+
+
+class _Untranslatable(Exception):
+    pass
+
+
+def build_select(model: str, action: str, arguments: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Translate Prisma ``where``/``order``/``take``/``skip`` into SQL.
+
+    Only the subset of filters the API actually uses is supported; anything else
+    raises ``_Untranslatable``. Relation ``include``s are not part of the plan.
+    """
+    params: List[Any] = []
+
+    def param(value) -> str:
+        params.append(value)
+        return f"${len(params)}"
+
+    def condition(field: str, spec: Any) -> str:
+        if field in ("AND", "OR"):
+            parts = [clause(sub) for sub in spec]
+            return "(" + f" {field} ".join(parts) + ")" if parts else "TRUE"
+        col = column(model, field)
+        if not isinstance(spec, dict):
+            return f"{col} IS NULL" if spec is None else f"{col} = {param(spec)}"
+        insensitive = spec.get("mode") == "insensitive"
+        like = "ILIKE" if insensitive else "LIKE"
+        parts = []
+        for op, value in spec.items():
+            if op == "mode":
+                continue
+            if op == "equals":
+                parts.append(f"{col} = {param(value)}")
+            elif op == "contains":
+                parts.append(f"{col} {like} {param('%' + value + '%')}")
+            elif op in ("startswith", "startsWith"):
+                parts.append(f"{col} {like} {param(value + '%')}")
+            elif op in ("endswith", "endsWith"):
+                parts.append(f"{col} {like} {param('%' + value)}")
+            elif op == "in":
+                parts.append(f"{col} = ANY({param(list(value))})")
+            elif op in ("gt", "gte", "lt", "lte"):
+                symbol = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}[op]
+                parts.append(f"{col} {symbol} {param(value)}")
+            elif op == "has":
+                parts.append(f"{param(value)} = ANY({col})")
+            else:
+                raise _Untranslatable(op)
+        return " AND ".join(parts) or "TRUE"
+
+    def clause(where: Dict[str, Any]) -> str:
+        return " AND ".join(condition(f, s) for f, s in where.items()) or "TRUE"
+
+    table = TABLES[model]
+    sql = f'SELECT {"count(*)" if action == "count" else "*"} FROM "{table}"'
+    where = arguments.get("where") or {}
+    if where:
+        sql += " WHERE " + clause(where)
+
+    order = arguments.get("order")
+    if order:
+        orders = order if isinstance(order, list) else [order]
+        terms = []
+        for entry in orders:
+            for field, direction in entry.items():
+                if str(direction).lower() not in ("asc", "desc"):
+                    raise _Untranslatable(direction)
+                terms.append(f"{column(model, field)} {str(direction).upper()}")
+        sql += " ORDER BY " + ", ".join(terms)
+
+    take = arguments.get("take")
+    if action in ("find_first", "find_unique"):
+        take = 1
+    if take is not None:
+        sql += f" LIMIT {int(take)}"
+    if arguments.get("skip"):
+        sql += f" OFFSET {int(arguments['skip'])}"
+    return sql, params
+
+
+class SlowQueryLog:
+    """``db`` query observer that logs slow queries and optionally explains them."""
+
+    def __init__(self, client, threshold_ms: Optional[float] = None, explain: Optional[bool] = None):
+        # ``client`` is the instrumented proxy; EXPLAIN runs on the raw client so
+        # it is not itself reported back to the observers.
+        self.client = client
+        self.threshold = (threshold_ms if threshold_ms is not None else float(os.getenv("SLOW_QUERY_MS", "200"))) / 1000
+        self.explain = explain if explain is not None else os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+        self.explain_interval = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+        self._explained: Dict[str, float] = {}
+        self._tasks = set()
+
+    def __call__(self, event: QueryEvent) -> None:
+        if event.duration < self.threshold or event.model == "raw":
+            return
+        SLOW_QUERIES.labels(event.model, event.action).inc()
+        logger.warning(
+            "Slow query: %s.%s took %.1f ms",
+            event.model,
+            event.action,
+            event.duration * 1000,
+            extra={
+                "db_model": event.model,
+                "db_action": event.action,
+                "duration_ms": round(event.duration * 1000, 2),
+                "params": sanitize(event.arguments),
+            },
+        )
+        if self.explain and event.error is None and event.action in EXPLAINABLE_ACTIONS:
+            self._schedule_explain(event)
+
+    def _schedule_explain(self, event: QueryEvent) -> None:
+        shape = json.dumps([event.model, event.action, query_shape(event.arguments)])
+        now = time.monotonic()
+        if now - self._explained.get(shape, float("-inf")) < self.explain_interval:
+            return
+        try:
+            sql, params = build_select(event.model, event.action, event.arguments)
+        except (_Untranslatable, KeyError, TypeError, ValueError):
+            return
+        self._explained[shape] = now
+        try:
+            task = asyncio.get_running_loop().create_task(self._explain(event, sql, params))
+        except RuntimeError:
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, event: QueryEvent, sql: str, params: List[Any]) -> None:
+        raw = getattr(self.client, "client", self.client)
+        try:
+            rows = await raw.query_raw(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", *params)
+        except Exception as e:
+            logger.warning("EXPLAIN failed for %s.%s: %s", event.model, event.action, e)
+            return
+        plan = rows[0].get("QUERY PLAN") if rows else None
+        logger.warning(
+            "Slow query plan: %s.%s",
+            event.model,
+            event.action,
+            extra={"db_model": event.model, "db_action": event.action, "sql": sql, "plan": plan},
+        )
@@ -0,0 +1,54 @@
+"""Stack sampling helpers shared by the loop monitor and the profiler.
+
+Stacks are tuples of ``module:function`` frames ordered root to leaf, the
+form used by collapsed-stack flamegraph tools (``flamegraph.pl``,
+speedscope, inferno).
+"""
+
+import os
+import sys
+from collections import Counter
+from types import FrameType
+from typing import Iterable, Optional, Tuple, Union
+
+Stack = Tuple[str, ...]
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+def frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{frame.f_globals.get('__name__', '?')}:{name}"
+
+
+def walk(frame: Optional[FrameType]) -> Stack:
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def sample_thread(thread_id: int) -> Optional[Stack]:
+    """Current stack of ``thread_id``, or ``None`` if the thread is gone."""
+    frame = sys._current_frames().get(thread_id)
+    return walk(frame) if frame is not None else None
+
+
+def app_site(frame: Optional[FrameType]) -> str:
+    """Innermost frame of the stack that belongs to this application."""
+    innermost = None
+    while frame is not None:
+        if innermost is None:
+            innermost = frame
+        if frame.f_code.co_filename.startswith(APP_DIR):
+            return frame_label(frame)
+        frame = frame.f_back
+    return frame_label(innermost) if innermost is not None else "<unknown>"
+
+
+def collapse(samples: Union[Counter, Iterable[Stack]]) -> str:
+    """Collapsed-stack text: one ``frame;frame;frame count`` line per distinct stack."""
+    counts = samples if isinstance(samples, Counter) else Counter(samples)
+    return "\n".join(f"{';'.join(stack)} {count}" for stack, count in counts.most_common())
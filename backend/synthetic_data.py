@@ -0,0 +1,220 @@
+"""Deterministic synthetic dataset for benchmarks and load tests.
+
+Generates countries, users, products, exporters, exporter-product links and
+audit log rows that scale to millions of records. Everything is derived from a
+seeded RNG and row index, so the same arguments always produce the same rows
+and IDs; a load test can therefore address products and users without reading
+them back from the database.
+
+The rows are loaded by ``seed_data.py --scale N`` (see ``Scale.from_factor``).
+
+Benchmark users share the password ``BENCH_PASSWORD``: ``bench-admin@gevp.org``
+is a SUPER_ADMIN and ``admin-<code>@bench.gevp.org`` is the COUNTRY_ADMIN of
+each generated country (see ``country_admin_email``).
+"""
+
+import random
+import string
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from units import quantity_fields
+
+BENCH_PASSWORD = "bench123"
+SUPER_ADMIN_EMAIL = "bench-admin@gevp.org"
+
+REGIONS = ["Africa", "Asia", "Europe", "North America", "South America", "Oceania", "Middle East"]
+CATEGORIES = ["Agriculture", "Food & Beverages", "Textiles", "Manufacturing", "Minerals", "Chemicals", "Electronics"]
+UNITS = ["tons", "kg", "units", "pieces", "liters", "barrels"]
+COMMODITIES = [
+    "Rice", "Wheat", "Corn", "Soybeans", "Coffee", "Tea", "Cocoa", "Sugar", "Cotton", "Wool",
+    "Copper", "Iron Ore", "Aluminium", "Steel", "Lumber", "Rubber", "Palm Oil", "Fertilizer",
+    "Garments", "Footwear", "Machinery", "Automobiles", "Smartphones", "Semiconductors", "Pharmaceuticals",
+]
+QUALIFIERS = ["Premium", "Organic", "Refined", "Raw", "Processed", "Export-Grade", "Industrial", "Bulk"]
+TAGS = [
+    "organic", "fair-trade", "premium", "bulk", "certified", "sustainable", "non-gmo", "industrial",
+    "high-tech", "handmade", "export-quality", "recycled", "frozen", "dried", "luxury", "budget",
+]
+PERIODS = ["2022 Annual", "2023 Annual", "2024 Annual", "2024 Q1", "2024 Q2", "2024 Q3", "2024 Q4"]
+MAX_COUNTRIES = 3 * 26 * 26
+
+
+@dataclass
+class Scale:
+    countries: int = 20
+    products: int = 10_000
+    exporters: int = 1_000
+    links_per_exporter: int = 3
+    audit_logs: int = 10_000
+    seed: int = 42
+
+    def __post_init__(self):
+        if not 1 <= self.countries <= MAX_COUNTRIES:
+            raise ValueError(f"countries must be between 1 and {MAX_COUNTRIES}")
+
+    @classmethod
+    def from_factor(cls, factor: float, seed: int = 42) -> "Scale":
+        """Dataset for a scale factor: 10k products and 1k exporters per unit.
+
+        ``from_factor(1000)`` is the 10M-product benchmark database.
+        """
+        return cls(
+            countries=min(MAX_COUNTRIES, max(5, round(20 * factor ** 0.5))),
+            products=int(10_000 * factor),
+            exporters=int(1_000 * factor),
+            audit_logs=int(10_000 * factor),
+            seed=seed,
+        )
+
+
+def country_code(index: int) -> str:
+    # X/Y/Z-prefixed codes never collide with the real ISO codes in seed_data.py.
+    letters = string.ascii_uppercase
+    return "XYZ"[index // 676] + letters[(index // 26) % 26] + letters[index % 26]
+
+
+def country_id(index: int) -> str:
+    return f"bench-country-{index:04d}"
+
+
+def product_id(index: int) -> str:
+    return f"bench-product-{index:09d}"
+
+
+def exporter_id(index: int) -> str:
+    return f"bench-exporter-{index:08d}"
+
+
+def country_admin_email(index: int) -> str:
+    return f"admin-{country_code(index).lower()}@bench.gevp.org"
+
+
+def products_of_country(scale: Scale, country: int) -> range:
+    """Product indices belonging to ``country`` (products are dealt round-robin)."""
+    return range(country, scale.products, scale.countries)
+
+
+def _rng(scale: Scale, stream: str, index: int) -> random.Random:
+    return random.Random(f"{scale.seed}:{stream}:{index}")
+
+
+def countries(scale: Scale) -> Iterator[Dict]:
+    for i in range(scale.countries):
+        code = country_code(i)
+        yield {
+            "id": country_id(i),
+            "name": f"Benchland {code}",
+            "code": code,
+            "region": REGIONS[i % len(REGIONS)],
+            "flagUrl": None,
+            "contactInfo": f"trade@{code.lower()}.bench.gevp.org",
+        }
+
+
+def users(scale: Scale, password_hash: str) -> Iterator[Dict]:
+    yield {
+        "id": "bench-user-admin",
+        "email": SUPER_ADMIN_EMAIL,
+        "password": password_hash,
+        "role": "SUPER_ADMIN",
+        "countryId": None,
+        "isActive": True,
+    }
+    for i in range(scale.countries):
+        yield {
+            "id": f"bench-user-{i:04d}",
+            "email": country_admin_email(i),
+            "password": password_hash,
+            "role": "COUNTRY_ADMIN",
+            "countryId": country_id(i),
+            "isActive": True,
+        }
+
+
+def product(scale: Scale, index: int) -> Dict:
+    rng = _rng(scale, "product", index)
+    commodity = rng.choice(COMMODITIES)
+    # Draw order matters: it keeps datasets identical for a given seed.
+    name = f"{rng.choice(QUALIFIERS)} {commodity} {index}"
+    unit = rng.choice(UNITS)
+    quantity = round(rng.lognormvariate(10, 2), 2)
+    return {
+        "id": product_id(index),
+        "name": name,
+        "unit": unit,
+        "quantity": quantity,
+        **quantity_fields(quantity, unit),
+        "taxRate": round(rng.uniform(0, 15), 1),
+        "timePeriod": rng.choice(PERIODS),
+        "tags": rng.sample(TAGS, rng.randint(1, 4)),
+        "category": rng.choice(CATEGORIES),
+        "countryId": country_id(index % scale.countries),
+    }
+
+
+def products(scale: Scale, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+    for i in range(start, scale.products if stop is None else stop):
+        yield product(scale, i)
+
+
+def exporter(scale: Scale, index: int) -> Dict:
+    rng = _rng(scale, "exporter", index)
+    country = index % scale.countries
+    code = country_code(country)
+    return {
+        "id": exporter_id(index),
+        "name": f"{rng.choice(QUALIFIERS)} {rng.choice(COMMODITIES)} Exporters {index}",
+        "licenseId": f"BEN-{code}-{index:08d}",
+        "contact": f"+{rng.randint(1, 999)}-{rng.randint(100000, 999999)}",
+        "website": f"https://exporter-{index}.bench.gevp.org",
+        "countryId": country_id(country),
+    }
+
+
+def exporters(scale: Scale, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+    for i in range(start, scale.exporters if stop is None else stop):
+        yield exporter(scale, i)
+
+
+def exporter_products(scale: Scale, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+    """Links between each exporter in ``[start, stop)`` and products of its own country."""
+    for i in range(start, scale.exporters if stop is None else stop):
+        country_products = products_of_country(scale, i % scale.countries)
+        if not country_products:
+            continue
+        rng = _rng(scale, "link", i)
+        count = min(scale.links_per_exporter, len(country_products))
+        for n, product_index in enumerate(rng.sample(country_products, count)):
+            yield {
+                "id": f"bench-link-{i:08d}-{n}",
+                "exporterId": exporter_id(i),
+                "productId": product_id(product_index),
+            }
+
+
+def audit_logs(scale: Scale, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+    actions = ["CREATE_PRODUCT", "UPDATE_PRODUCT", "DELETE_PRODUCT", "CREATE_EXPORTER"]
+    epoch = datetime(2024, 1, 1)
+    for i in range(start, scale.audit_logs if stop is None else stop):
+        rng = _rng(scale, "audit", i)
+        country = rng.randrange(scale.countries)
+        yield {
+            "id": f"bench-audit-{i:09d}",
+            "userId": f"bench-user-{country:04d}",
+            "action": rng.choice(actions),
+            "description": f"Synthetic audit entry {i}",
+            "timestamp": epoch + timedelta(seconds=rng.randrange(365 * 86400)),
+        }
+
+
+def batched(rows: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
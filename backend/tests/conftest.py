@@ -0,0 +1,53 @@
+"""Fixtures for the unit and API tests.
+
+API tests drive ``main.app`` through ``TestClient`` against a fresh in-memory
+client from ``fake_prisma`` per test, without running the lifespan (no relay,
+warm-up or background tasks). Run from ``backend/``::
+
+    pytest tests
+"""
+
+import os
+
+os.environ.setdefault("DB_BACKEND", "memory")
+os.environ.setdefault("CHANGES_SETTLE_MS", "0")
+
+# Admission control is covered by its own tests.
+for _route_class in ("AUTH", "SEARCH", "WRITE", "DEFAULT"):
+    for _scope in ("IP", "USER"):
+        os.environ.setdefault(f"RATE_LIMIT_{_route_class}_{_scope}", "off")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from fake_prisma import InMemoryPrisma
+
+COUNTRIES = {"ala": "Aland", "bor": "Borduria"}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Empty database with two countries and one country admin for each."""
+    db = InMemoryPrisma(latency_ms=0, jitter_ms=0)
+    db.load("country", [
+        {"id": f"country-{key}", "name": name, "code": key.upper(), "region": "Test"}
+        for key, name in COUNTRIES.items()
+    ])
+    db.load("user", [
+        {"id": f"admin-{key}", "email": f"admin@{key}.test", "password": "x", "role": "COUNTRY_ADMIN",
+         "countryId": f"country-{key}", "isActive": True}
+        for key in COUNTRIES
+    ])
+    monkeypatch.setattr(main, "prisma", db)
+    return db
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(main.app)
+
+
+def auth(key: str):
+    """Bearer header for the admin of country ``key``."""
+    return {"Authorization": f"Bearer {main.create_access_token({'sub': f'admin@{key}.test'})}"}
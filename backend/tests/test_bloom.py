@@ -0,0 +1,50 @@
+import math
+
+import pytest
+
+from bloom import BloomFilter, NegativeCache
+
+
+@pytest.mark.parametrize("capacity", [1, 100, 10_000])
+def test_added_keys_are_always_present(capacity):
+    bloom = BloomFilter(capacity)
+    keys = [f"LIC-{i:06d}" for i in range(capacity * 2)]  # overfilled on purpose
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+
+@pytest.mark.parametrize("capacity, error_rate", [(1000, 0.01), (100_000, 0.001)])
+def test_sizing_follows_the_optimal_formulas(capacity, error_rate):
+    bloom = BloomFilter(capacity, error_rate)
+    bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+    assert bloom.size == int(bits)
+    assert bloom.hashes == round(bits / capacity * math.log(2))
+    assert len(bloom._bits) == (bloom.size + 7) // 8
+
+
+def test_false_positive_rate_near_target():
+    bloom = BloomFilter(10_000, 0.01)
+    for i in range(10_000):
+        bloom.add(f"present-{i}")
+    false_positives = sum(f"absent-{i}" in bloom for i in range(20_000))
+    assert false_positives / 20_000 < 0.02
+
+
+def test_degenerate_sizes_stay_usable():
+    bloom = BloomFilter(0)
+    assert bloom.size >= 8 and bloom.hashes >= 1
+    bloom.add("x")
+    assert "x" in bloom
+
+
+def test_negative_cache_answers_only_once_loaded():
+    cache = NegativeCache(100)
+    assert not cache.definitely_absent("LIC-1")
+    cache.add_many(["LIC-1", "LIC-2"])
+    cache.loaded = True
+    assert not cache.definitely_absent("LIC-1")
+    assert not cache.definitely_absent("LIC-2")
+    cache.add("LIC-3")
+    assert not cache.definitely_absent("LIC-3")
+    assert sum(cache.definitely_absent(f"NEW-{i}") for i in range(1000)) > 950
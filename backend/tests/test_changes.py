@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import changes
+from changes import CursorExpired, decode_cursor, encode_cursor, product_changes
+from fake_prisma import InMemoryPrisma
+from pagination import InvalidCursor
+
+
+@pytest.fixture(autouse=True)
+def no_settle_window(monkeypatch):
+    monkeypatch.setattr(changes, "CHANGES_SETTLE_MS", 0)
+
+
+async def make_db():
+    db = InMemoryPrisma()
+    country = await db.country.create(data={"name": "Aland", "code": "ALA", "region": "Test"})
+    return db, country
+
+
+async def add_product(db, country, name):
+    return await db.product.create(data={
+        "name": name, "unit": "kg", "quantity": 1.0, "taxRate": 0.0, "timePeriod": "2024",
+        "tags": [], "category": "Food", "countryId": country.id,
+    })
+
+
+async def sync(db, since=None, limit=1000):
+    """Page until has_more is false; returns (changes, cursor)."""
+    collected = []
+    while True:
+        page = await product_changes(db, since, limit)
+        collected += page["changes"]
+        since = page["cursor"]
+        if not page["has_more"]:
+            return collected, since
+
+
+def test_cursor_round_trip():
+    position = (datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc), "abc")
+    assert decode_cursor(encode_cursor(position)) == position
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor((datetime(2024, 5, 1), "naive")))
+
+
+def test_paged_sync_then_incremental_poll():
+    async def test():
+        db, country = await make_db()
+        products = [await add_product(db, country, f"p{i}") for i in range(5)]
+        full, cursor = await sync(db, limit=2)
+        assert [c["id"] for c in full] == [p.id for p in products]
+        assert all(c["op"] == "upsert" for c in full)
+
+        await asyncio.sleep(0.01)
+        updated = await db.product.update(where={"id": products[1].id}, data={"name": "renamed"})
+        delta, cursor = await sync(db, cursor)
+        assert [(c["op"], c["id"], c["data"]["name"]) for c in delta] == [("upsert", updated.id, "renamed")]
+
+    asyncio.run(test())
+
+
+def test_deletions_come_from_tombstones():
+    async def test():
+        db, country = await make_db()
+        product = await add_product(db, country, "doomed")
+        _, cursor = await sync(db)
+        await asyncio.sleep(0.01)
+        await db.product.delete(where={"id": product.id})
+        await db.producttombstone.create(data={"id": product.id, "countryId": country.id})
+        delta, _ = await sync(db, cursor)
+        assert [(c["op"], c["id"], c["countryId"]) for c in delta] == [("delete", product.id, country.id)]
+
+    asyncio.run(test())
+
+
+def test_idle_cursor_moves_to_the_high_water_mark():
+    async def test():
+        db, country = await make_db()
+        first = await product_changes(db, None, 10)
+        assert first["changes"] == [] and first["cursor"] is not None
+
+        old = encode_cursor((datetime.now(timezone.utc) - timedelta(days=29), ""))
+        page = await product_changes(db, old, 10)
+        assert page["changes"] == []
+        assert decode_cursor(page["cursor"])[0] > datetime.now(timezone.utc) - timedelta(minutes=1)
+
+        # A fresh cursor still sees what is written afterwards.
+        await asyncio.sleep(0.01)
+        product = await add_product(db, country, "late")
+        delta, _ = await sync(db, page["cursor"])
+        assert [c["id"] for c in delta] == [product.id]
+
+    asyncio.run(test())
+
+
+def test_expired_cursor():
+    async def test():
+        db, _ = await make_db()
+        stale = encode_cursor((datetime.now(timezone.utc) - timedelta(days=changes.TOMBSTONE_RETENTION_DAYS + 1), ""))
+        with pytest.raises(CursorExpired):
+            await product_changes(db, stale, 10)
+
+    asyncio.run(test())
+
+
+def test_changes_endpoint_status_codes(client):
+    assert client.get("/products/changes").status_code == 200
+    assert client.get("/products/changes", params={"since": "garbage"}).status_code == 400
+    stale = encode_cursor((datetime.now(timezone.utc) - timedelta(days=changes.TOMBSTONE_RETENTION_DAYS + 1), ""))
+    response = client.get("/products/changes", params={"since": stale})
+    assert response.status_code == 410
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from prisma import errors
+
+from fake_prisma import InMemoryPrisma
+
+
+def product(country_id, name, **extra):
+    return {
+        "name": name,
+        "unit": "kg",
+        "quantity": 1.0,
+        "taxRate": 5.0,
+        "timePeriod": "2024",
+        "tags": [],
+        "category": "Food",
+        "countryId": country_id,
+        **extra,
+    }
+
+
+async def seeded():
+    db = InMemoryPrisma()
+    countries = [
+        await db.country.create(data={"name": name, "code": code, "region": "Test"})
+        for name, code in (("Aland", "ALA"), ("Borduria", "BOR"))
+    ]
+    products = [
+        await db.product.create(data=product(countries[i % 2].id, f"p{i}", quantity=float(i)))
+        for i in range(6)
+    ]
+    return db, countries, products
+
+
+def run(test):
+    return asyncio.run(test())
+
+
+def test_in_filter_matches_each_row_once():
+    async def test():
+        db, countries, products = await seeded()
+        a = products[0].id
+        assert [p.id for p in await db.product.find_many(where={"id": {"in": [a, a]}})] == [a]
+        # countryId is indexed, which takes a different lookup path.
+        by_country = await db.product.find_many(where={"countryId": {"in": [countries[0].id] * 2}})
+        assert len(by_country) == 3
+        assert await db.product.count(where={"countryId": {"in": [countries[0].id] * 2}}) == 3
+
+    run(test)
+
+
+def test_filters_order_and_paging():
+    async def test():
+        db, countries, _ = await seeded()
+        rows = await db.product.find_many(
+            where={"quantity": {"gte": 1}, "name": {"contains": "P", "mode": "insensitive"}},
+            order={"quantity": "desc"},
+            take=2,
+            skip=1,
+        )
+        assert [r.name for r in rows] == ["p4", "p3"]
+        assert await db.product.find_first(where={"name": "missing"}) is None
+        assert await db.product.count(where={"countryId": countries[1].id, "quantity": {"lt": 3}}) == 1
+
+    run(test)
+
+
+def test_unique_and_foreign_key_violations():
+    async def test():
+        db, countries, products = await seeded()
+        with pytest.raises(errors.UniqueViolationError):
+            await db.country.create(data={"name": "Aland", "code": "ALX", "region": "Test"})
+        with pytest.raises(errors.ForeignKeyViolationError):
+            await db.product.create(data=product("no-such-country", "orphan"))
+        exporter = await db.exporter.create(data={"name": "E", "licenseId": "L-1", "countryId": countries[0].id})
+        await db.exporterproduct.create(data={"exporterId": exporter.id, "productId": products[0].id})
+        with pytest.raises(errors.ForeignKeyViolationError):
+            await db.product.delete(where={"id": products[0].id})
+
+    run(test)
+
+
+def test_create_many_skip_duplicates():
+    async def test():
+        db, countries, products = await seeded()
+        exporter = await db.exporter.create(data={"name": "E", "licenseId": "L-1", "countryId": countries[0].id})
+        links = [{"exporterId": exporter.id, "productId": p.id} for p in products[:3]]
+        assert await db.exporterproduct.create_many(data=links) == 3
+        assert await db.exporterproduct.create_many(data=links + [{"exporterId": exporter.id, "productId": products[3].id}],
+                                                    skip_duplicates=True) == 1
+        with pytest.raises(errors.UniqueViolationError):
+            await db.exporterproduct.create_many(data=links[:1])
+
+    run(test)
+
+
+def test_update_many_increment_and_group_by():
+    async def test():
+        db, countries, _ = await seeded()
+        assert await db.product.update_many(
+            where={"countryId": countries[0].id}, data={"version": {"increment": 1}}
+        ) == 3
+        assert {p.version for p in await db.product.find_many(where={"countryId": countries[0].id})} == {2}
+        groups = await db.product.group_by(
+            by=["countryId"], count=True, sum={"quantity": True}, max={"quantity": True}, order={"countryId": "asc"}
+        )
+        totals = {g["countryId"]: (g["_count"]["_all"], g["_sum"]["quantity"], g["_max"]["quantity"]) for g in groups}
+        assert totals == {countries[0].id: (3, 6.0, 4.0), countries[1].id: (3, 9.0, 5.0)}
+
+    run(test)
+
+
+def test_transaction_rolls_back_on_error():
+    async def test():
+        db, countries, products = await seeded()
+        with pytest.raises(RuntimeError):
+            async with db.tx() as tx:
+                await tx.product.delete(where={"id": products[0].id})
+                await tx.product.update(where={"id": products[1].id}, data={"name": "renamed"})
+                await tx.product.create(data=product(countries[0].id, "new"))
+                raise RuntimeError("abort")
+        assert await db.product.count() == 6
+        assert (await db.product.find_unique(where={"id": products[1].id})).name == "p1"
+        assert await db.product.find_first(where={"id": products[0].id}) is not None
+
+    run(test)
@@ -0,0 +1,114 @@
+import asyncio
+
+from events import ChangeEvent
+from fake_prisma import InMemoryPrisma
+from outbox import OutboxRelay, enqueue
+
+
+def event(n: int) -> ChangeEvent:
+    return ChangeEvent(entity="product", action="updated", id=f"p{n}", country_id="c1", data={"n": n})
+
+
+class Consumer:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+
+    async def __call__(self, events):
+        self.batches.append([e.id for e in events])
+        if self.fail:
+            raise RuntimeError("consumer down")
+
+
+def relay(db, consumer, **kwargs) -> OutboxRelay:
+    relay = OutboxRelay(db, **{"batch_size": 10, "poll_interval": 0.01, "lease": 60, "max_attempts": 3, **kwargs})
+    relay.add_consumer("test", consumer)
+    return relay
+
+
+def test_delivers_in_order_and_deletes():
+    async def test():
+        db = InMemoryPrisma()
+        await enqueue(db, [event(i) for i in range(3)])
+        consumer = Consumer()
+        assert await relay(db, consumer).relay_once() == 3
+        assert consumer.batches == [["p0", "p1", "p2"]]
+        assert await db.outboxevent.count() == 0
+        assert await relay(db, consumer).relay_once() == 0
+
+    asyncio.run(test())
+
+
+def test_batches_are_bounded_and_drain_delivers_the_rest():
+    async def test():
+        db = InMemoryPrisma()
+        await enqueue(db, [event(i) for i in range(25)])
+        consumer = Consumer()
+        await relay(db, consumer).stop()
+        assert [len(batch) for batch in consumer.batches] == [10, 10, 5]
+        assert await db.outboxevent.count() == 0
+
+    asyncio.run(test())
+
+
+def test_failed_rows_stay_leased_until_the_lease_expires():
+    async def test():
+        db = InMemoryPrisma()
+        await enqueue(db, [event(1)])
+        broken, healthy = Consumer(fail=True), Consumer()
+        assert await relay(db, broken, lease=0.05).relay_once() == 1
+        # Still leased to the failed attempt: another relay must not take it.
+        other = relay(db, healthy, lease=0.05)
+        assert await other.relay_once() == 0
+        await asyncio.sleep(0.06)
+        assert await other.relay_once() == 1
+        assert healthy.batches == [["p1"]]
+        assert await db.outboxevent.count() == 0
+
+    asyncio.run(test())
+
+
+def test_concurrent_claims_do_not_share_rows():
+    async def test():
+        db = InMemoryPrisma()
+        await enqueue(db, [event(i) for i in range(10)])
+        first, second = Consumer(), Consumer()
+        await asyncio.gather(relay(db, first).relay_once(), relay(db, second).relay_once())
+        delivered = [i for batch in first.batches + second.batches for i in batch]
+        assert sorted(delivered) == sorted(f"p{i}" for i in range(10))
+
+    asyncio.run(test())
+
+
+def test_rows_are_dead_lettered_after_max_attempts():
+    async def test():
+        db = InMemoryPrisma()
+        await enqueue(db, [event(1)])
+        broken = Consumer(fail=True)
+        failing = relay(db, broken, lease=0.01, max_attempts=2)
+        for _ in range(2):
+            assert await failing.relay_once() == 1
+            await asyncio.sleep(0.02)
+        assert len(broken.batches) == 2
+        row = await db.outboxevent.find_first()
+        assert row.attempts == 2
+
+        # The third claim exceeds max_attempts: dropped without delivery.
+        assert await failing.relay_once() == 1
+        assert len(broken.batches) == 2
+        assert await db.outboxevent.count() == 0
+
+    asyncio.run(test())
+
+
+def test_malformed_payloads_are_dropped_and_the_rest_delivered():
+    async def test():
+        db = InMemoryPrisma()
+        await db.outboxevent.create(data={"payload": "{not json"})
+        await enqueue(db, [event(2)])
+        consumer = Consumer()
+        assert await relay(db, consumer).relay_once() == 2
+        assert consumer.batches == [["p2"]]
+        assert await db.outboxevent.count() == 0
+
+    asyncio.run(test())
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from rate_limit import AdmissionControlMiddleware, InMemoryBackend, Limit
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("10/minute", Limit(10, 60.0)),
+    ("5/seconds", Limit(5, 1.0)),
+    (" 3/HOUR ", Limit(3, 3600.0)),
+    ("7", Limit(7, 1.0)),
+    ("off", None),
+    ("", None),
+    ("0", None),
+    ("0/minute", None),
+])
+def test_limit_parse(value, expected):
+    assert Limit.parse(value) == expected
+
+
+@pytest.mark.parametrize("value", ["-1/minute", "1.5/minute", "ten/minute", "10/fortnight"])
+def test_limit_parse_rejects_bad_values(value):
+    with pytest.raises(ValueError):
+        Limit.parse(value)
+
+
+def test_limit_requires_positive_capacity():
+    with pytest.raises(ValueError):
+        Limit(0, 60.0)
+
+
+def test_consume_takes_from_all_buckets_or_none():
+    async def run():
+        backend = InMemoryBackend()
+        ip, user = ("ip", Limit(5, 60.0)), ("user", Limit(2, 60.0))
+        results = [await backend.consume([ip, user]) for _ in range(4)]
+        # The user bucket ran dry after two; the rejected calls left the IP bucket alone.
+        assert [allowed for allowed, _ in results] == [True, True, False, False]
+        assert all(retry_after > 0 for _, retry_after in results[2:])
+        assert [await backend.consume([ip]) for _ in range(4)][-1][0] is False
+        assert backend._buckets["ip"][0] < 1
+
+    asyncio.run(run())
+
+
+def make_app(release: asyncio.Event, calls: list):
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+async def request(middleware, path="/products", client="10.0.0.1"):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [], "client": (client, 1234)}
+    await middleware(scope, receive, send)
+    start = messages[0]
+    return start["status"], dict(start["headers"])
+
+
+def test_rate_limited_requests_get_429_with_retry_after():
+    async def run():
+        release, calls = asyncio.Event(), []
+        release.set()
+        middleware = AdmissionControlMiddleware(
+            make_app(release, calls),
+            backend=InMemoryBackend(),
+            limits={"search": (Limit(2, 60.0), None)},
+            max_concurrent=4,
+        )
+        statuses = [(await request(middleware))[0] for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        status, headers = await request(middleware)
+        assert status == 429 and int(headers[b"retry-after"]) >= 1
+        assert (await request(middleware, client="10.0.0.2"))[0] == 200
+        assert len(calls) == 3
+
+    asyncio.run(run())
+
+
+def test_concurrency_cap_sheds_with_503():
+    async def run():
+        release, calls = asyncio.Event(), []
+        middleware = AdmissionControlMiddleware(
+            make_app(release, calls),
+            backend=InMemoryBackend(),
+            limits={},
+            max_concurrent=1,
+            max_queued=1,
+            queue_timeout=0.05,
+        )
+        first = asyncio.ensure_future(request(middleware))
+        await asyncio.sleep(0)
+        # One request holds the only slot: the next waits out the queue
+        # timeout, and with the queue full a third is shed immediately.
+        queued = asyncio.ensure_future(request(middleware))
+        await asyncio.sleep(0)
+        status, headers = await request(middleware)
+        assert status == 503 and headers[b"retry-after"] == b"1"
+        assert (await queued)[0] == 503
+        release.set()
+        assert (await first)[0] == 200
+        assert (await request(middleware))[0] == 200
+        assert middleware.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_exempt_and_uncapped_paths_skip_the_cap():
+    async def run():
+        release, calls = asyncio.Event(), []
+        middleware = AdmissionControlMiddleware(
+            make_app(release, calls), backend=InMemoryBackend(), limits={}, max_concurrent=1, max_queued=0
+        )
+        held = asyncio.ensure_future(request(middleware))
+        await asyncio.sleep(0)
+        profile = asyncio.ensure_future(request(middleware, path="/admin/profile"))
+        health = asyncio.ensure_future(request(middleware, path="/health"))
+        await asyncio.sleep(0)
+        assert calls == ["/products", "/admin/profile", "/health"]
+        release.set()
+        assert [(await task)[0] for task in (held, profile, health)] == [200, 200, 200]
+
+    asyncio.run(run())
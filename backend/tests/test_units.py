@@ -0,0 +1,126 @@
+import re
+from fractions import Fraction
+
+import pytest
+
+import units
+
+
+@pytest.mark.parametrize("name, symbol", [
+    ("kg", "kg"),
+    ("KGS", "kg"),
+    ("ton", "t"),
+    ("Metric  Tons", "t"),
+    ("Ton (US)", "short ton"),
+    ("lbs.", "lb"),
+    ("  cubic   metres ", "m³"),
+    ("M3", "m³"),
+    ("mile²", "mi²"),
+    ("fl. oz", "fl oz"),
+])
+def test_lookup_normalizes_case_spacing_and_dots(name, symbol):
+    assert units.lookup(name).symbol == symbol
+
+
+def test_lookup_unknown_unit():
+    assert units.lookup("boxes") is None
+    with pytest.raises(units.UnknownUnit):
+        units.require("boxes")
+
+
+def test_every_alias_resolves_to_its_unit():
+    for unit in units.UNITS:
+        for name in (unit.symbol, *unit.aliases):
+            assert units.lookup(name) is unit
+
+
+def test_exact_factors():
+    assert units.require("lb").factor == 16 * units.require("oz").factor
+    assert units.require("acre").factor == 43_560 * units.require("ft²").factor
+    assert units.require("mi²").factor == 640 * units.require("acre").factor
+    assert units.require("bbl").factor == 42 * units.require("gal").factor
+    assert units.require("gal").factor == 128 * units.require("fl oz").factor
+    assert units.require("short ton").factor == Fraction("907.18474")
+
+
+@pytest.mark.parametrize("value, source, target, expected", [
+    (1, "mi²", "acre", 640),
+    (1, "lb", "oz", 16),
+    (1, "ton (US)", "lb", 2000),
+    (1, "t", "kg", 1000),
+    (2.5, "l", "ml", 2500),
+])
+def test_convert_is_exact(value, source, target, expected):
+    assert units.convert(value, source, target) == expected
+
+
+@pytest.mark.parametrize("source, target", [("lb", "kg"), ("gal", "l"), ("acre", "ha"), ("dozen", "unit")])
+def test_convert_round_trips(source, target):
+    for value in (0.1, 1, 3.7, 2_500_000):
+        there = Fraction(value) * units.require(source).factor / units.require(target).factor
+        assert float(there * units.require(target).factor / units.require(source).factor) == value
+
+
+def test_convert_rejects_cross_family():
+    with pytest.raises(ValueError):
+        units.convert(1, "kg", "l")
+
+
+def test_to_canonical():
+    assert units.to_canonical(2, units.require("t")) == 2000
+    assert units.to_canonical(1, units.require("lb")) == 0.45359237
+    assert units.to_canonical(1, units.require("gal")) == pytest.approx(0.003785411784, rel=0, abs=1e-18)
+
+
+def test_quantity_fields():
+    assert units.quantity_fields(3, "tons") == {"unitFamily": "mass", "canonicalQuantity": 3000.0}
+    assert units.quantity_fields(3, "boxes") == {"unitFamily": None, "canonicalQuantity": None}
+    assert units.quantity_fields(float("nan"), "kg") == {"unitFamily": None, "canonicalQuantity": None}
+
+
+def _cases(sql, column):
+    match = re.search(rf"{column} = (?:quantity \* )?CASE btrim\(.*?\) (.*?) END", sql)
+    return dict(re.findall(r"WHEN '((?:[^']|'')*)' THEN '?([^' ]+?)'?(?:::double precision)?(?= WHEN|$)", match.group(1)))
+
+
+def test_backfill_sql_covers_the_registry():
+    sql = units.backfill_sql()
+    families = _cases(sql, "unit_family")
+    factors = _cases(sql, "canonical_quantity")
+    names = {name.lower() for unit in units.UNITS for name in (unit.symbol, *unit.aliases)}
+    assert set(families) == set(factors) == names
+    for name in names:
+        unit = units.lookup(name)
+        assert families[name] == unit.family
+        assert float(factors[name]) == float(unit.factor)
+
+
+def test_backfill_sql_scope():
+    assert units.backfill_sql().endswith("WHERE canonical_quantity IS NULL")
+    assert "WHERE" not in units.backfill_sql(only_missing=False)
+    assert units.backfill_sql().count("UPDATE") == 1
+
+
+def test_derive_sql_binds_every_id():
+    sql = units.derive_sql(3)
+    assert sql.startswith("UPDATE products SET unit_family = CASE")
+    assert sql.endswith("WHERE id IN ($1, $2, $3)")
+
+
+def test_bulk_update_derives_canonical_quantities(client):
+    from tests.conftest import auth
+
+    body = {"name": "x", "unit": "kg", "tax_rate": 0, "time_period": "2024", "tags": [], "category": "Food"}
+    ids = [
+        client.post("/products", json={**body, "quantity": quantity}, headers=auth("ala")).json()["id"]
+        for quantity in (1, 2, 2, 16)
+    ]
+    response = client.post("/products/bulk-update", json={"ids": ids, "patch": {"unit": "lb"}}, headers=auth("ala"))
+    assert response.json()["updated"] == 4
+    rows = {p["id"]: p for p in client.get("/countries/country-ala/products").json()}
+    assert [rows[i]["canonicalQuantity"] for i in ids] == [units.convert(q, "lb", "kg") for q in (1, 2, 2, 16)]
+    assert {rows[i]["unitFamily"] for i in ids} == {"mass"}
+
+    client.post("/products/bulk-update", json={"ids": ids[:2], "patch": {"unit": "crates"}}, headers=auth("ala"))
+    rows = {p["id"]: p for p in client.get("/countries/country-ala/products").json()}
+    assert [(rows[i]["unitFamily"], rows[i]["canonicalQuantity"]) for i in ids[:2]] == [(None, None)] * 2
@@ -0,0 +1,95 @@
+import pytest
+
+from tests.conftest import auth
+
+BODY = {
+    "name": "Coffee",
+    "unit": "kg",
+    "quantity": 10,
+    "tax_rate": 5.0,
+    "time_period": "2024",
+    "tags": [],
+    "category": "Food",
+}
+
+
+@pytest.fixture
+def product(client):
+    response = client.post("/products", json=BODY, headers=auth("ala"))
+    assert response.status_code == 200
+    return response.json()
+
+
+def put(client, product_id, if_match=None, key="ala", **changes):
+    headers = auth(key)
+    if if_match is not None:
+        headers["If-Match"] = if_match
+    return client.put(f"/products/{product_id}", json={**BODY, **changes}, headers=headers)
+
+
+def test_matching_if_match_bumps_version_and_etag(client, product):
+    assert product["version"] == 1
+    response = put(client, product["id"], '"1"', name="Coffee beans")
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["ETag"] == '"2"'
+
+    # Weak tags and lists of tags are accepted too.
+    response = put(client, product["id"], 'W/"7", "2"', name="Coffee")
+    assert response.status_code == 200 and response.headers["ETag"] == '"3"'
+
+
+def test_stale_if_match_returns_412_with_current_etag(client, product):
+    assert put(client, product["id"], '"1"').status_code == 200
+    response = put(client, product["id"], '"1"', name="lost update")
+    assert response.status_code == 412
+    assert response.headers["ETag"] == '"2"'
+    assert client.get("/countries/country-ala/products").json()[0]["name"] == "Coffee"
+
+
+def test_without_if_match_the_last_write_wins(client, product):
+    assert put(client, product["id"]).status_code == 200
+    assert put(client, product["id"], "*").json()["version"] == 3
+
+
+def test_malformed_if_match_is_400(client, product):
+    assert put(client, product["id"], "not-an-etag").status_code == 400
+
+
+def test_unmatched_update_is_diagnosed(client, product):
+    assert put(client, "no-such-product", '"1"').status_code == 404
+    # Another country's admin: out of scope wins over a stale version.
+    assert put(client, product["id"], '"9"', key="bor").status_code == 403
+
+
+def test_patch_honours_if_match(client, product):
+    headers = {**auth("ala"), "If-Match": '"1"'}
+    response = client.patch(f"/products/{product['id']}", json={"tax_rate": 7.5}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"' and response.json()["taxRate"] == 7.5
+
+    response = client.patch(f"/products/{product['id']}", json={"tax_rate": 1.0}, headers=headers)
+    assert response.status_code == 412 and response.headers["ETag"] == '"2"'
+
+
+def test_bulk_update_bumps_versions_so_stale_edits_conflict(client, product):
+    other = client.post("/products", json={**BODY, "name": "Tea"}, headers=auth("ala")).json()
+    response = client.post(
+        "/products/bulk-update",
+        json={"ids": [product["id"], other["id"]], "patch": {"category": "Drinks"}},
+        headers=auth("ala"),
+    )
+    assert response.json() == {"matched": 2, "updated": 2, "skipped": []}
+    assert put(client, product["id"], '"1"').status_code == 412
+    assert put(client, other["id"], '"2"').status_code == 200
+
+
+def test_exporter_patch_honours_if_match(client):
+    exporter = client.post(
+        "/exporters", json={"name": "Acme", "license_id": "LIC-1"}, headers=auth("ala")
+    ).json()
+    headers = {**auth("ala"), "If-Match": f'"{exporter["version"]}"'}
+    response = client.patch(f"/exporters/{exporter['id']}", json={"contact": "sales@acme.test"}, headers=headers)
+    assert response.status_code == 200 and response.headers["ETag"] == f'"{exporter["version"] + 1}"'
+    response = client.patch(f"/exporters/{exporter['id']}", json={"contact": "x"}, headers=headers)
+    assert response.status_code == 412
@@ -0,0 +1,219 @@
+"""OpenTelemetry request tracing.
+
+Each request gets a server span; inside it the application records spans for
+authentication, every Prisma query (reported through the ``db`` query
+observers), audit writes and response serialization, so a slow request can be
+broken down into where the time actually went.
+
+Configuration (environment):
+
+``TRACE_EXPORTER``
+    ``none`` (default, tracing disabled), ``file``, ``console`` or ``otlp``.
+``TRACE_FILE``
+    Output path for the ``file`` exporter, default ``traces.jsonl``. One
+    OTLP-style JSON span per line.
+``OTEL_EXPORTER_OTLP_ENDPOINT``
+    Collector endpoint for the ``otlp`` exporter (requires the optional
+    ``opentelemetry-exporter-otlp-proto-http`` package).
+``TRACE_SAMPLE_RATIO``
+    Fraction of new traces to record, default ``1.0``. Incoming W3C
+    ``traceparent`` headers are honoured.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Sequence
+
+from fastapi.routing import APIRoute
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from app_logging import get_logger
+from db import QueryEvent
+
+logger = get_logger("tracing")
+
+tracer = trace.get_tracer("gevp.api")
+
+_provider: Optional[TracerProvider] = None
+_timings: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("route_timings", default=None)
+
+
+class FileSpanExporter(SpanExporter):
+    """Append finished spans to a JSON-lines file (a local stand-in for a collector)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(json.dumps(json.loads(span.to_json(indent=None))) + "\n" for span in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _create_exporter(kind: str) -> Optional[SpanExporter]:
+    if kind == "file":
+        return FileSpanExporter(os.getenv("TRACE_FILE", "traces.jsonl"))
+    if kind == "console":
+        return ConsoleSpanExporter()
+    if kind == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("TRACE_EXPORTER=otlp but opentelemetry-exporter-otlp-proto-http is not installed")
+            return None
+        return OTLPSpanExporter()
+    return None
+
+
+def configure_tracing() -> bool:
+    """Install the tracer provider. Returns ``False`` when tracing is disabled."""
+    global _provider
+    if _provider is not None:
+        return True
+
+    exporter = _create_exporter(os.getenv("TRACE_EXPORTER", "none").lower())
+    if exporter is None:
+        return False
+
+    ratio = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", "gevp-api")}),
+        sampler=ParentBased(TraceIdRatioBased(ratio)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    return True
+
+
+def shutdown_tracing() -> None:
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child span of the current request. No-op when tracing is disabled."""
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def observe_query(event: QueryEvent) -> None:
+    """``db`` query observer: record each Prisma call as a span after the fact."""
+    if _provider is None:
+        return
+    query_span = tracer.start_span(
+        f"prisma.{event.model}.{event.action}",
+        kind=SpanKind.CLIENT,
+        start_time=event.start_time_ns,
+        attributes={
+            "db.system": "postgresql",
+            "db.operation": event.action,
+            "db.prisma.model": event.model,
+        },
+    )
+    if event.error is not None:
+        query_span.record_exception(event.error)
+        query_span.set_status(Status(StatusCode.ERROR))
+    query_span.end(end_time=event.start_time_ns + int(event.duration * 1e9))
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope.get("headers", ())}
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with tracer.start_as_current_span(
+            scope["method"],
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        ) as request_span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    request_span.update_name(f"{scope['method']} {route}")
+                    request_span.set_attribute("http.route", route)
+                request_span.set_attribute("http.status_code", status_code)
+                if status_code >= 500:
+                    request_span.set_status(Status(StatusCode.ERROR))
+
+
+class TracedRoute(APIRoute):
+    """APIRoute that records the time between the endpoint returning and the
+    response being ready as a ``serialize`` span (response_model validation and
+    JSON encoding)."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _mark_endpoint_end(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            timings = {}
+            token = _timings.set(timings)
+            try:
+                response = await handler(request)
+            finally:
+                _timings.reset(token)
+            endpoint_end = timings.get("endpoint_end_ns")
+            if endpoint_end is not None:
+                tracer.start_span("serialize", start_time=endpoint_end).end()
+            return response
+
+        return traced_handler
+
+
+def _mark_endpoint_end(endpoint):
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timings = _timings.get()
+            if timings is not None:
+                timings["endpoint_end_ns"] = time.time_ns()
+
+    return wrapper
@@ -0,0 +1,188 @@
+"""Unit registry and quantity normalization.
+
+Products keep the unit and quantity the user entered. Alongside them we store
+the unit's family and the quantity expressed in the family's SI unit
+(``canonicalQuantity``), so range filters, sorting and sums across units run
+in SQL. Products whose unit is not in the registry ("boxes") keep ``NULL``
+canonical columns and drop out of those queries.
+
+Factors are exact, from the unit definitions (1 lb = 0.45359237 kg,
+1 US gal = 3.785411784 L, 1 ft = 0.3048 m), and kept as fractions until the
+final conversion to float.
+
+A bare "ton"/"tons" is the metric tonne (1000 kg); US and UK tons must be
+named ("short ton", "ton (US)", "long ton"). The old frontend converter treated
+"ton" as its own unit next to "ton (US)", so the backfill reads existing
+"ton" rows as tonnes; rows meaning short tons need their unit corrected.
+
+Existing rows are filled in with ``python units.py --backfill``, one UPDATE
+generated from the registry.
+"""
+
+import argparse
+import asyncio
+import math
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Unit:
+    symbol: str
+    family: str
+    # Canonical units per one of this unit.
+    factor: Fraction
+    aliases: Tuple[str, ...] = ()
+
+
+# Canonical (SI) unit of each family.
+CANONICAL = {"mass": "kg", "volume": "m³", "area": "m²", "count": "unit"}
+
+_LB = Fraction("0.45359237")
+_US_GALLON = Fraction("3.785411784") / 1000
+_FOOT = Fraction("0.3048")
+_MILE = 5280 * _FOOT
+
+UNITS: List[Unit] = [
+    # mass, kg
+    Unit("g", "mass", Fraction(1, 1000), ("gram", "grams")),
+    Unit("kg", "mass", Fraction(1), ("kgs", "kilogram", "kilograms")),
+    Unit("t", "mass", Fraction(1000), ("ton", "tons", "tonne", "tonnes", "metric ton", "metric tons", "mt")),
+    Unit("lb", "mass", _LB, ("lbs", "pound", "pounds")),
+    Unit("oz", "mass", _LB / 16, ("ounce", "ounces")),
+    Unit("short ton", "mass", 2000 * _LB, ("short tons", "ton (us)", "us ton", "us tons")),
+    Unit("long ton", "mass", 2240 * _LB, ("long tons", "ton (uk)", "uk ton", "uk tons")),
+    # volume, m³
+    Unit("ml", "volume", Fraction(1, 1_000_000), ("milliliter", "milliliters", "millilitre", "millilitres")),
+    Unit("l", "volume", Fraction(1, 1000), ("liter", "liters", "litre", "litres")),
+    Unit("hl", "volume", Fraction(1, 10), ("hectoliter", "hectoliters", "hectolitre", "hectolitres")),
+    Unit("m³", "volume", Fraction(1), ("m3", "cubic meter", "cubic meters", "cubic metre", "cubic metres")),
+    Unit("gal", "volume", _US_GALLON, ("gallon", "gallons", "us gallon", "us gallons")),
+    Unit("fl oz", "volume", _US_GALLON / 128, ("fluid ounce", "fluid ounces")),
+    Unit("ft³", "volume", _FOOT ** 3, ("ft3", "cubic foot", "cubic feet")),
+    Unit("bbl", "volume", 42 * _US_GALLON, ("barrel", "barrels")),
+    # area, m²
+    Unit("m²", "area", Fraction(1), ("m2", "square meter", "square meters", "square metre", "square metres")),
+    Unit("ha", "area", Fraction(10_000), ("hectare", "hectares")),
+    Unit("km²", "area", Fraction(1_000_000), ("km2", "square kilometer", "square kilometers")),
+    Unit("ft²", "area", _FOOT ** 2, ("ft2", "square foot", "square feet")),
+    Unit("acre", "area", 43_560 * _FOOT ** 2, ("acres",)),
+    Unit("mi²", "area", _MILE ** 2, ("mile²", "mi2", "square mile", "square miles")),
+    # count, unit
+    Unit("unit", "count", Fraction(1), ("units", "piece", "pieces", "pcs", "item", "items")),
+    Unit("dozen", "count", Fraction(12), ("dozens",)),
+]
+
+_BY_NAME: Dict[str, Unit] = {}
+for _unit in UNITS:
+    for _name in (_unit.symbol, *_unit.aliases):
+        assert _name.lower() not in _BY_NAME, _name
+        _BY_NAME[_name.lower()] = _unit
+
+
+class UnknownUnit(ValueError):
+    pass
+
+
+def lookup(name: str) -> Optional[Unit]:
+    """Registry entry for a user-entered unit name, ignoring case and spacing."""
+    return _BY_NAME.get(" ".join(name.lower().replace(".", "").split()))
+
+
+def require(name: str) -> Unit:
+    unit = lookup(name)
+    if unit is None:
+        raise UnknownUnit(name)
+    return unit
+
+
+def convert(value: float, from_unit: str, to_unit: str) -> float:
+    source, target = require(from_unit), require(to_unit)
+    if source.family != target.family:
+        raise ValueError(f"Cannot convert {source.family} ({from_unit}) to {target.family} ({to_unit})")
+    return float(Fraction(value) * source.factor / target.factor)
+
+
+def to_canonical(value: float, unit: Unit) -> float:
+    return float(Fraction(value) * unit.factor)
+
+
+def quantity_fields(quantity: float, unit: str) -> Dict[str, Optional[object]]:
+    """``unitFamily`` and ``canonicalQuantity`` for a product's quantity and unit."""
+    entry = lookup(unit)
+    if entry is None or not math.isfinite(quantity):
+        return {"unitFamily": None, "canonicalQuantity": None}
+    return {"unitFamily": entry.family, "canonicalQuantity": to_canonical(quantity, entry)}
+
+
+def _derived_assignments() -> str:
+    """SQL ``SET`` list deriving both canonical columns from ``unit`` and ``quantity``."""
+    normalized = "lower(regexp_replace(replace(unit, '.', ''), '\\s+', ' ', 'g'))"
+    family, factor = [], []
+    for name, unit in sorted(_BY_NAME.items()):
+        literal = "'" + name.replace("'", "''") + "'"
+        family.append(f"WHEN {literal} THEN '{unit.family}'")
+        factor.append(f"WHEN {literal} THEN {float(unit.factor)!r}::double precision")
+    return (
+        f"unit_family = CASE btrim({normalized}) {' '.join(family)} END, "
+        f"canonical_quantity = quantity * CASE btrim({normalized}) {' '.join(factor)} END"
+    )
+
+
+def backfill_sql(only_missing: bool = True) -> str:
+    """One UPDATE that sets the canonical columns of every product from the registry."""
+    where = " WHERE canonical_quantity IS NULL" if only_missing else ""
+    return f"UPDATE products SET {_derived_assignments()}{where}"
+
+
+def derive_sql(count: int) -> str:
+    """One UPDATE that sets the canonical columns of the ``count`` products whose ids are ``$1..$n``."""
+    placeholders = ", ".join(f"${i}" for i in range(1, count + 1))
+    return f"UPDATE products SET {_derived_assignments()} WHERE id IN ({placeholders})"
+
+
+async def derive(db, ids: List[str]) -> None:
+    """Recompute the canonical columns of products ``ids`` from their stored quantity and unit.
+
+    One statement in SQL. Clients without raw SQL (the in-memory one) fall
+    back to an ``update_many`` per distinct result.
+    """
+    if not ids:
+        return
+    try:
+        await db.execute_raw(derive_sql(len(ids)), *ids)
+        return
+    except NotImplementedError:
+        pass
+    groups: Dict[Tuple, List[str]] = {}
+    for row in await db.product.find_many(where={"id": {"in": ids}}):
+        groups.setdefault(tuple(quantity_fields(row.quantity, row.unit).items()), []).append(row.id)
+    for fields, group in groups.items():
+        await db.product.update_many(where={"id": {"in": group}}, data=dict(fields))
+
+
+async def backfill(only_missing: bool = True) -> int:
+    from db import create_client
+
+    client = create_client()
+    await client.connect()
+    try:
+        return await client.execute_raw(backfill_sql(only_missing))
+    finally:
+        await client.disconnect()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backfill", action="store_true", help="fill canonical quantity columns of existing products")
+    parser.add_argument("--all", action="store_true", help="with --backfill, recompute rows that already have them")
+    args = parser.parse_args()
+    if args.backfill:
+        print(f"Updated {asyncio.run(backfill(only_missing=not args.all))} products")
+    else:
+        for unit in UNITS:
+            print(f"{unit.symbol:10} {unit.family:7} {float(unit.factor)!r} {CANONICAL[unit.family]}")
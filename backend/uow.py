@@ -0,0 +1,60 @@
+"""Unit of work: a mutation, its audit rows and its change events in one transaction.
+
+Handlers make their change through ``work.tx`` and record what they did with
+``work.audit`` and ``work.changed``. Audit rows and outbox events are buffered
+and written as one ``create_many`` each just before commit, so a mutation
+costs its own statements plus two inserts, and either all of it commits or
+none of it does. Permission checks belong in the mutation's ``WHERE`` (see
+``main.country_scope``) rather than in a separate read.
+
+``on_commit`` runs with the committed events after the transaction closes;
+nothing runs for a rolled-back unit.
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from events import ChangeEvent
+from outbox import enqueue
+from tracing import span
+
+
+class UnitOfWork:
+    def __init__(self, tx, user_id: Optional[str]):
+        self.tx = tx
+        self.user_id = user_id
+        self.audits: List[Dict[str, str]] = []
+        self.events: List[ChangeEvent] = []
+
+    def audit(self, action: str, description: str, user_id: Optional[str] = None) -> None:
+        self.audits.append({"userId": user_id or self.user_id, "action": action, "description": description})
+
+    def changed(self, entity: str, action: str, record) -> None:
+        self.events.append(ChangeEvent(
+            entity=entity,
+            action=action,
+            id=record.id,
+            country_id=record.countryId,
+            data=None if action == "deleted" else jsonable_encoder(record),
+        ))
+
+    async def flush(self) -> None:
+        if self.audits:
+            with span("audit.write", action=",".join(sorted({a["action"] for a in self.audits}))):
+                await self.tx.auditlog.create_many(data=self.audits)
+        if self.events:
+            await enqueue(self.tx, self.events)
+
+
+@asynccontextmanager
+async def unit_of_work(
+    db, user_id: Optional[str] = None, on_commit: Optional[Callable[[List[ChangeEvent]], None]] = None
+) -> AsyncIterator[UnitOfWork]:
+    async with db.tx() as tx:
+        work = UnitOfWork(tx, user_id)
+        yield work
+        await work.flush()
+    if on_commit is not None and work.events:
+        on_commit(work.events)
@@ -0,0 +1,65 @@
+"""uvicorn worker class for gunicorn (see ``gunicorn.conf.py``)."""
+
+import asyncio
+import os
+import signal
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+# Seconds between SIGTERM and closing the listener, during which /ready
+# answers 503 so the load balancer stops routing here first.
+READINESS_DRAIN_SECONDS = float(os.getenv("READINESS_DRAIN_SECONDS", "5"))
+
+
+class DrainingServer(Server):
+    """uvicorn server that reports ``draining`` before it stops accepting.
+
+    The first SIGTERM flips the app's ``app.state.readiness`` to ``draining``
+    and keeps serving for ``drain_seconds``; only then does uvicorn's normal
+    graceful shutdown start. A second SIGTERM, or any other exit signal, stops
+    right away.
+    """
+
+    def __init__(self, config, drain_seconds: float):
+        super().__init__(config)
+        self.drain_seconds = drain_seconds
+        self.draining = False
+
+    def handle_exit(self, sig, frame) -> None:
+        if sig == signal.SIGTERM and self.drain_seconds > 0 and not self.draining and not self.should_exit:
+            self.draining = True
+            readiness = getattr(getattr(self.config.app, "state", None), "readiness", None)
+            if readiness is not None:
+                readiness.state = "draining"
+            asyncio.get_running_loop().call_later(self.drain_seconds, super().handle_exit, sig, frame)
+            return
+        super().handle_exit(sig, frame)
+
+
+class Worker(UvicornWorker):
+    """uvicorn worker pinned to uvloop and httptools.
+
+    On SIGTERM the worker first reports not-ready for
+    ``READINESS_DRAIN_SECONDS`` (see ``DrainingServer``). uvicorn's own
+    graceful shutdown is bounded by what is left of gunicorn's
+    ``graceful_timeout``, less a margin, so the app's shutdown handler (Prisma
+    disconnect, log flush) runs before the master escalates to SIGKILL.
+    """
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.drain_seconds = min(READINESS_DRAIN_SECONDS, max(0, self.cfg.graceful_timeout - 6))
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - 5 - self.drain_seconds)
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config, drain_seconds=self.drain_seconds)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
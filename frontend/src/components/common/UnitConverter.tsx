@@ -1,6 +1,8 @@
-import React, { useState } from 'react';
+import React, { useMemo, useState } from 'react';
 import { RotateCcw } from 'lucide-react';
 import { useTranslation } from 'react-i18next';
+import { useQuery } from 'react-query';
+import { apiService, UnitInfo } from '../../services/apiService';
 
 const UnitConverter = () => {
   const { t } = useTranslation();
@@ -24,23 +26,25 @@ const UnitConverter = () => {
     }
   };
 
-  const conversions: { [key: string]: number } = {
-    'kg-lb': 2.20462,
-    'ton-ton (US)': 1.10231,
-    'liter-gallon': 0.264172,
-    'm²-ft²': 10.7639
-  };
+  // Exact factors from the backend unit registry, keyed by symbol and alias.
+  const { data: registry } = useQuery('units', () => apiService.getUnits(), { staleTime: Infinity });
+  const factors = useMemo(() => {
+    const byName: { [name: string]: { family: string; factor: number } } = {};
+    (registry || []).forEach((unit: UnitInfo) => {
+      [unit.symbol, ...unit.aliases].forEach(name => {
+        byName[name.toLowerCase()] = { family: unit.family, factor: unit.factor };
+      });
+    });
+    return byName;
+  }, [registry]);
 
   const convert = (value: number, from: string, to: string): number => {
-    const conversionKey = `${from}-${to}`;
-    const reverseKey = `${to}-${from}`;
-    
-    if (conversions[conversionKey]) {
-      return value * conversions[conversionKey];
-    } else if (conversions[reverseKey]) {
-      return value / conversions[reverseKey];
+    const source = factors[from.toLowerCase()];
+    const target = factors[to.toLowerCase()];
+    if (!source || !target || source.family !== target.family) {
+      return value;
     }
-    return value;
+    return value * source.factor / target.factor;
   };
 
   const convertedValue = convert(value, fromUnit, toUnit);
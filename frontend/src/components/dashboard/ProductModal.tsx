@@ -61,7 +61,7 @@ const ProductModal: React.FC<ProductModalProps> = ({ product, onClose, onSuccess
       };
 
       if (product) {
-        await apiService.updateProduct(product.id, productData);
+        await apiService.updateProduct(product.id, productData, product.version);
         toast.success(t('dashboard.products.updateSuccess'));
       } else {
         await apiService.createProduct(productData);
@@ -69,7 +69,7 @@ const ProductModal: React.FC<ProductModalProps> = ({ product, onClose, onSuccess
       }
       onSuccess();
     } catch (error: any) {
-      toast.error(error.message || t('dashboard.products.error'));
+      toast.error(error.response?.data?.detail || error.message || t('dashboard.products.error'));
     } finally {
       setIsLoading(false);
     }
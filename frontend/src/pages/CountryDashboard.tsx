@@ -1,10 +1,10 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Plus, Package, Users, TrendingUp, Calendar, Edit, Trash2 } from 'lucide-react';
 import { useTranslation } from 'react-i18next';
 import { motion } from 'framer-motion';
-import { useQuery } from 'react-query';
+import { useQuery, useQueryClient } from 'react-query';
 import { useAuthStore } from '../stores/authStore';
-import { apiService } from '../services/apiService';
+import { apiService, ChangeEvent } from '../services/apiService';
 import ProductModal from '../components/dashboard/ProductModal';
 import ExporterModal from '../components/dashboard/ExporterModal';
 
@@ -29,6 +29,20 @@ const CountryDashboard = () => {
     { enabled: !!user?.countryId }
   );
 
+  // Apply live changes from other sessions to the cached lists instead of polling
+  const queryClient = useQueryClient();
+  useEffect(() => {
+    if (!user?.countryId) return;
+    return apiService.subscribeToChanges({ countryId: user.countryId }, (change: ChangeEvent) => {
+      const key = change.entity === 'product' ? 'countryProducts' : 'countryExporters';
+      queryClient.setQueryData([key, user.countryId], (items: any[] = []) => {
+        if (change.action === 'deleted') return items.filter((item) => item.id !== change.id);
+        if (!items.some((item) => item.id === change.id)) return [...items, change.data];
+        return items.map((item) => (item.id === change.id ? { ...item, ...change.data } : item));
+      });
+    });
+  }, [user?.countryId, queryClient]);
+
   const stats = [
     {
       icon: Package,
@@ -2,6 +2,23 @@ import axios from 'axios';
 
 const API_BASE_URL = 'http://localhost:8000';
 
+export interface ChangeEvent {
+  entity: 'product' | 'exporter';
+  action: 'created' | 'updated' | 'deleted';
+  id: string;
+  country_id: string | null;
+  data: any | null;
+  ts: number;
+}
+
+export interface UnitInfo {
+  symbol: string;
+  family: 'mass' | 'volume' | 'area' | 'count';
+  factor: number;
+  canonical: string;
+  aliases: string[];
+}
+
 class ApiService {
   private api;
 
@@ -92,8 +109,11 @@ class ApiService {
     return response.data;
   }
 
-  async updateProduct(productId: string, productData: any) {
-    const response = await this.api.put(`/products/${productId}`, productData);
+  // Pass the version the edit started from; the server answers 412 if the
+  // product has been changed since.
+  async updateProduct(productId: string, productData: any, version?: number) {
+    const headers = version !== undefined ? { 'If-Match': `"${version}"` } : undefined;
+    const response = await this.api.put(`/products/${productId}`, productData, { headers });
     return response.data;
   }
 
@@ -102,11 +122,26 @@ class ApiService {
     return response.data;
   }
 
+  // Unit registry: factors to each family's SI unit
+  async getUnits(): Promise<UnitInfo[]> {
+    const response = await this.api.get('/units');
+    return response.data;
+  }
+
   // Exporters endpoints
+  // Every exporter: follows X-Next-Cursor until the last page
   async getExporters(countryId?: string) {
-    const params = countryId ? { country_id: countryId } : {};
-    const response = await this.api.get('/exporters', { params });
-    return response.data;
+    const exporters: any[] = [];
+    let cursor: string | undefined;
+    do {
+      const params: Record<string, string | number> = { limit: 500 };
+      if (countryId) params.country_id = countryId;
+      if (cursor) params.cursor = cursor;
+      const response = await this.api.get('/exporters', { params });
+      exporters.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return exporters;
   }
 
   async createExporter(exporterData: any) {
@@ -114,6 +149,25 @@ class ApiService {
     return response.data;
   }
 
+  // Change feed: server-sent product/exporter events; returns an unsubscribe function
+  subscribeToChanges(
+    params: { countryId?: string; entity?: 'product' | 'exporter' },
+    onChange: (change: ChangeEvent) => void
+  ) {
+    const query = new URLSearchParams();
+    if (params.countryId) query.append('country_id', params.countryId);
+    if (params.entity) query.append('entity', params.entity);
+
+    const source = new EventSource(`${API_BASE_URL}/events?${query}`);
+    const handler = (event: MessageEvent) => onChange(JSON.parse(event.data));
+    for (const entity of ['product', 'exporter']) {
+      for (const action of ['created', 'updated', 'deleted']) {
+        source.addEventListener(`${entity}.${action}`, handler as EventListener);
+      }
+    }
+    return () => source.close();
+  }
+
   // Admin endpoints
   async getAllUsers() {
     const response = await this.api.get('/admin/users');